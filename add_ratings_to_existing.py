@@ -1,86 +1,84 @@
-import sqlite3
 import random
+import argparse
 from datetime import datetime, timedelta
 
+from batch_update import CHUNK_SIZE, JOB_PAUSE_SECONDS, add_job_arguments, batched_update, reset_job
+from migrations import RATING_DATE_MIGRATION, add_column_if_missing, applied_versions, has_column
+from db_connection import connect
+
 DB_PATH = "music_artists.db"
 
-def add_ratings_to_existing_records():
-    conn = sqlite3.connect(DB_PATH)
+def random_rating_date(date_seen):
+    """Rating date a few days after the show (or in the last month if unknown)."""
+    if date_seen:
+        if isinstance(date_seen, str):
+            try:
+                date_obj = datetime.strptime(date_seen.split()[0], '%Y-%m-%d')
+            except:
+                date_obj = datetime.strptime(date_seen, '%Y-%m-%d %H:%M:%S.%f')
+        else:
+            date_obj = date_seen
+        return date_obj + timedelta(days=random.randint(0, 7))
+    return datetime.now() - timedelta(days=random.randint(1, 30))
+
+def compute_ratings(rows):
+    """(id, date_seen) rows -> (id, rating, rating_date) rows."""
+    return [
+        (record_id, random.randint(6, 10), random_rating_date(date_seen).strftime('%Y-%m-%d'))
+        for record_id, date_seen in rows
+    ]
+
+def compute_ratings_only(rows):
+    """(id, date_seen) rows -> (id, rating) rows, for databases without rating_date."""
+    return [(record_id, random.randint(6, 10)) for record_id, _ in rows]
+
+def add_ratings_to_existing_records(chunk_size=CHUNK_SIZE, pause=JOB_PAUSE_SECONDS, restart=False):
+    conn = connect(DB_PATH, checkpoints=True)
     cursor = conn.cursor()
     
-    try:
-        cursor.execute("""
-            ALTER TABLE user_artist_tracking ADD COLUMN rating INTEGER
-        """)
+    if add_column_if_missing(conn, "user_artist_tracking", "rating", "INTEGER"):
         print("✓ Added rating column to user_artist_tracking table")
-    except sqlite3.OperationalError as e:
-        if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-            print("✓ Rating column already exists")
-        else:
-            print(f"Note: {e}")
-    
-    try:
-        cursor.execute("""
-            ALTER TABLE user_artist_tracking ADD COLUMN rating_date DATE
-        """)
+    else:
+        print("✓ Rating column already exists")
+    
+    # Migration 3 drops rating_date; don't bring it back once that has run
+    if RATING_DATE_MIGRATION in applied_versions(conn):
+        with_date = has_column(conn, "user_artist_tracking", "rating_date")
+        print("✓ Not re-adding rating_date (dropped by migration 3)")
+    elif add_column_if_missing(conn, "user_artist_tracking", "rating_date", "DATE"):
+        with_date = True
         print("✓ Added rating_date column to user_artist_tracking table")
-    except sqlite3.OperationalError as e:
-        if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-            print("✓ Rating_date column already exists")
-        else:
-            print(f"Note: {e}")
+    else:
+        with_date = True
+        print("✓ Rating_date column already exists")
     
-    conn.commit()
+    cursor.execute("SELECT COUNT(*) FROM user_artist_tracking WHERE rating IS NULL")
+    missing = cursor.fetchone()[0]
     
-    cursor.execute("""
-        SELECT id, date_seen 
-        FROM user_artist_tracking 
-        WHERE rating IS NULL
-    """)
-    
-    records = cursor.fetchall()
-    
-    if not records:
+    if not missing:
         print("No records found without ratings.")
+        conn.close()
         return
     
-    print(f"Found {len(records)} records without ratings.")
+    print(f"Found {missing} records without ratings.")
     print("Adding ratings to existing records...")
     print()
-    
-    updated_count = 0
-    
-    for record_id, date_seen in records:
-        rating = random.randint(6, 10)
-        
-        if date_seen:
-            if isinstance(date_seen, str):
-                try:
-                    date_obj = datetime.strptime(date_seen.split()[0], '%Y-%m-%d')
-                except:
-                    date_obj = datetime.strptime(date_seen, '%Y-%m-%d %H:%M:%S.%f')
-            else:
-                date_obj = date_seen
-            rating_date = date_obj + timedelta(days=random.randint(0, 7))
-        else:
-            rating_date = datetime.now() - timedelta(days=random.randint(1, 30))
-        
-        try:
-            cursor.execute("""
-                UPDATE user_artist_tracking
-                SET rating = ?, rating_date = ?
-                WHERE id = ?
-            """, (rating, rating_date.strftime('%Y-%m-%d'), record_id))
-            
-            updated_count += 1
-            
-            if updated_count % 10 == 0:
-                print(f"  Updated {updated_count} records...")
-                
-        except Exception as e:
-            print(f"Error updating record {record_id}: {e}")
-    
-    conn.commit()
+
+    if restart:
+        reset_job(conn, "add_ratings")
+    
+    updated_count = batched_update(
+        conn,
+        "user_artist_tracking",
+        "id",
+        ["date_seen"],
+        ["rating", "rating_date"] if with_date else ["rating"],
+        compute_ratings if with_date else compute_ratings_only,
+        where="rating IS NULL",
+        chunk_size=chunk_size,
+        job="add_ratings",
+        pause=pause,
+    )
     
     print()
     print(f"✓ Successfully added ratings to {updated_count} records")
@@ -102,12 +100,14 @@ def add_ratings_to_existing_records():
     conn.close()
 
 if __name__ == "__main__":
+    args = add_job_arguments(argparse.ArgumentParser(description="Add ratings to tracking rows that have none.")).parse_args()
+
     print("=" * 60)
     print("Adding ratings to existing user_artist_tracking records")
     print("=" * 60)
     print()
     
-    add_ratings_to_existing_records()
+    add_ratings_to_existing_records(args.chunk_size, args.pause, args.restart)
     
     print()
     print("✅ Done!")
@@ -0,0 +1,480 @@
+import heapq
+import json
+import math
+import time
+import argparse
+from array import array
+from collections import Counter
+
+from batch_update import JOB_PAUSE_SECONDS
+from db_connection import connect
+
+# Offline artist-level aggregates, rebuilt from one streaming pass over
+# user_artist_tracking (ordered by user_id, so only one user's rows are in
+# memory at a time):
+#
+#   artist_popularity (artist_id) -> fans, times_seen, rating_count,
+#                                    rating_sum, rating_hist (JSON, 1..10)
+#   artist_fans       (artist_id, user_id) -> times_seen
+#   artist_neighbors  (artist_id, rank) -> neighbor_id, together, score
+#
+# artist_neighbors is the top-K of a sparse artist x artist co-attendance
+# matrix ("users who saw X also saw Y"). The matrix is accumulated in
+# coordinate form: artists get dense integer ids and each unordered pair
+# (i, j), i < j, is one int key (i << 32) | j in a Counter, so only pairs
+# that actually occur cost memory. score is the cosine similarity
+# together / sqrt(fans_i * fans_j), which keeps the biggest artists from
+# being everyone's neighbour.
+#
+# artist_popularity and artist_neighbors are built under *_new names,
+# committed batch by batch, and swapped in with one short transaction, so
+# readers never see a half-built aggregate and writers are never blocked
+# for longer than one batch.
+#
+# artist_fans is different: the server reads it on every fans request, so
+# triggers on user_artist_tracking keep it current (like user_stats.py's
+# user_artist_counts). The rebuild only reconciles it, a chunk of users per
+# short transaction, to repair drift (writes made before the triggers
+# existed, INSERT OR REPLACE over a tracking row, which fires no DELETE
+# trigger).
+
+DB_PATH = "music_artists.db"
+TOP_K_NEIGHBORS = 20
+MIN_TOGETHER = 2            # pairs seen by fewer users are noise
+MAX_ARTISTS_PER_USER = 300  # caps the pairs one heavy user adds (n^2 / 2)
+RATING_BINS = 10            # ratings 1..10
+INSERT_BATCH_SIZE = 5000
+RECONCILE_CHUNK_USERS = 500
+
+# Rebuilt and swapped by rebuild_aggregates()
+TABLES = {
+    "artist_popularity": """
+        CREATE TABLE {name} (
+            artist_id    TEXT PRIMARY KEY,
+            fans         INTEGER NOT NULL,
+            times_seen   INTEGER NOT NULL,
+            rating_count INTEGER NOT NULL,
+            rating_sum   INTEGER NOT NULL,
+            rating_hist  TEXT NOT NULL
+        ) WITHOUT ROWID
+    """,
+    "artist_neighbors": """
+        CREATE TABLE {name} (
+            artist_id   TEXT NOT NULL,
+            rank        INTEGER NOT NULL,
+            neighbor_id TEXT NOT NULL,
+            together    INTEGER NOT NULL,
+            score       REAL NOT NULL,
+            PRIMARY KEY (artist_id, rank)
+        ) WITHOUT ROWID
+    """,
+}
+
+INDEXES = [
+    "CREATE INDEX idx_artist_popularity_fans ON artist_popularity (fans DESC)",
+]
+
+FANS_DDL = """
+    CREATE TABLE IF NOT EXISTS artist_fans (
+        artist_id  TEXT NOT NULL,
+        user_id    INTEGER NOT NULL,
+        times_seen INTEGER NOT NULL,
+        PRIMARY KEY (artist_id, user_id)
+    ) WITHOUT ROWID
+"""
+
+FANS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_artist_fans_seen ON artist_fans (artist_id, times_seen DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_artist_fans_user ON artist_fans (user_id)",  # reconcile by user range
+]
+
+FAN_TRIGGERS = ("artist_fans_ai", "artist_fans_ad", "artist_fans_au")
+
+
+class ArtistIndex:
+    """Dense 0..n-1 ids for artist_id strings."""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __call__(self, artist_id):
+        i = self.ids.get(artist_id)
+        if i is None:
+            i = self.ids[artist_id] = len(self.names)
+            self.names.append(artist_id)
+        return i
+
+    def __len__(self):
+        return len(self.names)
+
+
+def iter_user_rows(conn):
+    """Yield (user_id, [(artist_id, rating), ...]) one user at a time."""
+    cur = conn.execute("SELECT user_id, artist_id, rating FROM user_artist_tracking ORDER BY user_id")
+    current, rows = None, []
+    for user_id, artist_id, rating in cur:
+        if user_id != current:
+            if rows:
+                yield current, rows
+            current, rows = user_id, []
+        rows.append((artist_id, rating))
+    if rows:
+        yield current, rows
+
+
+def aggregate(conn, fan_sink=None, max_artists_per_user=MAX_ARTISTS_PER_USER):
+    """
+    The streaming pass. Per-user (artist, times_seen) rows go straight to
+    fan_sink(rows), if given; returns (index, fans, times_seen, ratings,
+    pairs) with per-artist arrays and the sparse pair Counter.
+    """
+    index = ArtistIndex()
+    fans = array("q")
+    times_seen = array("q")
+    ratings = []  # per artist: array of RATING_BINS counts
+    pairs = Counter()
+
+    for user_id, rows in iter_user_rows(conn):
+        seen = Counter()
+        for artist_id, rating in rows:
+            i = index(artist_id)
+            if i == len(fans):
+                fans.append(0)
+                times_seen.append(0)
+                ratings.append(array("q", bytes(8 * RATING_BINS)))
+            seen[i] += 1
+            times_seen[i] += 1
+            if isinstance(rating, int) and 1 <= rating <= RATING_BINS:
+                ratings[i][rating - 1] += 1
+
+        if fan_sink:
+            fan_sink([(index.names[i], user_id, count) for i, count in seen.items()])
+        for i in seen:
+            fans[i] += 1
+
+        # Co-attendance: every unordered pair of this user's artists
+        artists = [i for i, _ in seen.most_common(max_artists_per_user)]
+        artists.sort()
+        for a_pos, a in enumerate(artists):
+            base = a << 32
+            for b in artists[a_pos + 1:]:
+                pairs[base | b] += 1
+
+    return index, fans, times_seen, ratings, pairs
+
+
+def top_neighbors(pairs, fans, k=TOP_K_NEIGHBORS, min_together=MIN_TOGETHER):
+    """{artist: [(score, together, neighbor), ...]} best k by cosine score."""
+    heaps = {}
+    for key, together in pairs.items():
+        if together < min_together:
+            continue
+        a, b = key >> 32, key & 0xFFFFFFFF
+        score = together / math.sqrt(fans[a] * fans[b])
+        for x, y in ((a, b), (b, a)):
+            heap = heaps.setdefault(x, [])
+            item = (score, together, y)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return {a: sorted(heap, reverse=True) for a, heap in heaps.items()}
+
+
+# --- artist_fans -----------------------------------------------------------
+
+def _fan_statements(ref, sign):
+    """Trigger statements adding (sign=1) or removing (sign=-1) one tracking row."""
+    match = f"artist_id = {ref}.artist_id AND user_id = {ref}.user_id"
+    statements = []
+    if sign > 0:
+        # Plain INSERT ... WHERE NOT EXISTS rather than an upsert: an outer
+        # INSERT OR REPLACE/IGNORE would override the trigger's conflict handling
+        statements.append(
+            f"INSERT INTO artist_fans (artist_id, user_id, times_seen) SELECT {ref}.artist_id, {ref}.user_id, 0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM artist_fans WHERE {match})"
+        )
+    statements.append(f"UPDATE artist_fans SET times_seen = times_seen {'+' if sign > 0 else '-'} 1 WHERE {match}")
+    if sign < 0:
+        statements.append(f"DELETE FROM artist_fans WHERE {match} AND times_seen <= 0")
+    return statements
+
+
+def _create_fan_triggers(conn):
+    body = lambda statements: ";\n    ".join(statements) + ";"
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS artist_fans_ai AFTER INSERT ON user_artist_tracking BEGIN\n"
+        f"    {body(_fan_statements('NEW', 1))}\nEND"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS artist_fans_ad AFTER DELETE ON user_artist_tracking BEGIN\n"
+        f"    {body(_fan_statements('OLD', -1))}\nEND"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS artist_fans_au AFTER UPDATE OF user_id, artist_id "
+        f"ON user_artist_tracking BEGIN\n"
+        f"    {body(_fan_statements('OLD', -1) + _fan_statements('NEW', 1))}\nEND"
+    )
+
+
+def install_artist_fans(conn):
+    """
+    Create artist_fans, its indexes and the triggers that keep it current
+    if they are missing. Returns True if the triggers were installed (the
+    table then needs reconcile_fans() to catch up).
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'artist_fans_ai'").fetchone():
+        return False
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(FANS_DDL)
+        for ddl in FANS_INDEXES:
+            conn.execute(ddl)
+        _create_fan_triggers(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+
+def _next_fan_bound(conn, lo, chunk_users):
+    """Upper user_id bound of the next chunk of users, or None past the end."""
+    bounds = []
+    for sql in (
+        "SELECT DISTINCT user_id FROM user_artist_tracking WHERE user_id > ? ORDER BY user_id LIMIT ?",
+        "SELECT DISTINCT user_id FROM artist_fans WHERE user_id > ? ORDER BY user_id LIMIT ?",
+    ):
+        row = conn.execute(f"SELECT MAX(user_id) FROM ({sql})", (lo, chunk_users)).fetchone()
+        if row[0] is not None:
+            bounds.append(row[0])
+    return min(bounds) if bounds else None
+
+
+def reconcile_fans(conn, chunk_users=RECONCILE_CHUNK_USERS, pause=JOB_PAUSE_SECONDS):
+    """
+    Compare artist_fans with user_artist_tracking chunk_users users at a
+    time and repair the rows that differ. Each chunk is read and repaired
+    in one short write transaction, so a tracking write can't slip in
+    between the check and the repair; sleeping `pause` seconds between
+    chunks lets waiting writers in. Returns (fan rows, rows repaired).
+    """
+    lo = 0
+    total = repaired = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            hi = _next_fan_bound(conn, lo, chunk_users)
+            if hi is None:
+                conn.commit()
+                break
+            expected = set(
+                conn.execute(
+                    "SELECT artist_id, user_id, COUNT(*) FROM user_artist_tracking "
+                    "WHERE user_id > ? AND user_id <= ? GROUP BY user_id, artist_id",
+                    (lo, hi),
+                )
+            )
+            stored = set(
+                conn.execute(
+                    "SELECT artist_id, user_id, times_seen FROM artist_fans WHERE user_id > ? AND user_id <= ?",
+                    (lo, hi),
+                )
+            )
+            missing = expected - stored
+            stale = {row[:2] for row in stored - expected} - {row[:2] for row in missing}
+            conn.executemany("DELETE FROM artist_fans WHERE artist_id = ? AND user_id = ?", list(stale))
+            conn.executemany("INSERT OR REPLACE INTO artist_fans VALUES (?, ?, ?)", list(missing))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        total += len(expected)
+        repaired += len(missing) + len(stale)
+        lo = hi
+        if pause:
+            time.sleep(pause)
+    return total, repaired
+
+
+# --- rebuild ---------------------------------------------------------------
+
+def _insert_batches(conn, sql, rows, batch_size=INSERT_BATCH_SIZE):
+    """executemany rows in batches, committing each one. Returns the row count."""
+    batch = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            conn.commit()
+            total += len(batch)
+            batch.clear()
+    conn.executemany(sql, batch)
+    conn.commit()
+    return total + len(batch)
+
+
+def rebuild_aggregates(conn, top_k=TOP_K_NEIGHBORS, min_together=MIN_TOGETHER, progress=True):
+    """
+    Rebuild artist_popularity and artist_neighbors from user_artist_tracking
+    and reconcile artist_fans. Every write transaction is one batch or one
+    chunk of users long. Returns a counts dict.
+    """
+    start = time.perf_counter()
+    install_artist_fans(conn)
+    for table, ddl in TABLES.items():
+        conn.execute(f"DROP TABLE IF EXISTS {table}_new")
+        conn.execute(ddl.format(name=f"{table}_new"))
+    conn.commit()
+
+    # Read-only pass (a WAL snapshot, writers aren't blocked)
+    index, fans, times_seen, ratings, pairs = aggregate(conn)
+    if progress:
+        print(f"  Streamed tracking rows: {len(index)} artists, "
+              f"{len(pairs)} co-attended pairs ({time.perf_counter() - start:.2f}s)")
+
+    _insert_batches(
+        conn,
+        "INSERT INTO artist_popularity_new VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                index.names[i],
+                fans[i],
+                times_seen[i],
+                sum(ratings[i]),
+                sum((bin_ + 1) * count for bin_, count in enumerate(ratings[i])),
+                json.dumps(list(ratings[i])),
+            )
+            for i in range(len(index))
+        ),
+    )
+
+    neighbors = top_neighbors(pairs, fans, top_k, min_together)
+    _insert_batches(
+        conn,
+        "INSERT INTO artist_neighbors_new VALUES (?, ?, ?, ?, ?)",
+        (
+            (index.names[a], rank, index.names[b], together, round(score, 6))
+            for a, best in neighbors.items()
+            for rank, (score, together, b) in enumerate(best, 1)
+        ),
+    )
+
+    # Swap in one short write transaction
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for table in TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        for ddl in INDEXES:
+            conn.execute(ddl)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    fan_total, fans_repaired = reconcile_fans(conn)
+    if progress:
+        print(f"  Reconciled artist_fans: {fan_total} rows, {fans_repaired} repaired")
+        print(f"  Wrote aggregates in {time.perf_counter() - start:.2f}s")
+    return {
+        "artists": len(index),
+        "fan_rows": fan_total,
+        "fan_rows_repaired": fans_repaired,
+        "pairs": len(pairs),
+        "neighbor_rows": sum(len(best) for best in neighbors.values()),
+    }
+
+
+# --- lookups ---------------------------------------------------------------
+
+def artist_fans(conn, artist_id):
+    """
+    The server's "fans of this artist" rows (id, names, profile, times_seen),
+    from artist_fans instead of a GROUP BY over user_artist_tracking.
+    """
+    return conn.execute(
+        """
+        SELECT u.id, u.first_name, u.last_name, u.nickname,
+               up.profile_image_url, up.city, up.state, f.times_seen
+        FROM artist_fans f
+        JOIN users u ON u.id = f.user_id
+        LEFT JOIN user_profiles up ON up.user_id = u.id
+        WHERE f.artist_id = ?
+        ORDER BY f.times_seen DESC, u.nickname
+        """,
+        (artist_id,),
+    ).fetchall()
+
+
+def also_seen(conn, artist_id, limit=10):
+    """Users who saw artist_id also saw: (neighbor_id, artist_name, together, score)."""
+    return conn.execute(
+        """
+        SELECT n.neighbor_id, a.artist_name, n.together, n.score
+        FROM artist_neighbors n
+        JOIN artists a ON a.artist_id = n.neighbor_id
+        WHERE n.artist_id = ?
+        ORDER BY n.rank
+        LIMIT ?
+        """,
+        (artist_id, limit),
+    ).fetchall()
+
+
+def most_popular(conn, limit=10):
+    return conn.execute(
+        """
+        SELECT p.artist_id, a.artist_name, p.fans, p.times_seen,
+               CASE WHEN p.rating_count THEN 1.0 * p.rating_sum / p.rating_count END
+        FROM artist_popularity p
+        LEFT JOIN artists a ON a.artist_id = p.artist_id
+        ORDER BY p.fans DESC
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild artist popularity / fans / co-attendance aggregates.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--top-k", type=int, default=TOP_K_NEIGHBORS, help="neighbours kept per artist")
+    parser.add_argument("--min-together", type=int, default=MIN_TOGETHER, help="minimum shared fans for a neighbour")
+    parser.add_argument("--show", metavar="ARTIST_ID", help="print fans / also-seen for one artist instead")
+    args = parser.parse_args()
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        if args.show:
+            print(f"Fans of {args.show}:")
+            for row in artist_fans(conn, args.show)[:10]:
+                print(f"  user {row[0]} ({row[3] or '-'}): seen {row[7]}x")
+            print("Users who saw it also saw:")
+            for neighbor_id, name, together, score in also_seen(conn, args.show):
+                print(f"  {name} ({neighbor_id}): {together} shared fans, score {score:.3f}")
+            return
+
+        print("=" * 60)
+        print("Rebuilding artist aggregates")
+        print("=" * 60)
+        counts = rebuild_aggregates(conn, args.top_k, args.min_together)
+        print()
+        for key, value in counts.items():
+            print(f"  {key}: {value}")
+        print()
+        print("Most popular:")
+        for artist_id, name, fans, seen, avg in most_popular(conn, 5):
+            avg_text = f"{avg:.1f}" if avg is not None else "-"
+            print(f"  {name or artist_id}: {fans} fans, seen {seen}x, avg rating {avg_text}")
+    finally:
+        conn.close()
+
+    print()
+    print("✅ Done!")
+
+
+if __name__ == "__main__":
+    main()
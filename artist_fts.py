@@ -0,0 +1,330 @@
+import random
+import sqlite3
+import time
+import argparse
+from statistics import quantiles
+
+from db_connection import connect
+
+# Full-text index over artists.artist_name for the artist search box.
+#
+# artists_fts is an external-content FTS5 table: it stores only the index,
+# keyed by artists.rowid, and triggers on artists keep it in sync with every
+# INSERT / DELETE / UPDATE of artist_name (including the upserts done by
+# incremental_import.py). VACUUM may renumber the rowids of artists (its
+# key is TEXT, not INTEGER PRIMARY KEY), so run `python artist_fts.py
+# rebuild` after a VACUUM.
+#
+# Tokenizers:
+#   - "trigram": substring match, same results as LIKE '%query%' for
+#                queries of 3+ characters (SQLite 3.34+)
+#   - "prefix":  word-prefix match ("beat" finds "The Beatles"), works on
+#                any SQLite with FTS5
+
+DB_PATH = "music_artists.db"
+FTS_TABLE = "artists_fts"
+TOKENIZERS = {
+    "trigram": "tokenize = 'trigram'",
+    "prefix": "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'",
+}
+TRIGRAM_MIN_CHARS = 3
+SEARCH_LIMIT = 20
+# A trigram query matching more artists than this is "common": walking the
+# artist_name index with LIKE finds the first SEARCH_LIMIT matches sooner
+# than sorting every FTS hit
+FTS_PROBE_LIMIT = 2000
+
+
+def _has_fts5():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+HAS_FTS5 = _has_fts5()
+HAS_TRIGRAM = HAS_FTS5 and sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def fts_tokenizer(conn):
+    """Tokenizer of the existing artists_fts table, or None if there is none."""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone()
+    if not row:
+        return None
+    return "trigram" if "trigram" in row[0] else "prefix"
+
+
+def build_artist_fts(conn, tokenizer="trigram"):
+    """
+    Create artists_fts and its sync triggers and index every artist.
+    If the table already exists with the same tokenizer the triggers have
+    kept it current, so nothing is done. Returns True if (re)built.
+    """
+    if not HAS_FTS5:
+        raise RuntimeError("This SQLite build has no FTS5")
+    if tokenizer == "trigram" and not HAS_TRIGRAM:
+        raise RuntimeError("The trigram tokenizer needs SQLite 3.34+ (use --fts prefix)")
+
+    current = fts_tokenizer(conn)
+    if current == tokenizer:
+        return False
+    if current:
+        drop_artist_fts(conn)
+
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            artist_name, content = 'artists', content_rowid = 'rowid', {TOKENIZERS[tokenizer]}
+        )
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON artists BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, artist_name) VALUES (NEW.rowid, NEW.artist_name);
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON artists BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, artist_name) VALUES ('delete', OLD.rowid, OLD.artist_name);
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF artist_name ON artists BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, artist_name) VALUES ('delete', OLD.rowid, OLD.artist_name);
+            INSERT INTO {FTS_TABLE} (rowid, artist_name) VALUES (NEW.rowid, NEW.artist_name);
+        END
+        """
+    )
+    rebuild_artist_fts(conn)
+    return True
+
+
+def rebuild_artist_fts(conn):
+    """Re-index every artist from the artists table (e.g. after VACUUM)."""
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    conn.commit()
+
+
+def check_artist_fts(conn):
+    """True if the index matches the artists table."""
+    try:
+        conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+        return True
+    except sqlite3.DatabaseError:
+        return False
+
+
+def drop_artist_fts(conn):
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+    conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    conn.commit()
+
+
+def fts_query(query, tokenizer):
+    """FTS5 MATCH expression for a raw search box string."""
+    if tokenizer == "trigram":
+        return '"' + query.replace('"', '""') + '"'
+    words = query.replace('"', " ").split()
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_artists_like(conn, query, limit=SEARCH_LIMIT):
+    """The server's current search: LIKE '%query%' ORDER BY artist_name."""
+    return conn.execute(
+        """
+        SELECT artist_id, artist_name, artist_img, country
+        FROM artists
+        WHERE artist_name LIKE ?
+        ORDER BY artist_name
+        LIMIT ?
+        """,
+        (f"%{query}%", limit),
+    ).fetchall()
+
+
+def _has_name_index(conn):
+    for row in conn.execute("PRAGMA index_list(artists)"):
+        first = conn.execute(f"PRAGMA index_info({row[1]})").fetchone()
+        if first and first[2] == "artist_name":
+            return True
+    return False
+
+
+def search_artists(conn, query, limit=SEARCH_LIMIT, tokenizer=None, probe=True):
+    """
+    Artist search through artists_fts, same columns and order as the
+    server's search. Falls back to LIKE when there is no index or the
+    query is too short for trigrams.
+
+    With the trigram index, the match count is probed first: rare terms
+    (the slow case for LIKE, which has to scan every name) are answered
+    from the FTS hits; terms matching more than FTS_PROBE_LIMIT artists go
+    to LIKE over the artist_name index, which stops after `limit` hits.
+    """
+    tokenizer = tokenizer or fts_tokenizer(conn)
+    if not tokenizer or not query.strip() or (tokenizer == "trigram" and len(query) < TRIGRAM_MIN_CHARS):
+        return search_artists_like(conn, query, limit)
+
+    match = fts_query(query, tokenizer)
+    if probe and tokenizer == "trigram" and _has_name_index(conn):
+        hits = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? LIMIT ?)",
+            (match, FTS_PROBE_LIMIT + 1),
+        ).fetchone()[0]
+        if hits > FTS_PROBE_LIMIT:
+            return search_artists_like(conn, query, limit)
+
+    return conn.execute(
+        f"""
+        SELECT a.artist_id, a.artist_name, a.artist_img, a.country
+        FROM {FTS_TABLE} f
+        JOIN artists a ON a.rowid = f.rowid
+        WHERE {FTS_TABLE} MATCH ?
+        ORDER BY a.artist_name
+        LIMIT ?
+        """,
+        (match, limit),
+    ).fetchall()
+
+
+# --- benchmark ---------------------------------------------------------------
+
+NAME_WORDS = (
+    "the", "black", "blue", "red", "golden", "silver", "electric", "midnight", "crystal", "velvet",
+    "wild", "young", "lost", "broken", "neon", "royal", "little", "big", "dark", "bright",
+    "river", "mountain", "city", "ocean", "fire", "stone", "wolves", "kings", "queens", "hearts",
+    "riders", "sisters", "brothers", "machine", "orchestra", "collective", "project", "band", "crew", "club",
+)
+
+
+def synthetic_artist_names(count, rng):
+    """Band-like names from a word list, numbered so they are unique."""
+    for i in range(count):
+        words = rng.sample(NAME_WORDS, rng.randint(1, 3))
+        yield f"{' '.join(w.capitalize() for w in words)} {i}"
+
+
+def build_benchmark_db(path, count, tokenizer, seed=42):
+    """Fresh database with count synthetic artists and an artists_fts index."""
+    from csv_to_sql_artists import create_schema, apply_bulk_pragmas
+
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    apply_bulk_pragmas(conn)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_artists_name ON artists (artist_name)")
+    rng = random.Random(seed)
+    conn.executemany(
+        "INSERT OR IGNORE INTO artists (artist_id, artist_name) VALUES (?, ?)",
+        ((f"bench{i:08d}", name) for i, name in enumerate(synthetic_artist_names(count, rng))),
+    )
+    conn.commit()
+    start = time.perf_counter()
+    build_artist_fts(conn, tokenizer)
+    print(f"  Indexed {count:,} artists in {time.perf_counter() - start:.2f}s")
+    return conn
+
+
+def benchmark_queries(rng, count):
+    """What people type: word fragments, whole words, two-word phrases and misses."""
+    queries = []
+    for _ in range(count):
+        word = rng.choice(NAME_WORDS)
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(word[: rng.randint(3, max(3, len(word)))])
+        elif kind < 0.7:
+            queries.append(word)
+        elif kind < 0.9:
+            queries.append(f"{word} {rng.choice(NAME_WORDS)}")
+        else:
+            queries.append(f"zz{rng.randint(0, 9999)}")
+    return queries
+
+
+def latency_percentiles(search, conn, queries):
+    """(p50, p99) in ms of search(conn, query) over queries."""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(conn, query)
+        timings.append((time.perf_counter() - start) * 1000)
+    cuts = quantiles(timings, n=100)
+    return cuts[49], cuts[98]
+
+
+def benchmark(conn, num_queries=200, seed=42):
+    tokenizer = fts_tokenizer(conn)
+    queries = benchmark_queries(random.Random(seed), num_queries)
+
+    print(f"{'path':<28} {'p50 ms':>10} {'p99 ms':>10}")
+    print("-" * 50)
+    fts_only = lambda c, q: search_artists(c, q, probe=False)
+    for label, search in (
+        ("LIKE '%q%'", search_artists_like),
+        (f"FTS5 ({tokenizer}) only", fts_only),
+        (f"FTS5 ({tokenizer}) + probe", search_artists),
+    ):
+        p50, p99 = latency_percentiles(search, conn, queries)
+        print(f"{label:<28} {p50:>10.3f} {p99:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, check and benchmark the FTS5 artist name index.")
+    parser.add_argument("command", choices=("build", "rebuild", "check", "drop", "search", "benchmark"))
+    parser.add_argument("query", nargs="?", help="search text (for the search command)")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--tokenizer", choices=sorted(TOKENIZERS), default="trigram")
+    parser.add_argument(
+        "--artists",
+        type=int,
+        default=0,
+        help="benchmark: build a fresh --db with this many synthetic artists (e.g. 1000000)",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="benchmark: number of searches")
+    args = parser.parse_args()
+
+    if args.command == "benchmark" and args.artists:
+        print(f"Building benchmark database {args.db} ({args.artists:,} artists)...")
+        conn = build_benchmark_db(args.db, args.artists, args.tokenizer)
+    else:
+        conn = connect(args.db, checkpoints=True)
+
+    try:
+        if args.command == "build":
+            built = build_artist_fts(conn, args.tokenizer)
+            print(f"✓ {FTS_TABLE} {'built' if built else 'already up to date'} ({args.tokenizer})")
+        elif args.command == "rebuild":
+            rebuild_artist_fts(conn)
+            print(f"✓ {FTS_TABLE} rebuilt")
+        elif args.command == "check":
+            print(f"✓ {FTS_TABLE} is consistent" if check_artist_fts(conn) else f"✗ {FTS_TABLE} is out of sync, run rebuild")
+        elif args.command == "drop":
+            drop_artist_fts(conn)
+            print(f"✓ {FTS_TABLE} dropped")
+        elif args.command == "search":
+            for artist_id, name, _, country in search_artists(conn, args.query or ""):
+                print(f"  {artist_id}  {name}  ({country or '-'})")
+        else:
+            if fts_tokenizer(conn) is None:
+                build_artist_fts(conn, args.tokenizer)
+            benchmark(conn, args.queries)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
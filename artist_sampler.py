@@ -0,0 +1,155 @@
+import heapq
+import math
+import random
+import sqlite3
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+SQLITE_MAX_VARS = 500  # keep IN (...) lists well under SQLite's variable limit
+MAX_DRAWS_PER_PICK = 4  # weighted draws per wanted artist before switching to A-Res
+
+
+def reservoir_sample(items, k, weights=None, rng=random):
+    """
+    Draw k items without replacement from an iterable in one pass.
+
+    Unweighted: classic reservoir sampling (Algorithm R).
+    Weighted: Efraimidis-Spirakis A-Res - each item gets key u ** (1 / w)
+    and the k largest keys win; items with weight <= 0 are never picked.
+    """
+    if k <= 0:
+        return []
+
+    if weights is None:
+        reservoir = []
+        for i, item in enumerate(items):
+            if i < k:
+                reservoir.append(item)
+            else:
+                j = rng.randrange(i + 1)
+                if j < k:
+                    reservoir[j] = item
+        return reservoir
+
+    heap = []
+    for item, weight in zip(items, weights):
+        if weight <= 0:
+            continue
+        key = math.log(rng.random() or 1e-300) / weight  # log(u ** (1 / w)), same ordering
+        if len(heap) < k:
+            heapq.heappush(heap, (key, item))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, item))
+    return [item for _, item in sorted(heap, reverse=True)]
+
+
+class ArtistSampler:
+    """
+    Random artists without ORDER BY RANDOM().
+
+    The artists' rowids are loaded once into a compact array; every sample
+    is then drawn in memory and resolved with one rowid lookup query, so
+    seeding thousands of users no longer means thousands of full-table
+    sorts.
+
+    Optional weighting: weight_by="country" or "genre" with a weights dict
+    (value -> weight, missing values get default_weight). For "genre" an
+    artist gets the largest weight among its genres.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, weight_by=None, weights=None, default_weight=1.0, rng=random):
+        self.conn = conn
+        self.rng = rng
+        self.rowids = array("q")
+        self.cum_weights = None
+
+        if weight_by is None:
+            for (rowid,) in conn.execute("SELECT rowid FROM artists ORDER BY rowid"):
+                self.rowids.append(rowid)
+            return
+
+        weights = weights or {}
+        if weight_by == "country":
+            cur = conn.execute("SELECT rowid, country FROM artists ORDER BY rowid")
+        elif weight_by == "genre":
+            cur = conn.execute(
+                """
+                SELECT a.rowid, g.genre
+                FROM artists a
+                LEFT JOIN artist_genres g ON g.artist_id = a.artist_id
+                ORDER BY a.rowid
+                """
+            )
+        else:
+            raise ValueError(f"Unknown weight_by: {weight_by} (expected 'country' or 'genre')")
+
+        artist_weights = array("d")
+        for rowid, value in cur:
+            weight = weights.get(value, default_weight)
+            if self.rowids and self.rowids[-1] == rowid:
+                artist_weights[-1] = max(artist_weights[-1], weight)
+            else:
+                self.rowids.append(rowid)
+                artist_weights.append(weight)
+        self.weights = artist_weights
+        self.cum_weights = array("d", accumulate(artist_weights))
+
+    def __len__(self):
+        return len(self.rowids)
+
+    def sample_rowids(self, count, replace=False):
+        """Draw count artist rowids (fewer if there aren't enough artists)."""
+        n = len(self.rowids)
+        if n == 0 or count <= 0:
+            return []
+
+        if self.cum_weights is None:
+            if replace:
+                return [self.rowids[self.rng.randrange(n)] for _ in range(count)]
+            return [self.rowids[i] for i in self.rng.sample(range(n), min(count, n))]
+
+        total = self.cum_weights[-1]
+        if total <= 0:
+            return []
+        if replace:
+            return [self.rowids[self._weighted_index(total)] for _ in range(count)]
+
+        positive = sum(1 for w in self.weights if w > 0)
+        count = min(count, positive)
+        picked = {}
+        if count * 4 <= positive:
+            # Few draws from many artists: repeat weighted draws, skip duplicates.
+            # When a few artists hold most of the weight the duplicates pile
+            # up, so the draws are capped and A-Res below picks the rest.
+            for _ in range(count * MAX_DRAWS_PER_PICK):
+                if len(picked) == count:
+                    break
+                picked.setdefault(self._weighted_index(total), None)
+            if len(picked) == count:
+                return [self.rowids[i] for i in picked]
+        # Large share of the table (or the draws ran out): one weighted
+        # reservoir pass over the artists not picked yet. A-Res is equivalent
+        # to successive weighted draws, so finishing this way is still exact.
+        rest = [i for i in range(len(self.rowids)) if i not in picked]
+        rest = reservoir_sample(rest, count - len(picked), [self.weights[i] for i in rest], self.rng)
+        return [self.rowids[i] for i in list(picked) + rest]
+
+    def _weighted_index(self, total):
+        i = bisect_right(self.cum_weights, self.rng.random() * total)
+        return min(i, len(self.cum_weights) - 1)
+
+    def sample(self, count, replace=False):
+        """Return count (artist_id, artist_name) rows in sampled order."""
+        rowids = self.sample_rowids(count, replace)
+        found = {}
+        unique = list(dict.fromkeys(rowids))
+        for i in range(0, len(unique), SQLITE_MAX_VARS):
+            chunk = unique[i:i + SQLITE_MAX_VARS]
+            placeholders = ", ".join("?" for _ in chunk)
+            for rowid, artist_id, artist_name in self.conn.execute(
+                f"SELECT rowid, artist_id, artist_name FROM artists WHERE rowid IN ({placeholders})",
+                chunk,
+            ):
+                found[rowid] = (artist_id, artist_name)
+        return [found[r] for r in rowids if r in found]
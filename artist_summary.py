@@ -0,0 +1,233 @@
+import json
+import sqlite3
+import time
+import argparse
+
+from db_connection import connect
+
+# artist_summary: one row per artist with its genres pre-joined as a sorted
+# JSON array, so reading a user's history is one indexed query
+#
+#   user_artist_tracking (user_id, date_seen) -> artist_summary (artist_id)
+#
+# instead of 1 + N "SELECT genre FROM artist_genres WHERE artist_id = ?".
+#
+# Triggers on artists / artist_genres only record which artists changed
+# (artist_summary_dirty); refresh_artist_summary() recomputes just those
+# rows, once per artist however many of its genre rows changed. The
+# importers call build_artist_summary() after every load.
+
+DB_PATH = "music_artists.db"
+REFRESH_CHUNK_SIZE = 5000
+
+_GENRES_JSON = """
+    (SELECT json_group_array(genre) FROM (
+        SELECT genre FROM artist_genres g WHERE g.artist_id = a.artist_id ORDER BY genre
+    ))
+"""
+
+
+def _has_json():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("SELECT json_array()")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+HAS_JSON = _has_json()
+
+
+def _mark_dirty_triggers():
+    """(name, table, event, artist_id expressions) of the change-tracking triggers."""
+    return [
+        ("artist_summary_artists_ai", "artists", "INSERT", ["NEW.artist_id"]),
+        ("artist_summary_artists_au", "artists", "UPDATE OF artist_id, artist_name, artist_img, country",
+         ["OLD.artist_id", "NEW.artist_id"]),
+        ("artist_summary_artists_ad", "artists", "DELETE", ["OLD.artist_id"]),
+        ("artist_summary_genres_ai", "artist_genres", "INSERT", ["NEW.artist_id"]),
+        ("artist_summary_genres_au", "artist_genres", "UPDATE OF artist_id, genre",
+         ["OLD.artist_id", "NEW.artist_id"]),
+        ("artist_summary_genres_ad", "artist_genres", "DELETE", ["OLD.artist_id"]),
+    ]
+
+
+def summary_exists(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artist_summary'"
+    ).fetchone() is not None
+
+
+def build_artist_summary(conn, chunk_size=REFRESH_CHUNK_SIZE):
+    """
+    Create artist_summary (filled in one INSERT ... SELECT) plus the
+    change-tracking triggers if it doesn't exist yet; otherwise refresh the
+    artists changed since the last call. Returns the number of rows written.
+    """
+    if not HAS_JSON:
+        raise RuntimeError("artist_summary needs SQLite's JSON functions (SQLite 3.38+ or the JSON1 extension)")
+    if summary_exists(conn):
+        return refresh_artist_summary(conn, chunk_size)
+
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE artist_summary (
+            artist_id   TEXT PRIMARY KEY,
+            artist_name TEXT,
+            artist_img  TEXT,
+            country     TEXT,
+            genres      TEXT NOT NULL DEFAULT '[]'   -- JSON array, sorted
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute("CREATE TABLE IF NOT EXISTS artist_summary_dirty (artist_id TEXT PRIMARY KEY) WITHOUT ROWID")
+    for name, table, event, ids in _mark_dirty_triggers():
+        # Not INSERT OR IGNORE: the outer statement's conflict policy (e.g.
+        # the upsert in incremental_import.py) would override it
+        changed = " UNION ".join(f"SELECT {expr} AS artist_id" for expr in ids)
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN
+                INSERT INTO artist_summary_dirty (artist_id)
+                SELECT artist_id FROM ({changed})
+                WHERE artist_id NOT IN (SELECT artist_id FROM artist_summary_dirty);
+            END
+            """
+        )
+    cur.execute(
+        f"""
+        INSERT INTO artist_summary (artist_id, artist_name, artist_img, country, genres)
+        SELECT a.artist_id, a.artist_name, a.artist_img, a.country, {_GENRES_JSON}
+        FROM artists a
+        """
+    )
+    written = cur.rowcount
+    cur.execute("DELETE FROM artist_summary_dirty")
+    conn.commit()
+    return written
+
+
+def refresh_artist_summary(conn, chunk_size=REFRESH_CHUNK_SIZE):
+    """
+    Recompute the summary rows of artists marked dirty, chunk_size artists
+    per transaction. Deleted artists lose their summary row. Returns the
+    number of artists refreshed.
+    """
+    refreshed = 0
+    while True:
+        ids = [row[0] for row in conn.execute("SELECT artist_id FROM artist_summary_dirty LIMIT ?", (chunk_size,))]
+        if not ids:
+            break
+        conn.execute("DROP TABLE IF EXISTS temp._summary_batch")
+        conn.execute("CREATE TEMP TABLE _summary_batch (artist_id TEXT PRIMARY KEY)")
+        conn.executemany("INSERT INTO temp._summary_batch VALUES (?)", [(i,) for i in ids])
+        conn.execute("DELETE FROM artist_summary WHERE artist_id IN (SELECT artist_id FROM temp._summary_batch)")
+        conn.execute(
+            f"""
+            INSERT INTO artist_summary (artist_id, artist_name, artist_img, country, genres)
+            SELECT a.artist_id, a.artist_name, a.artist_img, a.country, {_GENRES_JSON}
+            FROM artists a
+            WHERE a.artist_id IN (SELECT artist_id FROM temp._summary_batch)
+            """
+        )
+        conn.execute("DELETE FROM artist_summary_dirty WHERE artist_id IN (SELECT artist_id FROM temp._summary_batch)")
+        conn.execute("DROP TABLE temp._summary_batch")
+        conn.commit()
+        refreshed += len(ids)
+    return refreshed
+
+
+def user_history(conn, user_id):
+    """
+    A user's tracked artists, newest first, in the shape the server's
+    GET /api/user/:userId/artists returns - one query. Artists not yet in
+    the summary, or marked dirty, get their genres from artist_genres.
+    """
+    cur = conn.execute(
+        f"""
+        SELECT uat.id AS tracking_id, uat.artist_id, uat.date_seen, uat.venue, uat.city,
+               uat.notes, uat.rating, uat.event_country,
+               a.artist_name, a.artist_img, a.country AS artist_country,
+               COALESCE(s.genres, {_GENRES_JSON}) AS genres
+        FROM user_artist_tracking uat
+        JOIN artists a ON a.artist_id = uat.artist_id
+        LEFT JOIN artist_summary s ON s.artist_id = uat.artist_id
+            AND s.artist_id NOT IN (SELECT artist_id FROM artist_summary_dirty)
+        WHERE uat.user_id = ?
+        ORDER BY uat.date_seen DESC, uat.id DESC
+        """,
+        (user_id,),
+    )
+    columns = [d[0] for d in cur.description]
+    history = []
+    for row in cur:
+        item = dict(zip(columns, row))
+        item["genres"] = json.loads(item["genres"])
+        history.append(item)
+    return history
+
+
+def user_history_n_plus_one(conn, user_id):
+    """The server's original access pattern: history query + one genre query per row."""
+    cur = conn.execute(
+        """
+        SELECT uat.id AS tracking_id, uat.artist_id, uat.date_seen, uat.venue, uat.city,
+               uat.notes, uat.rating, uat.event_country,
+               a.artist_name, a.artist_img, a.country AS artist_country
+        FROM user_artist_tracking uat
+        JOIN artists a ON uat.artist_id = a.artist_id
+        WHERE uat.user_id = ?
+        ORDER BY uat.date_seen DESC, uat.id DESC
+        """,
+        (user_id,),
+    )
+    columns = [d[0] for d in cur.description]
+    history = [dict(zip(columns, row)) for row in cur.fetchall()]
+    for item in history:
+        item["genres"] = [
+            row[0] for row in conn.execute("SELECT genre FROM artist_genres WHERE artist_id = ?", (item["artist_id"],))
+        ]
+    return history
+
+
+def benchmark(conn, users=50):
+    """Time both access patterns for the users with the most tracked rows."""
+    user_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT user_id FROM user_artist_tracking GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT ?", (users,)
+        )
+    ]
+    for label, read in (("1 + N queries", user_history_n_plus_one), ("artist_summary", user_history)):
+        start = time.perf_counter()
+        rows = sum(len(read(conn, user_id)) for user_id in user_ids)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<16} {elapsed * 1000 / max(len(user_ids), 1):8.2f} ms/user  ({rows} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build/refresh the artist_summary table (artists + genre list).")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--benchmark", action="store_true", help="compare 1+N genre lookups with artist_summary")
+    args = parser.parse_args()
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        start = time.perf_counter()
+        created = not summary_exists(conn)
+        written = build_artist_summary(conn)
+        action = "Built" if created else "Refreshed"
+        print(f"✓ {action} artist_summary: {written} artists in {time.perf_counter() - start:.2f}s")
+
+        if args.benchmark:
+            benchmark(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
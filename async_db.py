@@ -0,0 +1,368 @@
+import asyncio
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from statistics import quantiles
+
+from artist_fts import search_artists as _search_artists
+from artist_summary import summary_exists, user_history as _user_history, user_history_n_plus_one
+from db_connection import BUSY_TIMEOUT_MS, connect
+from lookup_cache import LookupCache
+
+# asyncio data access for a Python service layer over music_artists.db.
+#
+#   reads  -> ReadPool: READ_POOL_SIZE threads, each with its own read-only
+#             connection (mode=ro, query_only). In WAL mode readers never
+#             block each other or the writer, and sqlite3 releases the GIL
+#             while a query runs, so reads really do run in parallel.
+#   writes -> WriteQueue: one writer thread and connection. Queued writes
+#             are committed in groups (one transaction, a SAVEPOINT per
+#             write so a failing write doesn't take the others down), and
+#             each caller's future resolves only after its group commits.
+#
+# The sqlite3 module has no async API (and aiosqlite isn't a dependency),
+# so both sides are threads bridged with run_in_executor / wrap_future.
+#
+# When the pool does not help: reads only overlap on separate cores, and
+# only while SQLite itself is working - turning rows into Python objects
+# holds the GIL. With small queries and few cores, extra readers just add
+# thread switches and a cold page cache per connection, and the writer's
+# per-write SAVEPOINT and group-commit bookkeeping cost more than they save
+# in WAL with synchronous=NORMAL, where a commit doesn't fsync. On one core
+# the benchmark has the single serialized connection ahead in req/s and p99
+# (pool of 4); a pool of 1 + writer is about even, with a lower p50 when a
+# large share of requests are writes (they no longer queue behind slow
+# reads). So the pool is sized to the cores; it pays off with several cores
+# and reads that spend their time in SQLite (fans GROUP BY, history).
+
+DB_PATH = "music_artists.db"
+READ_POOL_SIZE = min(4, os.cpu_count() or 1)
+MAX_WRITE_BATCH = 64
+
+FANS_SQL = """
+    SELECT u.id, u.first_name, u.last_name, u.nickname,
+           up.profile_image_url, up.city, up.state, COUNT(uat.artist_id) AS times_seen
+    FROM user_artist_tracking uat
+    JOIN users u ON uat.user_id = u.id
+    LEFT JOIN user_profiles up ON u.id = up.user_id
+    WHERE uat.artist_id = ?
+    GROUP BY u.id, u.first_name, u.last_name, u.nickname, up.profile_image_url, up.city, up.state
+    ORDER BY times_seen DESC, u.nickname
+"""
+
+
+class ReadPool:
+    """Thread pool where every thread keeps one read-only connection."""
+
+    def __init__(self, db_path=DB_PATH, size=READ_POOL_SIZE):
+        self.db_path = str(db_path)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="db-read")
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA query_only = 1")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, fn, args):
+        return fn(self._connection(), *args)
+
+    async def run(self, fn, *args):
+        """await fn(conn, *args) on a pooled read connection."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, fn, args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class WriteQueue:
+    """Single writer thread applying queued fn(conn, *args) calls in group commits."""
+
+    def __init__(self, db_path=DB_PATH, max_batch=MAX_WRITE_BATCH):
+        self.db_path = str(db_path)
+        self.max_batch = max_batch
+        self.stats = {"writes": 0, "commits": 0}
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="db-write", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        conn = connect(self.db_path, checkpoints=True, isolation_level=None)
+        self._ready.set()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self._queue.put(None)
+                        break
+                    batch.append(item)
+                self._apply(conn, batch)
+        finally:
+            conn.close()
+
+    def _apply(self, conn, batch):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, future in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    outcomes.append((future, fn(conn, *args), None))
+                    conn.execute("RELEASE write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            outcomes = [(future, None, e) for _, _, future in batch]
+        self.stats["writes"] += len(batch)
+        self.stats["commits"] += 1
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def run(self, fn, *args):
+        """await fn(conn, *args) on the writer connection, after it has committed."""
+        future = Future()
+        self._queue.put((fn, args, future))
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+# --- queries (plain functions of a connection) -----------------------------
+
+def _get_artist(conn, artist_id):
+    row = conn.execute(
+        "SELECT artist_id, artist_name, artist_img, country FROM artists WHERE artist_id = ?", (artist_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    artist = dict(zip(("artist_id", "artist_name", "artist_img", "country"), row))
+    artist["genres"] = [g for (g,) in conn.execute("SELECT genre FROM artist_genres WHERE artist_id = ?", (artist_id,))]
+    return artist
+
+
+def _history(conn, user_id):
+    if summary_exists(conn):
+        return _user_history(conn, user_id)
+    return user_history_n_plus_one(conn, user_id)
+
+
+def _fans(conn, artist_id):
+    return conn.execute(FANS_SQL, (artist_id,)).fetchall()
+
+
+def _track_artist(conn, user_id, artist_id, date_seen=None, venue=None, city=None, notes=None,
+                  rating=None, event_country=None):
+    return conn.execute(
+        """
+        INSERT INTO user_artist_tracking (user_id, artist_id, date_seen, venue, city, notes, rating, event_country)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (user_id, artist_id, date_seen, venue, city, notes, rating, event_country),
+    ).lastrowid
+
+
+def _heartbeat(conn, session_token, now):
+    return conn.execute(
+        "UPDATE user_sessions SET last_activity = ? WHERE session_token = ? AND is_online = 1",
+        (now, session_token),
+    ).rowcount
+
+
+class MusicDB:
+    """
+    The app's queries as coroutines:
+
+        db = MusicDB("music_artists.db")
+        artists = await db.search_artists("radio")
+        tracking_id = await db.track_artist(user_id, artist_id, rating=9)
+        db.close()
+    """
+
+    def __init__(self, db_path=DB_PATH, read_pool_size=READ_POOL_SIZE):
+        self.writer = WriteQueue(db_path)    # first: switches the file to WAL
+        self.readers = ReadPool(db_path, read_pool_size)
+        self.lookups = LookupCache()
+
+    async def read(self, fn, *args):
+        return await self.readers.run(fn, *args)
+
+    async def write(self, fn, *args):
+        return await self.writer.run(fn, *args)
+
+    async def search_artists(self, query, limit=20):
+        return await self.read(_search_artists, query, limit)
+
+    async def get_artist(self, artist_id):
+        return await self.read(_get_artist, artist_id)
+
+    async def user_history(self, user_id):
+        return await self.read(_history, user_id)
+
+    async def artist_fans(self, artist_id):
+        return await self.read(_fans, artist_id)
+
+    async def genres(self, query=None):
+        return await self.read(self.lookups.genres, query)
+
+    async def countries(self, query=None):
+        return await self.read(self.lookups.countries, query)
+
+    async def track_artist(self, user_id, artist_id, **fields):
+        return await self.write(_track_artist, user_id, artist_id, *(
+            fields.get(name) for name in ("date_seen", "venue", "city", "notes", "rating", "event_country")
+        ))
+
+    async def heartbeat(self, session_token):
+        return await self.write(_heartbeat, session_token, time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()))
+
+    def close(self):
+        self.readers.close()
+        self.writer.close()
+
+
+class SerializedMusicDB(MusicDB):
+    """Baseline: every read and write on one connection, one at a time (the Node server's model)."""
+
+    def __init__(self, db_path=DB_PATH):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-serial")
+        self._conn = connect(db_path, check_same_thread=False)
+        self.lookups = LookupCache()
+
+    def _write_call(self, fn, args):
+        try:
+            result = fn(self._conn, *args)
+            self._conn.commit()
+            return result
+        except Exception:
+            self._conn.rollback()
+            raise
+
+    async def read(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, lambda: fn(self._conn, *args))
+
+    async def write(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._write_call, fn, args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._conn.close()
+
+
+# --- benchmark ---------------------------------------------------------------
+
+def sample_workload(db_path, requests, write_ratio, seed=42):
+    """A mix of (method name, args) requests drawn from the database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        artists = [r[0] for r in conn.execute("SELECT artist_id FROM user_artist_tracking ORDER BY random() LIMIT 500")]
+        users = [r[0] for r in conn.execute("SELECT DISTINCT user_id FROM user_artist_tracking ORDER BY random() LIMIT 500")]
+        names = [r[0] for r in conn.execute("SELECT artist_name FROM artists ORDER BY random() LIMIT 200")]
+    finally:
+        conn.close()
+
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(requests):
+        if rng.random() < write_ratio:
+            workload.append(("track_artist", (rng.choice(users), rng.choice(artists)), {"rating": rng.randint(1, 10)}))
+            continue
+        kind = rng.choice(["search_artists", "get_artist", "user_history", "artist_fans"])
+        if kind == "search_artists":
+            name = rng.choice(names)
+            start = rng.randrange(max(len(name) - 4, 1))
+            workload.append((kind, (name[start:start + 4],), {}))
+        elif kind == "user_history":
+            workload.append((kind, (rng.choice(users),), {}))
+        else:
+            workload.append((kind, (rng.choice(artists),), {}))
+    return workload
+
+
+async def run_workload(db, workload, concurrency):
+    """Run workload with at most `concurrency` requests in flight; returns (seconds, latencies)."""
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def request(name, args, kwargs):
+        async with gate:
+            start = time.perf_counter()
+            await getattr(db, name)(*args, **kwargs)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(*item) for item in workload))
+    return time.perf_counter() - start, latencies
+
+
+def benchmark(db_path, requests=2000, concurrency=32, pool_size=READ_POOL_SIZE, write_ratio=0.05):
+    workload = sample_workload(db_path, requests, write_ratio)
+    for label, make in (
+        ("1 serialized connection", lambda: SerializedMusicDB(db_path)),
+        (f"pool of {pool_size} + writer", lambda: MusicDB(db_path, pool_size)),
+    ):
+        db = make()
+        try:
+            elapsed, latencies = asyncio.run(run_workload(db, workload, concurrency))
+        finally:
+            db.close()
+        cuts = quantiles(latencies, n=100)
+        print(f"  {label:<26} {len(workload) / elapsed:8.0f} req/s   "
+              f"p50 {cuts[49] * 1000:7.1f} ms   p99 {cuts[98] * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asyncio read pool / writer queue.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--requests", type=int, default=2000, help="requests in the workload")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight")
+    parser.add_argument("--pool-size", type=int, default=READ_POOL_SIZE, help="read connections")
+    parser.add_argument("--write-ratio", type=float, default=0.05,
+                        help="share of requests that insert a tracking row (they are really written)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"{args.requests} requests, {args.concurrency} in flight, {args.write_ratio:.0%} writes, "
+          f"{os.cpu_count()} CPU(s)")
+    print("=" * 60)
+    benchmark(args.db, args.requests, args.concurrency, args.pool_size, args.write_ratio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import heapq
+import json
+import mmap
+import sys
+import time
+import argparse
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from db_connection import connect
+from search_keys import search_key
+
+# Prefix autocomplete for artist, genre and country names, ranked by how
+# often they were tracked (user_artist_tracking rows), without a query per
+# keystroke.
+#
+# Each kind is a radix trie over the UTF-8 bytes of search_key(name), so
+# "beyo" finds "Beyoncé" and "ac d" finds "AC/DC". Every node stores the
+# ids of the TOP_K best entries below it, so a lookup is a walk down at
+# most len(prefix) bytes plus reading one precomputed list: no subtree
+# scan however many names share the prefix.
+#
+# The trie lives in flat uint32 arrays (nodes, labels, topk, entries,
+# strings), which save() writes into one file and load() maps back with
+# mmap + memoryview.cast - nothing is parsed, so a worker process is
+# ready in milliseconds and the pages are shared between processes.
+
+DB_PATH = "music_artists.db"
+INDEX_PATH = "autocomplete.idx"
+MAGIC = b"ACIX"
+FORMAT_VERSION = 1
+TOP_K = 10
+KINDS = ("artists", "genres", "countries")
+
+NODE_FIELDS = 6     # label_off, label_len, first_child, child_count, topk_off, topk_count
+ENTRY_FIELDS = 6    # text_off, text_len, id_off, id_len, popularity, secondary
+
+
+def load_entries(conn):
+    """
+    {kind: [(key, text, id, popularity, secondary), ...]} where popularity is
+    the tracked count and secondary the number of artists (genres/countries).
+    """
+    tracked = dict(conn.execute("SELECT artist_id, COUNT(*) FROM user_artist_tracking GROUP BY artist_id"))
+
+    artists = []
+    country_tracked, country_artists = Counter(), Counter()
+    for artist_id, name, country in conn.execute("SELECT artist_id, artist_name, country FROM artists"):
+        count = tracked.get(artist_id, 0)
+        if name:
+            artists.append((search_key(name), name, artist_id, count, 0))
+        if country:
+            country_tracked[country] += count
+            country_artists[country] += 1
+
+    genre_tracked, genre_artists = Counter(), Counter()
+    for artist_id, genre in conn.execute("SELECT artist_id, genre FROM artist_genres"):
+        genre_tracked[genre] += tracked.get(artist_id, 0)
+        genre_artists[genre] += 1
+
+    return {
+        "artists": artists,
+        "genres": [(search_key(g), g, g, genre_tracked[g], n) for g, n in genre_artists.items()],
+        "countries": [(search_key(c), c, c, country_tracked[c], n) for c, n in country_artists.items()],
+    }
+
+
+def _rank(entry):
+    """Sort key: most tracked first, then most artists, then name."""
+    return (-entry[3], -entry[4], entry[1])
+
+
+def build_trie(entries, top_k=TOP_K):
+    """
+    Build one kind's sections from (key, text, id, popularity, secondary)
+    entries. Returns {section: array}.
+    """
+    entries = sorted(entries, key=lambda e: (e[0].encode("utf-8"), _rank(e)))
+    keys = [e[0].encode("utf-8") for e in entries]
+    rank = sorted(range(len(entries)), key=lambda i: _rank(entries[i]))
+    order = [0] * len(entries)      # entry id -> global rank position
+    for position, i in enumerate(rank):
+        order[i] = position
+
+    nodes, labels, topk = array("I"), bytearray(), array("I")
+
+    def common_prefix(a, b, start):
+        end = min(len(a), len(b))
+        i = start
+        while i < end and a[i] == b[i]:
+            i += 1
+        return i
+
+    def build(node, lo, hi, depth):
+        """Fill node for keys[lo:hi], which share keys[lo][:depth]; returns its top entries."""
+        end = common_prefix(keys[lo], keys[hi - 1], depth)
+        label = keys[lo][depth:end]
+        best = [i for i in range(lo, hi) if len(keys[i]) == end]   # names ending here
+
+        groups = []
+        i = lo + len(best)
+        while i < hi:
+            j = i
+            while j < hi and keys[j][end] == keys[i][end]:
+                j += 1
+            groups.append((i, j))
+            i = j
+
+        first_child = len(nodes) // NODE_FIELDS
+        nodes.extend([0] * NODE_FIELDS * len(groups))
+        for n, (i, j) in enumerate(groups):
+            best.extend(build(first_child + n, i, j, end))
+
+        best = heapq.nsmallest(top_k, best, key=order.__getitem__)
+        base = node * NODE_FIELDS
+        nodes[base:base + NODE_FIELDS] = array("I", (
+            len(labels), len(label), first_child, len(groups), len(topk), len(best),
+        ))
+        labels.extend(label)
+        topk.extend(best)
+        return best
+
+    nodes.extend([0] * NODE_FIELDS)
+    if entries:
+        # Deep recursion only follows distinct key bytes, bounded by key length
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 10000))
+        try:
+            build(0, 0, len(entries), 0)
+        finally:
+            sys.setrecursionlimit(limit)
+
+    strings, entry_rows = bytearray(), array("I")
+    for key, text, ident, popularity, secondary in entries:
+        text_b, ident_b = text.encode("utf-8"), str(ident).encode("utf-8")
+        entry_rows.extend((len(strings), len(text_b), len(strings) + len(text_b), len(ident_b),
+                           min(popularity, 0xFFFFFFFF), min(secondary, 0xFFFFFFFF)))
+        strings.extend(text_b + ident_b)
+
+    return {
+        "nodes": nodes,
+        "labels": bytes(labels),
+        "topk": topk,
+        "entries": entry_rows,
+        "strings": bytes(strings),
+    }
+
+
+class AutocompleteIndex:
+    """
+    Query side. Works the same over freshly built arrays (build()) and
+    over memoryviews of an mmapped file (load()).
+    """
+
+    def __init__(self, sections, top_k=TOP_K, mapped=None):
+        self.sections = sections      # kind -> {section: array/bytes/memoryview}
+        self.top_k = top_k
+        self._mapped = mapped
+
+    @classmethod
+    def build(cls, conn, top_k=TOP_K):
+        entries = load_entries(conn)
+        return cls({kind: build_trie(entries[kind], top_k) for kind in KINDS}, top_k)
+
+    def _find(self, kind, key):
+        """Node whose subtree holds every key starting with key, or None."""
+        s = self.sections[kind]
+        nodes, labels = s["nodes"], s["labels"]
+        node, pos = 0, 0
+        while True:
+            base = node * NODE_FIELDS
+            label_off, label_len = nodes[base], nodes[base + 1]
+            # Match (part of) this node's label
+            n = min(label_len, len(key) - pos)
+            if bytes(labels[label_off:label_off + n]) != key[pos:pos + n]:
+                return None
+            pos += n
+            if pos == len(key):
+                return node
+            # Binary search the children by their label's first byte
+            lo, hi = nodes[base + 2], nodes[base + 2] + nodes[base + 3]
+            target = key[pos]
+            while lo < hi:
+                mid = (lo + hi) // 2
+                first = labels[nodes[mid * NODE_FIELDS]]
+                if first < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo == nodes[base + 2] + nodes[base + 3] or labels[nodes[lo * NODE_FIELDS]] != target:
+                return None
+            node = lo
+
+    def complete(self, kind, prefix, k=TOP_K):
+        """Up to k (text, id, popularity) for names whose search key starts with prefix's."""
+        s = self.sections[kind]
+        node = self._find(kind, search_key(prefix).encode("utf-8"))
+        if node is None:
+            return []
+        nodes, topk, entries, strings = s["nodes"], s["topk"], s["entries"], s["strings"]
+        base = node * NODE_FIELDS
+        start, count = nodes[base + 4], min(nodes[base + 5], k)
+        results = []
+        for entry in topk[start:start + count]:
+            e = entry * ENTRY_FIELDS
+            text_off, text_len, id_off, id_len, popularity = entries[e:e + 5]
+            results.append((
+                bytes(strings[text_off:text_off + text_len]).decode("utf-8"),
+                bytes(strings[id_off:id_off + id_len]).decode("utf-8"),
+                popularity,
+            ))
+        return results
+
+    def save(self, path=INDEX_PATH):
+        """
+        Write all kinds to one file: MAGIC, version, header length, a JSON
+        header of section offsets, then the raw sections (8-byte aligned).
+        """
+        header, blobs, offset = {"byteorder": sys.byteorder, "top_k": self.top_k, "kinds": {}}, [], 0
+        for kind, sections in self.sections.items():
+            header["kinds"][kind] = {}
+            for name, data in sections.items():
+                raw = data.tobytes() if isinstance(data, array) else bytes(data)
+                header["kinds"][kind][name] = [offset, len(raw), "I" if isinstance(data, array) else "B"]
+                padding = -len(raw) % 8
+                blobs.append(raw + b"\0" * padding)
+                offset += len(raw) + padding
+        header_raw = json.dumps(header).encode("utf-8")
+        header_raw += b" " * (-(len(header_raw) + 12) % 8)
+        tmp = Path(f"{path}.tmp")
+        with tmp.open("wb") as f:
+            f.write(MAGIC + FORMAT_VERSION.to_bytes(4, "little") + len(header_raw).to_bytes(4, "little"))
+            f.write(header_raw)
+            for blob in blobs:
+                f.write(blob)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """Map an index written by save(); no copying or parsing of the sections."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:4] != MAGIC or int.from_bytes(mapped[4:8], "little") != FORMAT_VERSION:
+            mapped.close()
+            raise ValueError(f"{path}: not an autocomplete index (version {FORMAT_VERSION})")
+        header_len = int.from_bytes(mapped[8:12], "little")
+        header = json.loads(mapped[12:12 + header_len])
+        if header["byteorder"] != sys.byteorder:
+            mapped.close()
+            raise ValueError(f"{path}: written on a {header['byteorder']}-endian machine")
+        data = memoryview(mapped)[12 + header_len:]
+        sections = {
+            kind: {
+                name: data[offset:offset + length].cast(typecode)
+                for name, (offset, length, typecode) in parts.items()
+            }
+            for kind, parts in header["kinds"].items()
+        }
+        return cls(sections, header["top_k"], mapped)
+
+    def close(self):
+        if self._mapped is not None:
+            self.sections = {}
+            self._mapped.close()
+            self._mapped = None
+
+
+def benchmark(conn, index, path, queries=2000):
+    """Load time and per-keystroke latency vs the server's LIKE query."""
+    start = time.perf_counter()
+    loaded = AutocompleteIndex.load(path)
+    print(f"  load from {path}: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    names = [row[0] for row in conn.execute("SELECT artist_name FROM artists ORDER BY random() LIMIT 200")]
+    prefixes = [name[:n] for name in names for n in range(1, min(len(name), 6) + 1)]
+    prefixes = (prefixes * (queries // max(len(prefixes), 1) + 1))[:queries]
+
+    for label, lookup in (
+        ("LIKE per keystroke", lambda p: conn.execute(
+            "SELECT artist_id, artist_name FROM artists WHERE artist_name LIKE ? ORDER BY artist_name LIMIT 10",
+            (f"%{p}%",)).fetchall()),
+        ("trie (in memory)", lambda p: index.complete("artists", p)),
+        ("trie (mmapped)", lambda p: loaded.complete("artists", p)),
+    ):
+        start = time.perf_counter()
+        for p in prefixes:
+            lookup(p)
+        print(f"  {label:<20} {(time.perf_counter() - start) * 1e6 / len(prefixes):9.1f} µs/query")
+    loaded.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build / query the prefix autocomplete index.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--out", default=INDEX_PATH, help="index file to write / read")
+    parser.add_argument("--complete", nargs=2, metavar=("KIND", "PREFIX"),
+                        help=f"query an existing index file ({', '.join(KINDS)})")
+    parser.add_argument("--benchmark", action="store_true", help="time loading and lookups after building")
+    args = parser.parse_args()
+
+    if args.complete:
+        kind, prefix = args.complete
+        index = AutocompleteIndex.load(args.out)
+        try:
+            for text, ident, popularity in index.complete(kind, prefix):
+                print(f"  {text}  ({ident}, tracked {popularity}x)" if kind == "artists" else f"  {text}  (tracked {popularity}x)")
+        finally:
+            index.close()
+        return
+
+    conn = connect(args.db)
+    try:
+        print("=" * 60)
+        print(f"Building autocomplete index -> {args.out}")
+        print("=" * 60)
+        start = time.perf_counter()
+        index = AutocompleteIndex.build(conn)
+        built = time.perf_counter() - start
+        index.save(args.out)
+        for kind in KINDS:
+            print(f"  {kind}: {len(index.sections[kind]['entries']) // ENTRY_FIELDS} names, "
+                  f"{len(index.sections[kind]['nodes']) // NODE_FIELDS} trie nodes")
+        print(f"✓ Built in {built:.2f}s, {Path(args.out).stat().st_size / 1024:.0f} KB on disk")
+        if args.benchmark:
+            benchmark(conn, index, args.out)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
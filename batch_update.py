@@ -0,0 +1,278 @@
+import sqlite3
+import time
+import argparse
+
+from db_connection import connect
+
+# Shared engine for the data-fix scripts (add_ratings_to_existing.py,
+# update_event_country_and_add_artists.py, update_user_profiles.py,
+# complete_user_profiles.py). Instead of fetching every row and issuing one
+# UPDATE ... WHERE id = ? per row, rows are read in keyset-paginated chunks,
+# new values are computed for the whole chunk in Python, and the chunk is
+# written back with one executemany or one UPDATE ... FROM join.
+#
+# Passing job="name" makes a run resumable: each chunk is committed together
+# with the job's cursor (the last key written) in batch_jobs, so a run that
+# dies halfway restarts after the last committed chunk instead of rescanning
+# the table, and a pause between chunks leaves the live app room to write.
+
+CHUNK_SIZE = 5000
+# Default pause between chunks of a resumable job
+JOB_PAUSE_SECONDS = 0.05
+
+# UPDATE ... FROM needs SQLite 3.33+
+HAS_UPDATE_FROM = sqlite3.sqlite_version_info >= (3, 33, 0)
+
+
+def print_progress(processed: int, total: int, updated: int, elapsed: float) -> None:
+    rate = processed / elapsed if elapsed > 0 else float("inf")
+    pct = f"{processed * 100 / total:.0f}%, " if total else ""
+    print(f"  Processed {processed}/{total} rows ({pct}{updated} updated, {rate:,.0f} rows/sec)")
+
+
+def apply_updates(conn, table, key_column, set_columns, rows, method="auto") -> int:
+    """
+    Write one chunk of (key, *new_values) rows back to table.
+
+    method:
+      - "executemany": UPDATE table SET c1 = ?, ... WHERE key = ? per row,
+                       but in one executemany call
+      - "join":        load the chunk into a TEMP table and run a single
+                       UPDATE ... FROM join (SQLite 3.33+)
+      - "auto":        "join" when available, else "executemany"
+    Returns the number of rows written.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    if method == "auto":
+        method = "join" if HAS_UPDATE_FROM else "executemany"
+
+    if method == "executemany":
+        assignments = ", ".join(f"{c} = ?" for c in set_columns)
+        conn.executemany(
+            f"UPDATE {table} SET {assignments} WHERE {key_column} = ?",
+            [tuple(r[1:]) + (r[0],) for r in rows],
+        )
+    elif method == "join":
+        cols = ", ".join(set_columns)
+        placeholders = ", ".join("?" for _ in range(len(set_columns) + 1))
+        conn.execute("DROP TABLE IF EXISTS temp._batch_update")
+        conn.execute(f"CREATE TEMP TABLE _batch_update (k PRIMARY KEY, {cols})")
+        conn.executemany(f"INSERT INTO temp._batch_update (k, {cols}) VALUES ({placeholders})", rows)
+        assignments = ", ".join(f"{c} = b.{c}" for c in set_columns)
+        conn.execute(
+            f"UPDATE {table} SET {assignments} "
+            f"FROM temp._batch_update AS b WHERE {table}.{key_column} = b.k"
+        )
+        conn.execute("DROP TABLE temp._batch_update")
+    else:
+        raise ValueError(f"Unknown update method: {method}")
+
+    return len(rows)
+
+
+def iter_chunks(conn, table, key_column, select_columns, where=None, params=(), chunk_size=CHUNK_SIZE,
+                after=None):
+    """
+    Yield lists of (key, *select_columns) rows, chunk_size at a time, using
+    keyset pagination on key_column (WHERE key > last ORDER BY key LIMIT n),
+    so each page is an index range scan and updated rows never shift pages.
+    after starts the scan past that key (resuming a job).
+    """
+    cols = ", ".join([key_column] + list(select_columns))
+    conditions = [f"({where})"] if where else []
+
+    def page_sql(conds):
+        condition = f" WHERE {' AND '.join(conds)}" if conds else ""
+        return f"SELECT {cols} FROM {table}{condition} ORDER BY {key_column} LIMIT ?"
+
+    next_sql = page_sql(conditions + [f"{key_column} > ?"])
+    if after is None:
+        rows = conn.execute(page_sql(conditions), tuple(params) + (chunk_size,)).fetchall()
+    else:
+        rows = conn.execute(next_sql, tuple(params) + (after, chunk_size)).fetchall()
+    while rows:
+        yield rows
+        rows = conn.execute(next_sql, tuple(params) + (rows[-1][0], chunk_size)).fetchall()
+
+
+def ensure_jobs_table(conn) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS batch_jobs (
+            name        TEXT PRIMARY KEY,
+            table_name  TEXT NOT NULL,
+            status      TEXT NOT NULL,      -- running / done / failed
+            last_key,                       -- cursor: last key committed (any type)
+            processed   INTEGER NOT NULL DEFAULT 0,
+            updated     INTEGER NOT NULL DEFAULT 0,
+            started_at  TEXT NOT NULL,
+            updated_at  TEXT NOT NULL,
+            error       TEXT
+        )
+        """
+    )
+    conn.commit()
+
+
+def job_status(conn, name):
+    """The batch_jobs row for name as a dict, or None."""
+    ensure_jobs_table(conn)
+    cur = conn.execute("SELECT * FROM batch_jobs WHERE name = ?", (name,))
+    row = cur.fetchone()
+    return dict(zip([d[0] for d in cur.description], row)) if row else None
+
+
+def reset_job(conn, name) -> None:
+    """Forget a job's cursor so its next run starts from the first row."""
+    ensure_jobs_table(conn)
+    conn.execute("DELETE FROM batch_jobs WHERE name = ?", (name,))
+    conn.commit()
+
+
+def _start_job(conn, name, table):
+    """Resume an unfinished run of name (returns its row) or start a new one."""
+    job = job_status(conn, name)
+    if job and job["status"] != "done":
+        conn.execute(
+            "UPDATE batch_jobs SET status = 'running', error = NULL, updated_at = datetime('now') WHERE name = ?",
+            (name,),
+        )
+        conn.commit()
+        return job
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO batch_jobs (name, table_name, status, last_key, processed, updated, started_at, updated_at)
+        VALUES (?, ?, 'running', NULL, 0, 0, datetime('now'), datetime('now'))
+        """,
+        (name, table),
+    )
+    conn.commit()
+    return job_status(conn, name)
+
+
+def batched_update(
+    conn: sqlite3.Connection,
+    table: str,
+    key_column: str,
+    select_columns,
+    set_columns,
+    compute,
+    where: str = None,
+    params=(),
+    chunk_size: int = CHUNK_SIZE,
+    method: str = "auto",
+    progress=print_progress,
+    job: str = None,
+    pause: float = JOB_PAUSE_SECONDS,
+) -> int:
+    """
+    Recompute columns for every matching row of table, one chunk at a time.
+
+    compute(rows) receives a chunk of (key, *select_columns) tuples and
+    returns (key, *set_columns values) tuples for the rows to update
+    (rows it leaves out are not touched). progress(processed, total,
+    updated, elapsed) is called once per chunk.
+
+    Without job, everything runs in one transaction, committed at the end.
+    With job (a name), every chunk is committed along with the job's cursor
+    in batch_jobs and followed by pause seconds; if a previous run of the
+    same job didn't finish, this run continues after its last committed
+    chunk. A finished job starts over on its next run.
+
+    Returns the number of rows updated (by this run).
+    """
+    processed = updated = 0
+    after = None
+    if job:
+        state = _start_job(conn, job, table)
+        after = state["last_key"]
+        processed, updated = state["processed"], state["updated"]
+        if after is not None:
+            print(f"  Resuming job '{job}' after {key_column} {after} ({processed} rows already processed)")
+
+    conditions, count_params = ([f"({where})"] if where else []), list(params)
+    if after is not None:
+        conditions.append(f"{key_column} > ?")
+        count_params.append(after)
+    condition = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    total = processed + conn.execute(f"SELECT COUNT(*) FROM {table}{condition}", count_params).fetchone()[0]
+
+    updated_before = updated
+    start = time.perf_counter()
+    try:
+        for rows in iter_chunks(conn, table, key_column, select_columns, where, params, chunk_size, after):
+            processed += len(rows)
+            updated += apply_updates(conn, table, key_column, set_columns, compute(rows), method)
+            if job:
+                conn.execute(
+                    """
+                    UPDATE batch_jobs
+                    SET last_key = ?, processed = ?, updated = ?, updated_at = datetime('now')
+                    WHERE name = ?
+                    """,
+                    (rows[-1][0], processed, updated, job),
+                )
+                conn.commit()
+            if progress:
+                progress(processed, total, updated, time.perf_counter() - start)
+            if job and pause:
+                time.sleep(pause)
+        if job:
+            conn.execute(
+                "UPDATE batch_jobs SET status = 'done', updated_at = datetime('now') WHERE name = ?", (job,)
+            )
+        conn.commit()
+    except BaseException as e:
+        conn.rollback()
+        if job:
+            conn.execute(
+                "UPDATE batch_jobs SET status = 'failed', error = ?, updated_at = datetime('now') WHERE name = ?",
+                (f"{type(e).__name__}: {e}", job),
+            )
+            conn.commit()
+        raise
+
+    return updated - updated_before
+
+
+def add_job_arguments(parser):
+    """--chunk-size / --pause / --restart for scripts that run a resumable job."""
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per committed chunk")
+    parser.add_argument("--pause", type=float, default=JOB_PAUSE_SECONDS,
+                        help="seconds to sleep between chunks (throttles the job for the live app)")
+    parser.add_argument("--restart", action="store_true", help="ignore an unfinished run and start over")
+    return parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or reset the resumable batch jobs.")
+    parser.add_argument("--db", default="music_artists.db", help="SQLite database path")
+    parser.add_argument("--reset", metavar="JOB", help="forget JOB's cursor so it starts over")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        if args.reset:
+            reset_job(conn, args.reset)
+            print(f"✓ Reset job '{args.reset}'")
+            return
+        ensure_jobs_table(conn)
+        jobs = conn.execute(
+            "SELECT name, table_name, status, last_key, processed, updated, updated_at, error FROM batch_jobs ORDER BY name"
+        ).fetchall()
+        if not jobs:
+            print("No batch jobs recorded.")
+        for name, table, status, last_key, processed, updated, updated_at, error in jobs:
+            print(f"  {name:<24} {status:<8} {table}: {processed} processed, {updated} updated, "
+                  f"cursor {last_key} ({updated_at})")
+            if error:
+                print(f"      last error: {error}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import io
+import sqlite3
+import tempfile
+import time
+import argparse
+from pathlib import Path
+
+from csv_to_music_tracker_sql import (
+    CSV_PATH,
+    OUTPUT_FORMATS,
+    ROWS_PER_STATEMENT,
+    load_csv,
+    write_schema,
+    write_inserts,
+    write_multirow_inserts,
+    write_pg_copy,
+    write_mysql_tsv,
+)
+
+# SQLite is the local stand-in for Postgres/MySQL: SQL dumps are replayed with
+# executescript, COPY blocks and TSV side files are parsed and bulk-inserted
+# with executemany (what psql COPY / LOAD DATA do server-side).
+
+UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+
+
+def tsv_unfield(field: str):
+    """Inverse of csv_to_music_tracker_sql.tsv_field."""
+    if field == "\\N":
+        return None
+    if "\\" not in field:
+        return field
+    out = []
+    chars = iter(field)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append(UNESCAPES.get(nxt, nxt))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def tsv_rows(lines):
+    for line in lines:
+        yield [tsv_unfield(f) for f in line.rstrip("\n").split("\t")]
+
+
+def schema_sql() -> str:
+    buf = io.StringIO()
+    write_schema(buf)
+    return buf.getvalue()
+
+
+def replay_sql(conn, data_path: Path):
+    conn.executescript(data_path.read_text(encoding="utf-8").replace("START TRANSACTION;", "BEGIN;"))
+
+
+def replay_pg_copy(conn, data_path: Path):
+    """Apply the COPY ... FROM STDIN blocks of a pgcopy dump."""
+    with data_path.open("r", encoding="utf-8", newline="") as f:
+        lines = iter(f)
+        conn.execute("BEGIN;")
+        for line in lines:
+            if not line.startswith("COPY "):
+                continue
+            head = line[len("COPY "):line.index(" FROM STDIN")]
+            table, cols = head.split(" ", 1)
+            placeholders = ", ".join("?" for _ in cols.strip("()").split(","))
+            block = []
+            for row_line in lines:
+                if row_line == "\\.\n":
+                    break
+                block.append(row_line)
+            conn.executemany(f"INSERT INTO {table} {cols} VALUES ({placeholders})", tsv_rows(block))
+        conn.commit()
+
+
+def replay_mysql_tsv(conn, tsv_dir: Path):
+    conn.execute("BEGIN;")
+    with (tsv_dir / "genres.tsv").open("r", encoding="utf-8", newline="") as f:
+        conn.executemany("INSERT INTO genres (genre_id, genre_name) VALUES (?, ?)", tsv_rows(f))
+    with (tsv_dir / "artists.tsv").open("r", encoding="utf-8", newline="") as f:
+        conn.executemany(
+            "INSERT INTO artists (artist_id, artist_name, artist_img, country, genre_id) VALUES (?, ?, ?, ?, ?)",
+            tsv_rows(f),
+        )
+    conn.commit()
+
+
+def run_benchmark(csv_path: Path, rows_per_statement: int = ROWS_PER_STATEMENT):
+    genres, artists = load_csv(csv_path)
+    print(f"Loaded {len(artists)} artists / {len(genres)} genres from {csv_path}")
+    print()
+    print(f"{'format':<12} {'size (KB)':>12} {'write (s)':>10} {'replay (s)':>11} {'rows':>9}")
+    print("-" * 58)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for fmt in OUTPUT_FORMATS:
+            data_path = tmp / f"data_{fmt}.sql"
+            tsv_dir = tmp / "tsv"
+
+            start = time.perf_counter()
+            with data_path.open("w", encoding="utf-8") as out:
+                if fmt == "insert":
+                    write_inserts(out, genres, artists)
+                elif fmt == "multirow":
+                    write_multirow_inserts(out, genres, artists, rows_per_statement)
+                elif fmt == "pgcopy":
+                    write_pg_copy(out, genres, artists)
+                else:
+                    write_mysql_tsv(out, genres, artists, tsv_dir)
+            write_time = time.perf_counter() - start
+
+            size = data_path.stat().st_size
+            if fmt == "mysql-tsv":
+                size += sum(p.stat().st_size for p in tsv_dir.glob("*.tsv"))
+
+            conn = sqlite3.connect(tmp / f"replay_{fmt}.db")
+            conn.executescript(schema_sql())
+            start = time.perf_counter()
+            if fmt in ("insert", "multirow"):
+                replay_sql(conn, data_path)
+            elif fmt == "pgcopy":
+                replay_pg_copy(conn, data_path)
+            else:
+                replay_mysql_tsv(conn, tsv_dir)
+            replay_time = time.perf_counter() - start
+            rows = conn.execute("SELECT COUNT(*) FROM artists").fetchone()[0]
+            conn.close()
+
+            print(f"{fmt:<12} {size / 1024:>12,.0f} {write_time:>10.2f} {replay_time:>11.2f} {rows:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQL dump output formats (size + replay time).")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="input CSV path")
+    parser.add_argument("--rows-per-statement", type=int, default=ROWS_PER_STATEMENT)
+    args = parser.parse_args()
+
+    print("=" * 58)
+    print("SQL dump format benchmark (SQLite replay stand-in)")
+    print("=" * 58)
+    run_benchmark(args.csv, args.rows_per_statement)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import csv
+import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from db_connection import connect
+
+try:
+    import bcrypt
+    HAS_BCRYPT = True
+except ImportError:
+    HAS_BCRYPT = False
+
+DB_PATH = "music_artists.db"
+
+# bcrypt cost factor. The Node server hashes with bcrypt.hash(password, 10),
+# so imported accounts use the same cost by default.
+BCRYPT_ROUNDS = 10
+
+HASH_BATCH_SIZE = 64      # passwords per task sent to a worker process
+INSERT_BATCH_SIZE = 1000  # users per executemany
+
+# bcrypt only looks at the first 72 bytes; bcryptjs (used by the server)
+# silently truncates there, so we do the same instead of raising.
+BCRYPT_MAX_BYTES = 72
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """bcrypt hash of one password at the given cost factor."""
+    if not HAS_BCRYPT:
+        raise RuntimeError("bcrypt is required to hash passwords: pip install bcrypt")
+    secret = password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+    return bcrypt.hashpw(secret, bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def hash_batch(passwords, rounds):
+    """Worker: hash a list of passwords."""
+    return [hash_password(p, rounds) for p in passwords]
+
+
+def iter_hashed_batches(user_batches, rounds=BCRYPT_ROUNDS, workers=None):
+    """
+    Hash each batch of user dicts in a process pool sized to the cores and
+    yield (batch, hashes) in input order. Every batch is split into
+    HASH_BATCH_SIZE tasks so all workers stay busy even on one big batch,
+    and at most 2 * workers batches are in flight, so hashing and the
+    caller's inserts overlap without buffering the whole input.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    def submit(pool, batch):
+        passwords = [u["password"] for u in batch]
+        return [
+            pool.submit(hash_batch, passwords[i:i + HASH_BATCH_SIZE], rounds)
+            for i in range(0, len(passwords), HASH_BATCH_SIZE)
+        ]
+
+    def collect(futures):
+        return [h for future in futures for h in future.result()]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in user_batches:
+            pending.append((batch, submit(pool, batch)))
+            if len(pending) >= 2 * workers:
+                batch, futures = pending.popleft()
+                yield batch, collect(futures)
+        while pending:
+            batch, futures = pending.popleft()
+            yield batch, collect(futures)
+
+
+def read_users_csv(csv_path: Path):
+    """
+    Read migrated accounts. Required columns: email, password (plain text);
+    optional: first_name, last_name, nickname, city, state, country.
+    """
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            email = (row.get("email") or "").strip()
+            password = row.get("password") or ""
+            if not email or not password:
+                continue
+            yield {
+                "email": email,
+                "password": password,
+                "first_name": (row.get("first_name") or "").strip() or None,
+                "last_name": (row.get("last_name") or "").strip() or None,
+                "nickname": (row.get("nickname") or "").strip() or None,
+                "city": (row.get("city") or "").strip() or None,
+                "state": (row.get("state") or "").strip() or None,
+                "country": (row.get("country") or "").strip() or None,
+            }
+
+
+def new_user_batches(conn, users, batch_size):
+    """
+    Group users into batches, dropping emails that already exist (in the
+    database or earlier in the input) BEFORE they reach the hash pool.
+    Returns a generator; skipped counts go into the returned dict.
+    """
+    skipped = {"existing": 0}
+    seen = set()
+
+    def batches():
+        batch = []
+        for user in users:
+            if user["email"] in seen:
+                skipped["existing"] += 1
+                continue
+            seen.add(user["email"])
+            batch.append(user)
+            if len(batch) == batch_size:
+                yield drop_existing(batch)
+                batch = []
+        if batch:
+            yield drop_existing(batch)
+
+    def drop_existing(batch):
+        placeholders = ", ".join("?" for _ in batch)
+        existing = {
+            row[0]
+            for row in conn.execute(
+                f"SELECT email FROM users WHERE email IN ({placeholders})",
+                [u["email"] for u in batch],
+            )
+        }
+        skipped["existing"] += len(existing)
+        return [u for u in batch if u["email"] not in existing]
+
+    return batches(), skipped
+
+
+def bulk_import_users(conn, users, rounds=BCRYPT_ROUNDS, workers=None, batch_size=INSERT_BATCH_SIZE):
+    """
+    Insert users with a distinct bcrypt hash each. Hashing runs in a process
+    pool; each batch is inserted (users + user_profiles) as soon as its
+    hashes come back. Commits once per batch, so a crash loses at most one
+    batch and a rerun skips the emails that already made it in.
+
+    Returns (imported, skipped).
+    """
+    batches, skipped = new_user_batches(conn, users, batch_size)
+    imported = 0
+    start = time.perf_counter()
+
+    for batch, hashes in iter_hashed_batches(batches, rounds, workers):
+        if not batch:
+            continue
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO users (email, password, first_name, last_name, nickname)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (u["email"], h, u["first_name"], u["last_name"], u["nickname"])
+                for u, h in zip(batch, hashes)
+            ],
+        )
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO user_profiles (user_id, city, state, country)
+            SELECT id, ?, ?, ? FROM users WHERE email = ?
+            """,
+            [(u["city"], u["state"], u["country"], u["email"]) for u in batch],
+        )
+        conn.commit()
+
+        imported += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"  Imported {imported} users ({imported / elapsed:,.1f} users/sec)")
+
+    return imported, skipped["existing"]
+
+
+def benchmark(rounds_list, count=64, workers=None):
+    """Print hashed users/sec for each cost factor, single process vs pool."""
+    workers = workers or os.cpu_count() or 1
+    passwords = [f"password{i}" for i in range(count)]
+
+    print(f"{'rounds':>6} {'1 process (users/s)':>20} {f'{workers} workers (users/s)':>22}")
+    print("-" * 52)
+    for rounds in rounds_list:
+        start = time.perf_counter()
+        hash_batch(passwords, rounds)
+        serial = count / (time.perf_counter() - start)
+
+        batches = [[{"password": p} for p in passwords[i:i + 8]] for i in range(0, count, 8)]
+        start = time.perf_counter()
+        for _ in iter_hashed_batches(batches, rounds, workers):
+            pass
+        pooled = count / (time.perf_counter() - start)
+
+        print(f"{rounds:>6} {serial:>20,.1f} {pooled:>22,.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import migrated user accounts with per-user bcrypt hashes.")
+    parser.add_argument("--csv", type=Path, help="CSV with email,password[,first_name,last_name,nickname,city,state,country]")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--rounds", type=int, default=BCRYPT_ROUNDS, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=INSERT_BATCH_SIZE, help="users per insert batch")
+    parser.add_argument(
+        "--benchmark",
+        nargs="*",
+        type=int,
+        metavar="ROUNDS",
+        help="benchmark users/sec at these cost factors (default: 4 6 8 10 12) instead of importing",
+    )
+    args = parser.parse_args()
+
+    if not HAS_BCRYPT:
+        raise SystemExit("bcrypt is required: pip install bcrypt")
+
+    if args.benchmark is not None:
+        print("=" * 52)
+        print("bcrypt throughput by cost factor")
+        print("=" * 52)
+        benchmark(args.benchmark or [4, 6, 8, 10, 12], workers=args.workers)
+        return
+
+    if not args.csv:
+        parser.error("--csv is required unless --benchmark is given")
+
+    print("=" * 60)
+    print(f"Importing users from {args.csv} (bcrypt cost {args.rounds})")
+    print("=" * 60)
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        imported, skipped = bulk_import_users(
+            conn,
+            read_users_csv(args.csv),
+            rounds=args.rounds,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        )
+    finally:
+        conn.close()
+
+    print()
+    print("=" * 60)
+    print("Summary:")
+    print(f"  Imported users: {imported}")
+    print(f"  Skipped (email already exists): {skipped}")
+    print("=" * 60)
+    print()
+    print("✅ Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
-import sqlite3
 import random
+import argparse
+
+from batch_update import CHUNK_SIZE, JOB_PAUSE_SECONDS, add_job_arguments, batched_update, reset_job
+from db_connection import connect
 
 DB_PATH = "music_artists.db"
 
@@ -40,18 +43,10 @@ def get_random_genres(count=3):
     selected = random.sample(ALL_GENRES, min(count, len(ALL_GENRES)))
     return ", ".join(selected)
 
-def complete_user_profiles(conn):
-    """Fill in missing bio and favorite_genres for all users."""
-    cursor = conn.cursor()
-
-    # Get all user profiles
-    cursor.execute("SELECT user_id FROM user_profiles")
-    user_profiles = cursor.fetchall()
-
-    print(f"Completing profiles for {len(user_profiles)} users...")
-    print()
-
-    for (user_id,) in user_profiles:
+def random_bio_updates(rows):
+    """(user_id,) rows -> (user_id, bio, favorite_genres) rows."""
+    updates = []
+    for (user_id,) in rows:
         # Select random bio
         bio = random.choice(BIO_TEMPLATES)
 
@@ -59,41 +54,44 @@ def complete_user_profiles(conn):
         num_genres = random.randint(2, 4)
         favorite_genres = get_random_genres(num_genres)
 
-        # Update the user profile
-        cursor.execute("""
-            UPDATE user_profiles
-            SET bio = ?,
-                favorite_genres = ?
-            WHERE user_id = ?
-        """, (bio, favorite_genres, user_id))
+        updates.append((user_id, bio, favorite_genres))
+    return updates
 
-        # Get user info for display
-        cursor.execute("""
-            SELECT first_name, last_name, nickname
-            FROM users
-            WHERE id = ?
-        """, (user_id,))
+def complete_user_profiles(conn, chunk_size=CHUNK_SIZE, pause=JOB_PAUSE_SECONDS, restart=False):
+    """Fill in missing bio and favorite_genres for all users."""
+    cursor = conn.cursor()
 
-        user = cursor.fetchone()
-        if user:
-            first_name, last_name, nickname = user
-            print(f"✓ Updated {first_name} {last_name} ({nickname})")
-            print(f"  Bio: {bio[:60]}...")
-            print(f"  Favorite Genres: {favorite_genres}")
-            print()
+    cursor.execute("SELECT COUNT(*) FROM user_profiles")
+    print(f"Completing profiles for {cursor.fetchone()[0]} users...")
+    print()
 
-    conn.commit()
+    if restart:
+        reset_job(conn, "complete_user_profiles")
+    batched_update(
+        conn,
+        "user_profiles",
+        "user_id",
+        [],
+        ["bio", "favorite_genres"],
+        random_bio_updates,
+        chunk_size=chunk_size,
+        job="complete_user_profiles",
+        pause=pause,
+    )
+    print()
 
 def main():
+    args = add_job_arguments(argparse.ArgumentParser(description="Fill in missing bios and favorite genres.")).parse_args()
+
     print("=" * 70)
     print("Completing user profiles with bios and favorite genres")
     print("=" * 70)
     print()
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH, checkpoints=True)
 
     try:
-        complete_user_profiles(conn)
+        complete_user_profiles(conn, args.chunk_size, args.pause, args.restart)
 
         # Show summary
         cursor = conn.cursor()
@@ -1,9 +1,15 @@
 import csv
+import argparse
+import shutil
+import sqlite3
+import tempfile
 from pathlib import Path
 
 # ========= CONFIG =========
 CSV_PATH = Path("Global Music Artists.csv")  # input CSV
 SQL_OUTPUT_PATH = Path("music_tracker_schema_and_data.sql")  # output SQL
+OUTPUT_FORMATS = ("insert", "multirow", "pgcopy", "mysql-tsv")  # see write_data
+ROWS_PER_STATEMENT = 500  # rows per INSERT for the "multirow" format
 # ==========================
 
 
@@ -153,51 +159,367 @@ def load_csv(csv_path: Path):
     return genres, artists
 
 
-def write_data(out, csv_path: Path):
+def write_data(
+    out,
+    csv_path: Path,
+    workers: int = 0,
+    fmt: str = "insert",
+    rows_per_statement: int = ROWS_PER_STATEMENT,
+    tsv_dir: Path = None,
+):
     """
-    Generate INSERT statements for genres and artists
+    Generate the data section for genres and artists
     based on the CSV content.
+    If workers > 0 the CSV is parsed in that many processes
+    (same result as load_csv, see parallel_csv_ingest.py).
+
+    fmt selects the output dialect (all built from the same load_csv result):
+      - "insert":    one INSERT per row (original format)
+      - "multirow":  INSERT ... VALUES (...),(...) with rows_per_statement rows
+      - "pgcopy":    PostgreSQL COPY ... FROM STDIN blocks
+      - "mysql-tsv": genres.tsv / artists.tsv side files in tsv_dir plus
+                     MySQL LOAD DATA statements that read them
     """
-    genres, artists = load_csv(csv_path)
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt} (expected one of {OUTPUT_FORMATS})")
 
+    if workers:
+        from parallel_csv_ingest import parallel_load_csv
+
+        genres, artists = parallel_load_csv(csv_path, workers=workers)
+    else:
+        genres, artists = load_csv(csv_path)
+
+    if fmt == "insert":
+        write_inserts(out, genres, artists)
+    elif fmt == "multirow":
+        write_multirow_inserts(out, genres, artists, rows_per_statement)
+    elif fmt == "pgcopy":
+        write_pg_copy(out, genres, artists)
+    else:
+        write_mysql_tsv(out, genres, artists, tsv_dir or Path("."))
+
+
+def sorted_genres(genres):
+    """(genre_id, display_name) pairs in genre_id order."""
+    return [v for _, v in sorted(genres.items(), key=lambda kv: kv[1][0])]
+
+
+def write_inserts(out, genres, artists):
+    """One INSERT statement per genre / artist row."""
     out.write("-- Data for genres and artists loaded from CSV\n")
     out.write("START TRANSACTION;\n\n")
 
     # Insert genres
-    for _, (gid, gname) in sorted(genres.items(), key=lambda kv: kv[1][0]):
-        esc_name = sql_escape(gname)
-        out.write(
-            "INSERT INTO genres (genre_id, genre_name)\n"
-            f"VALUES ({gid}, '{esc_name}');\n"
-        )
+    for gid, gname in sorted_genres(genres):
+        out.write(genre_insert_sql(gid, gname))
     out.write("\n")
 
     # Insert artists
     for a in artists:
-        esc_id = sql_escape(a["artist_id"])
-        esc_name = sql_escape(a["artist_name"])
-        img = a["artist_img"]
-        country = a["country"]
-        gid = a["genre_id"]
+        out.write(artist_insert_sql(a))
+
+    out.write("\nCOMMIT;\n")
+
+
+def write_multirow_inserts(out, genres, artists, rows_per_statement: int = ROWS_PER_STATEMENT):
+    """Batched INSERT ... VALUES (...),(...),...; with rows_per_statement rows each."""
+    if rows_per_statement < 1:
+        raise ValueError("rows_per_statement must be >= 1")
 
-        img_sql = "NULL" if not img else f"'{sql_escape(img)}'"
-        country_sql = "NULL" if not country else f"'{sql_escape(country)}'"
-        genre_sql = "NULL" if gid is None else str(gid)
+    out.write("-- Data for genres and artists loaded from CSV (multi-row INSERT)\n")
+    out.write("START TRANSACTION;\n\n")
+
+    genre_values = [f"({gid}, '{sql_escape(gname)}')" for gid, gname in sorted_genres(genres)]
+    _write_value_batches(out, "INSERT INTO genres (genre_id, genre_name)", genre_values, rows_per_statement)
+    out.write("\n")
+
+    _write_value_batches(
+        out,
+        "INSERT INTO artists (artist_id, artist_name, artist_img, country, genre_id)",
+        (artist_values_sql(a) for a in artists),
+        rows_per_statement,
+    )
 
-        out.write(
-            "INSERT INTO artists (artist_id, artist_name, artist_img, country, genre_id)\n"
-            f"VALUES ('{esc_id}', '{esc_name}', {img_sql}, {country_sql}, {genre_sql});\n"
-        )
+    out.write("\nCOMMIT;\n")
+
+
+def _write_value_batches(out, insert_head, values, rows_per_statement):
+    batch = []
+    for v in values:
+        batch.append(v)
+        if len(batch) == rows_per_statement:
+            out.write(f"{insert_head}\nVALUES\n  " + ",\n  ".join(batch) + ";\n")
+            batch = []
+    if batch:
+        out.write(f"{insert_head}\nVALUES\n  " + ",\n  ".join(batch) + ";\n")
 
+
+def tsv_field(value) -> str:
+    """
+    Encode one field for PostgreSQL COPY text format / MySQL LOAD DATA:
+    None and empty strings become \\N, and backslash, tab, newline and
+    carriage return are backslash-escaped.
+    """
+    if value is None or value == "":
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def genre_tsv_rows(genres):
+    for gid, gname in sorted_genres(genres):
+        yield f"{gid}\t{tsv_field(gname)}\n"
+
+
+def artist_tsv_rows(artists):
+    for a in artists:
+        yield "\t".join(
+            [
+                tsv_field(a["artist_id"]),
+                tsv_field(a["artist_name"]),
+                tsv_field(a["artist_img"]),
+                tsv_field(a["country"]),
+                tsv_field(a["genre_id"]),
+            ]
+        ) + "\n"
+
+
+def write_pg_copy(out, genres, artists):
+    """PostgreSQL COPY ... FROM STDIN blocks (replay with psql)."""
+    out.write("-- Data for genres and artists loaded from CSV (PostgreSQL COPY)\n")
+    out.write("BEGIN;\n\n")
+
+    out.write("COPY genres (genre_id, genre_name) FROM STDIN;\n")
+    out.writelines(genre_tsv_rows(genres))
+    out.write("\\.\n\n")
+
+    out.write("COPY artists (artist_id, artist_name, artist_img, country, genre_id) FROM STDIN;\n")
+    out.writelines(artist_tsv_rows(artists))
+    out.write("\\.\n")
+
+    out.write("\nCOMMIT;\n")
+
+
+def write_mysql_tsv(out, genres, artists, tsv_dir: Path):
+    """
+    Write genres.tsv and artists.tsv into tsv_dir and the MySQL
+    LOAD DATA statements that load them.
+    """
+    tsv_dir.mkdir(parents=True, exist_ok=True)
+    genres_path = tsv_dir / "genres.tsv"
+    artists_path = tsv_dir / "artists.tsv"
+
+    with genres_path.open("w", encoding="utf-8", newline="") as f:
+        f.writelines(genre_tsv_rows(genres))
+    with artists_path.open("w", encoding="utf-8", newline="") as f:
+        f.writelines(artist_tsv_rows(artists))
+
+    load_tail = (
+        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'\n"
+        "LINES TERMINATED BY '\\n'\n"
+    )
+    out.write("-- Data for genres and artists loaded from CSV (MySQL LOAD DATA)\n")
+    out.write("START TRANSACTION;\n\n")
+    out.write(
+        f"LOAD DATA LOCAL INFILE '{sql_escape(str(genres_path))}'\n"
+        "INTO TABLE genres CHARACTER SET utf8mb4\n"
+        f"{load_tail}"
+        "(genre_id, genre_name);\n\n"
+    )
+    out.write(
+        f"LOAD DATA LOCAL INFILE '{sql_escape(str(artists_path))}'\n"
+        "INTO TABLE artists CHARACTER SET utf8mb4\n"
+        f"{load_tail}"
+        "(artist_id, artist_name, artist_img, country, genre_id);\n"
+    )
     out.write("\nCOMMIT;\n")
 
 
+def genre_insert_sql(gid, gname) -> str:
+    """One INSERT statement for a genre row."""
+    esc_name = sql_escape(gname)
+    return (
+        "INSERT INTO genres (genre_id, genre_name)\n"
+        f"VALUES ({gid}, '{esc_name}');\n"
+    )
+
+
+def artist_sql_literals(a):
+    """SQL literals for (artist_id, artist_name, artist_img, country, genre_id)."""
+    esc_id = sql_escape(a["artist_id"])
+    esc_name = sql_escape(a["artist_name"])
+    img = a["artist_img"]
+    country = a["country"]
+    gid = a["genre_id"]
+
+    img_sql = "NULL" if not img else f"'{sql_escape(img)}'"
+    country_sql = "NULL" if not country else f"'{sql_escape(country)}'"
+    genre_sql = "NULL" if gid is None else str(gid)
+
+    return f"'{esc_id}'", f"'{esc_name}'", img_sql, country_sql, genre_sql
+
+
+def artist_values_sql(a) -> str:
+    """The (...) VALUES tuple for an artist dict as built by load_csv."""
+    return "(" + ", ".join(artist_sql_literals(a)) + ")"
+
+
+def artist_insert_sql(a) -> str:
+    """One INSERT statement for an artist dict as built by load_csv."""
+    return (
+        "INSERT INTO artists (artist_id, artist_name, artist_img, country, genre_id)\n"
+        f"VALUES {artist_values_sql(a)};\n"
+    )
+
+
+class SeenArtistIds:
+    """
+    On-disk replacement for the seen_artist_ids set in load_csv.
+
+    IDs live in a WITHOUT ROWID table in a throwaway SQLite file with a small
+    page cache, so memory stays flat no matter how many artists we've seen.
+    """
+
+    def __init__(self, directory=None, cache_kib: int = 8192):
+        self._tmp = tempfile.NamedTemporaryFile(suffix=".db", dir=directory, delete=False)
+        self._tmp.close()
+        self.conn = sqlite3.connect(self._tmp.name)
+        self.conn.execute("PRAGMA journal_mode = OFF;")
+        self.conn.execute("PRAGMA synchronous = OFF;")
+        self.conn.execute(f"PRAGMA cache_size = -{cache_kib};")
+        self.conn.execute("CREATE TABLE seen (artist_id TEXT PRIMARY KEY) WITHOUT ROWID;")
+
+    def add(self, artist_id: str) -> bool:
+        """Record artist_id; returns True if it was NOT seen before."""
+        cur = self.conn.execute("INSERT OR IGNORE INTO seen (artist_id) VALUES (?);", (artist_id,))
+        return cur.rowcount == 1
+
+    def close(self) -> None:
+        self.conn.close()
+        Path(self._tmp.name).unlink(missing_ok=True)
+
+
+def stream_write_data(out, csv_path: Path, spool_dir=None):
+    """
+    Constant-memory version of write_data (same output, byte for byte).
+
+    Artist INSERTs are written to a temporary spool file as rows arrive;
+    dedup by artist_id goes through SeenArtistIds (on disk). Genres are
+    collected in the small genres dict - its size is the number of distinct
+    genres, not artists. At the end the genre INSERTs are written first (so
+    the foreign keys are satisfied on replay) and the spool is copied after.
+    """
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    genres = {}  # key: normalized genre name (lowercase); value: (genre_id, display_name)
+    next_genre_id = 1
+    seen = SeenArtistIds(spool_dir)
+
+    try:
+        with tempfile.TemporaryFile("w+", encoding="utf-8", dir=spool_dir) as spool:
+            with csv_path.open("r", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    artist_id = (row.get("artist_id") or "").strip()
+                    artist_name = (row.get("artist_name") or "").strip()
+                    genres_str = (row.get("artist_genre") or "").strip()
+
+                    if not artist_id or not artist_name:
+                        continue
+                    if not seen.add(artist_id):
+                        continue
+
+                    first_genre = None
+                    if genres_str:
+                        first_genre = genres_str.split(",")[0].strip() or None
+
+                    genre_id = None
+                    if first_genre:
+                        key = first_genre.lower()
+                        if key not in genres:
+                            genres[key] = (next_genre_id, first_genre)
+                            next_genre_id += 1
+                        genre_id = genres[key][0]
+
+                    spool.write(
+                        artist_insert_sql(
+                            {
+                                "artist_id": artist_id,
+                                "artist_name": artist_name,
+                                "artist_img": (row.get("artist_img") or "").strip(),
+                                "country": (row.get("country") or "").strip(),
+                                "genre_id": genre_id,
+                            }
+                        )
+                    )
+
+            out.write("-- Data for genres and artists loaded from CSV\n")
+            out.write("START TRANSACTION;\n\n")
+
+            for gid, gname in sorted_genres(genres):
+                out.write(genre_insert_sql(gid, gname))
+            out.write("\n")
+
+            spool.seek(0)
+            shutil.copyfileobj(spool, out)
+
+            out.write("\nCOMMIT;\n")
+    finally:
+        seen.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the music tracker schema + data SQL dump.")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="input CSV path")
+    parser.add_argument("--out", type=Path, default=SQL_OUTPUT_PATH, help="output SQL path")
+    parser.add_argument("--workers", type=int, default=0, help="parse the CSV in this many processes")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="insert", help="output dialect")
+    parser.add_argument(
+        "--rows-per-statement",
+        type=int,
+        default=ROWS_PER_STATEMENT,
+        help="rows per INSERT for --format multirow",
+    )
+    parser.add_argument(
+        "--tsv-dir",
+        type=Path,
+        default=None,
+        help="where --format mysql-tsv writes its side files (default: next to --out)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="constant-memory mode: spool artist rows to disk instead of building lists",
+    )
+    return parser.parse_args()
+
+
 def main():
-    with SQL_OUTPUT_PATH.open("w", encoding="utf-8") as out:
+    args = parse_args()
+    if args.stream and args.format != "insert":
+        raise SystemExit("--stream only supports --format insert")
+
+    with args.out.open("w", encoding="utf-8") as out:
         write_schema(out)
-        write_data(out, CSV_PATH)
+        if args.stream:
+            stream_write_data(out, args.csv)
+        else:
+            write_data(
+                out,
+                args.csv,
+                workers=args.workers,
+                fmt=args.format,
+                rows_per_statement=args.rows_per_statement,
+                tsv_dir=args.tsv_dir or args.out.parent,
+            )
 
-    print(f"✅ Wrote schema + data to {SQL_OUTPUT_PATH}")
+    print(f"✅ Wrote schema + data to {args.out}")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,25 @@
 import sqlite3
 import csv
+import argparse
+import time
+from itertools import islice
 from pathlib import Path
 
+from db_connection import connect
+
 # Change these if you want different filenames/paths
 CSV_PATH = Path("Global Music Artists.csv")
 DB_PATH = Path("music_artists.db")
 
+# Bulk-load tuning (used by bulk_load_csv_into_db)
+BULK_BATCH_SIZE = 5000
+BULK_PRAGMAS = {
+    "journal_mode": "MEMORY",   # no rollback journal on disk while loading
+    "synchronous": "OFF",       # don't fsync every commit
+    "cache_size": -200000,      # ~200 MB page cache (negative = KiB)
+    "temp_store": "MEMORY",     # temp tables / sorts stay in RAM
+}
+
 
 def create_schema(conn: sqlite3.Connection) -> None:
     """
@@ -99,20 +113,232 @@ def load_csv_into_db(conn: sqlite3.Connection, csv_path: Path) -> None:
     conn.commit()
 
 
+def parse_row(row: dict):
+    """
+    Clean up one CSV row.
+    Returns (artist_id, artist_name, artist_img, country, genres) or None
+    if the row has no ID or no name. genres is a list of stripped,
+    non-empty genre strings in CSV order.
+    """
+    artist_id = (row.get("artist_id") or "").strip()
+    artist_name = (row.get("artist_name") or "").strip()
+    artist_img = (row.get("artist_img") or "").strip()
+    country = (row.get("country") or "").strip()
+    genres_str = (row.get("artist_genre") or "").strip()
+
+    if not artist_id or not artist_name:
+        return None
+
+    genres = []
+    if genres_str:
+        for raw_genre in genres_str.split(","):
+            genre = raw_genre.strip()
+            if genre:
+                genres.append(genre)
+
+    return artist_id, artist_name, artist_img, country, genres
+
+
+def apply_bulk_pragmas(conn: sqlite3.Connection, pragmas: dict = None) -> None:
+    """
+    Apply the bulk-load PRAGMAs (must run outside a transaction).
+
+    A database already in WAL mode keeps it: unlike the other settings,
+    journal_mode is stored in the file, and switching it to MEMORY would
+    take the shared database out of WAL for the server and every script.
+    """
+    wal = conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+    for name, value in (pragmas or BULK_PRAGMAS).items():
+        if name == "journal_mode" and wal:
+            continue
+        conn.execute(f"PRAGMA {name} = {value};")
+
+
+def bulk_load_csv_into_db(
+    conn: sqlite3.Connection,
+    csv_path: Path,
+    batch_size: int = BULK_BATCH_SIZE,
+    defer_genre_index: bool = True,
+) -> int:
+    """
+    Bulk version of load_csv_into_db.
+
+    Streams rows from csv.DictReader in batches of batch_size and inserts
+    them with executemany, all inside ONE explicit transaction with the
+    BULK_PRAGMAS applied.
+
+    If defer_genre_index is True, genre rows first go into an unindexed
+    TEMP staging table and are copied into artist_genres in primary-key
+    order once the CSV has been read, so the (artist_id, genre) index is
+    built with sequential appends instead of random B-tree inserts.
+
+    Returns the number of CSV rows processed and prints rows/sec.
+    """
+    apply_bulk_pragmas(conn)
+    cur = conn.cursor()
+
+    genre_table = "artist_genres"
+    if defer_genre_index:
+        cur.execute("DROP TABLE IF EXISTS temp.artist_genres_stage;")
+        cur.execute(
+            "CREATE TEMP TABLE artist_genres_stage (artist_id TEXT NOT NULL, genre TEXT NOT NULL);"
+        )
+        genre_table = "temp.artist_genres_stage"
+
+    artist_sql = """
+        INSERT OR IGNORE INTO artists (artist_id, artist_name, artist_img, country)
+        VALUES (?, ?, ?, ?);
+    """
+    genre_sql = f"INSERT OR IGNORE INTO {genre_table} (artist_id, genre) VALUES (?, ?);"
+
+    total_rows = 0
+    start = time.perf_counter()
+
+    cur.execute("BEGIN;")
+    try:
+        with csv_path.open("r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+
+            while True:
+                batch = list(islice(reader, batch_size))
+                if not batch:
+                    break
+                total_rows += len(batch)
+
+                artist_rows = []
+                genre_rows = []
+                for row in batch:
+                    parsed = parse_row(row)
+                    if parsed is None:
+                        continue
+                    artist_id, artist_name, artist_img, country, genres = parsed
+                    artist_rows.append((artist_id, artist_name, artist_img, country))
+                    genre_rows.extend((artist_id, genre) for genre in genres)
+
+                cur.executemany(artist_sql, artist_rows)
+                cur.executemany(genre_sql, genre_rows)
+
+        if defer_genre_index:
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO artist_genres (artist_id, genre)
+                SELECT artist_id, genre
+                FROM temp.artist_genres_stage
+                ORDER BY artist_id, genre;
+                """
+            )
+            cur.execute("DROP TABLE temp.artist_genres_stage;")
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else float("inf")
+    print(f"Loaded {total_rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return total_rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load the Global Music Artists CSV into SQLite.")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="input CSV path")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--bulk", action="store_true", help="use the batched executemany loader")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="rows per executemany batch")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only apply new/changed rows (see incremental_import.py)",
+    )
+    parser.add_argument("--prune", action="store_true", help="with --incremental, delete artists gone from the CSV")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="parse the CSV in this many processes (see parallel_csv_ingest.py)",
+    )
+    parser.add_argument(
+        "--no-defer-index",
+        action="store_true",
+        help="insert genres straight into artist_genres instead of staging them",
+    )
+    parser.add_argument(
+        "--fts",
+        choices=("trigram", "prefix"),
+        default=None,
+        help="also build/maintain the artists_fts search index (see artist_fts.py)",
+    )
+    return parser.parse_args()
+
+
 def main() -> None:
-    if not CSV_PATH.exists():
-        raise FileNotFoundError(f"CSV file not found: {CSV_PATH}")
+    args = parse_args()
+    csv_path, db_path = args.csv, args.db
 
-    # Connect (this will create the DB file if it doesn't exist)
-    conn = sqlite3.connect(DB_PATH)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    # Connect (this will create the DB file if it doesn't exist); WAL and a
+    # busy timeout, so the import can run while the server has the file open
+    conn = connect(db_path, checkpoints=True)
 
     try:
         create_schema(conn)
-        load_csv_into_db(conn, CSV_PATH)
+        if args.incremental:
+            from incremental_import import incremental_load_csv_into_db, print_summary
+
+            counts = incremental_load_csv_into_db(conn, csv_path, prune=args.prune)
+            print_summary(counts, "Incremental import")
+        elif args.workers:
+            from parallel_csv_ingest import parallel_load_csv_into_db
+
+            parallel_load_csv_into_db(conn, csv_path, workers=args.workers)
+        elif args.bulk:
+            bulk_load_csv_into_db(
+                conn,
+                csv_path,
+                batch_size=args.batch_size,
+                defer_genre_index=not args.no_defer_index,
+            )
+        else:
+            start = time.perf_counter()
+            load_csv_into_db(conn, csv_path)
+            print(f"Loaded in {time.perf_counter() - start:.2f}s")
+
+        from search_keys import fill_search_keys
+
+        # Normalized name/genre keys for rows that don't have one yet
+        start = time.perf_counter()
+        keyed, genre_rows = fill_search_keys(conn)
+        if keyed or genre_rows:
+            print(f"Computed search keys for {keyed} artists, {genre_rows} genre rows in {time.perf_counter() - start:.2f}s")
+
+        from artist_summary import build_artist_summary
+
+        # Materialized artists + genre list (only changed artists after the first build)
+        start = time.perf_counter()
+        summarized = build_artist_summary(conn)
+        if summarized:
+            print(f"Updated artist_summary for {summarized} artists in {time.perf_counter() - start:.2f}s")
+
+        from lookup_cache import build_lookup_tables
+
+        # Genre/country dropdown lists; their version only moves if the lists changed
+        for name, version in build_lookup_tables(conn).items():
+            print(f"Lookup list '{name}' changed (version {version})")
+
+        if args.fts:
+            from artist_fts import build_artist_fts
+
+            # Built once after the load; from then on triggers keep it in sync
+            start = time.perf_counter()
+            if build_artist_fts(conn, args.fts):
+                print(f"Built artists_fts ({args.fts}) in {time.perf_counter() - start:.2f}s")
     finally:
         conn.close()
 
-    print(f"✅ Done! Loaded data from '{CSV_PATH}' into SQLite DB '{DB_PATH}'.")
+    print(f"✅ Done! Loaded data from '{csv_path}' into SQLite DB '{db_path}'.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+import time
+import argparse
+
+# Shared way for the scripts to open music_artists.db next to the running
+# Node server.
+#
+# connect() switches the file to WAL (persistent, so the server gets it
+# too): readers no longer wait for a script's write transaction, and a
+# writer waits up to busy_timeout instead of failing with "database is
+# locked". synchronous=NORMAL is durable enough in WAL mode and avoids an
+# fsync per commit.
+#
+# In WAL mode the log is only copied back into the database by
+# checkpoints. SQLite's automatic checkpoint runs on the committing
+# connection and gives up whenever a reader is active, so during long jobs
+# the -wal file can keep growing. connect(..., checkpoints=True) starts a
+# CheckpointManager thread (stopped by conn.close()) that watches the WAL
+# size and runs
+#
+#   PASSIVE   above CHECKPOINT_PASSIVE_BYTES  (never blocks anyone)
+#   TRUNCATE  above CHECKPOINT_TRUNCATE_BYTES (waits briefly for readers,
+#             then resets the -wal file to zero bytes)
+
+DB_PATH = "music_artists.db"
+BUSY_TIMEOUT_MS = 5000
+CHECKPOINT_INTERVAL_SECONDS = 2.0
+CHECKPOINT_PASSIVE_BYTES = 4 * 1024 * 1024
+CHECKPOINT_TRUNCATE_BYTES = 64 * 1024 * 1024
+CHECKPOINT_BUSY_TIMEOUT_MS = 200    # TRUNCATE holds the write lock while it waits
+
+
+def wal_size(db_path):
+    """Size of db_path's -wal file in bytes (0 if there is none)."""
+    try:
+        return os.path.getsize(f"{db_path}-wal")
+    except OSError:
+        return 0
+
+
+def enable_wal(conn):
+    """Switch to WAL; returns the resulting journal mode (unchanged if the file is busy)."""
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    except sqlite3.OperationalError as e:
+        print(f"⚠️  Could not switch to WAL ({e}); continuing in the current journal mode")
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+
+def checkpoint(conn, mode="PASSIVE"):
+    """PRAGMA wal_checkpoint(mode) -> (busy, wal_frames, checkpointed_frames)."""
+    return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+
+class CheckpointManager(threading.Thread):
+    """Background thread checkpointing db_path's WAL by size, on its own connection."""
+
+    def __init__(self, db_path, interval=CHECKPOINT_INTERVAL_SECONDS,
+                 passive_bytes=CHECKPOINT_PASSIVE_BYTES, truncate_bytes=CHECKPOINT_TRUNCATE_BYTES):
+        super().__init__(name="wal-checkpoint", daemon=True)
+        self.db_path = str(db_path)
+        self.interval = interval
+        self.passive_bytes = passive_bytes
+        self.truncate_bytes = truncate_bytes
+        self.stats = {"passive": 0, "truncate": 0, "busy": 0, "max_wal_bytes": 0}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {CHECKPOINT_BUSY_TIMEOUT_MS}")
+        try:
+            while not self._stop_event.wait(self.interval):
+                self.check(conn)
+        finally:
+            conn.close()
+
+    def check(self, conn):
+        size = wal_size(self.db_path)
+        self.stats["max_wal_bytes"] = max(self.stats["max_wal_bytes"], size)
+        if size >= self.truncate_bytes:
+            mode = "TRUNCATE"
+        elif size >= self.passive_bytes:
+            mode = "PASSIVE"
+        else:
+            return None
+        try:
+            busy, frames, done = checkpoint(conn, mode)
+        except sqlite3.OperationalError:
+            busy, frames, done = 1, -1, -1
+        self.stats[mode.lower()] += 1
+        if busy:
+            self.stats["busy"] += 1
+        return mode, busy, frames, done
+
+    def stop(self, final_mode="TRUNCATE"):
+        """Stop the thread and run one last checkpoint (None to skip it)."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        if final_mode:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute(f"PRAGMA busy_timeout = {CHECKPOINT_BUSY_TIMEOUT_MS}")
+                checkpoint(conn, final_mode)
+            except sqlite3.OperationalError:
+                pass
+            finally:
+                conn.close()
+
+
+class Connection(sqlite3.Connection):
+    """sqlite3.Connection that stops its CheckpointManager on close()."""
+
+    checkpoint_manager = None
+
+    def close(self):
+        manager, self.checkpoint_manager = self.checkpoint_manager, None
+        super().close()
+        if manager:
+            manager.stop()
+
+
+def connect(db_path=DB_PATH, wal=True, busy_timeout_ms=BUSY_TIMEOUT_MS, checkpoints=False, **kwargs):
+    """
+    Open db_path for a script: WAL (unless wal=False or an in-memory DB),
+    busy_timeout and, with checkpoints=True, a background CheckpointManager
+    (pass a dict to override its settings). Extra kwargs go to
+    sqlite3.connect.
+    """
+    conn = sqlite3.connect(db_path, factory=Connection, **kwargs)
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    if wal and str(db_path) != ":memory:" and enable_wal(conn) == "wal":
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if checkpoints:
+            options = checkpoints if isinstance(checkpoints, dict) else {}
+            conn.checkpoint_manager = CheckpointManager(db_path, **options)
+            conn.checkpoint_manager.start()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or change the journal mode and checkpoint the WAL.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--checkpoint", choices=["PASSIVE", "FULL", "RESTART", "TRUNCATE"],
+                        help="run one checkpoint now")
+    parser.add_argument("--rollback-journal", action="store_true",
+                        help="switch back to the default rollback journal (DELETE)")
+    args = parser.parse_args()
+
+    conn = connect(args.db, wal=not args.rollback_journal)
+    try:
+        if args.rollback_journal:
+            conn.execute("PRAGMA journal_mode = DELETE")
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        print(f"✓ journal_mode = {mode}, WAL file {wal_size(args.db):,} bytes")
+        if args.checkpoint and mode == "wal":
+            start = time.perf_counter()
+            busy, frames, done = checkpoint(conn, args.checkpoint)
+            print(f"✓ {args.checkpoint} checkpoint: {done}/{frames} frames"
+                  f"{' (busy)' if busy else ''} in {time.perf_counter() - start:.2f}s, "
+                  f"WAL file now {wal_size(args.db):,} bytes")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+import csv
+import math
+import random
+import sqlite3
+import time
+import argparse
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from populate_fake_users import (
+    FIRST_NAMES,
+    LAST_NAMES,
+    NICKNAMES,
+    VENUES,
+    CITIES,
+    generate_random_date,
+    HAS_BCRYPT,
+)
+from bulk_import_users import hash_password
+from csv_to_sql_artists import BULK_PRAGMAS, create_schema, apply_bulk_pragmas
+from db_connection import connect
+from csv_to_music_tracker_sql import sql_escape
+
+# Synthetic load data for capacity planning: users, user_profiles and
+# user_artist_tracking at arbitrary scale, written to a pre-built SQLite
+# file, a directory of CSV files or a multi-row INSERT SQL dump.
+
+DB_PATH = "music_artists.db"
+BATCH_SIZE = 10000  # users per generation batch / executemany call
+
+# Password stored for every generated user when bcrypt isn't installed
+# (not a valid bcrypt hash, so these accounts simply can't log in)
+NO_LOGIN_PASSWORD = "!synthetic-user"
+
+# Countries / genres cycled through for --synthetic-artists rows
+SYNTHETIC_COUNTRIES = ("United States", "United Kingdom", "Canada", "Germany", "France", "Japan", "Brazil", "Australia")
+SYNTHETIC_GENRES = ("rock", "pop", "hip hop", "indie rock", "jazz", "electronic", "country", "metal", "folk", "r&b")
+
+# Schema of the app tables the server uses (artists/artist_genres come from
+# csv_to_sql_artists.create_schema)
+APP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    email      TEXT UNIQUE NOT NULL,
+    password   TEXT NOT NULL,
+    first_name TEXT,
+    last_name  TEXT,
+    nickname   TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_login DATETIME
+);
+CREATE TABLE IF NOT EXISTS user_profiles (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id           INTEGER UNIQUE NOT NULL,
+    profile_image_url TEXT,
+    city              TEXT,
+    state             TEXT,
+    country           TEXT,
+    bio               TEXT,
+    favorite_genres   TEXT,
+    concerts_attended INTEGER DEFAULT 0,
+    updated_at        DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+CREATE TABLE IF NOT EXISTS user_sessions (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id       INTEGER NOT NULL,
+    session_token TEXT UNIQUE NOT NULL,
+    created_at    DATETIME DEFAULT CURRENT_TIMESTAMP,
+    expires_at    DATETIME NOT NULL,
+    is_online     INTEGER DEFAULT 1,
+    last_activity DATETIME,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+CREATE TABLE IF NOT EXISTS user_artist_tracking (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id       INTEGER NOT NULL,
+    artist_id     TEXT NOT NULL,
+    date_seen     DATE,
+    venue         TEXT,
+    city          TEXT,
+    notes         TEXT,
+    rating        INTEGER,
+    event_country TEXT,
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    FOREIGN KEY (artist_id) REFERENCES artists(artist_id)
+);
+"""
+
+USER_COLUMNS = ("id", "email", "password", "first_name", "last_name", "nickname", "created_at")
+PROFILE_COLUMNS = ("user_id", "city", "state", "country", "concerts_attended")
+TRACKING_COLUMNS = ("user_id", "artist_id", "date_seen", "venue", "city", "notes", "rating", "event_country")
+
+
+def shared_password_hash(password="password123"):
+    """
+    One hash reused for every generated user (like populate_fake_users), so
+    generating millions of users doesn't cost millions of bcrypt rounds.
+    """
+    if not HAS_BCRYPT:
+        return NO_LOGIN_PASSWORD
+    return hash_password(password)
+
+
+class ZipfArtists:
+    """
+    Artist picker with Zipf popularity: the artist at popularity rank r
+    (a seeded shuffle of the artist list) is picked with weight 1 / r ** s.
+    """
+
+    def __init__(self, artist_ids, s=1.1, rng=random):
+        self.artist_ids = list(artist_ids)
+        rng.shuffle(self.artist_ids)
+        self.cum_weights = list(accumulate(1.0 / (rank ** s) for rank in range(1, len(self.artist_ids) + 1)))
+        self.total = self.cum_weights[-1] if self.cum_weights else 0.0
+        self.rng = rng
+
+    def pick(self):
+        i = bisect_right(self.cum_weights, self.rng.random() * self.total)
+        return self.artist_ids[min(i, len(self.artist_ids) - 1)]
+
+
+def concert_count(rng, mean, distribution):
+    """Number of concerts for one user."""
+    if distribution == "fixed":
+        return int(mean)
+    if distribution == "geometric":
+        # Heavy-ish tail: most users see a few shows, some see many
+        p = 1.0 / (mean + 1)
+        count = 0
+        while rng.random() > p:
+            count += 1
+        return count
+    if distribution == "poisson":
+        # Knuth's method is fine for the small means used here
+        limit, k, prod = math.exp(-mean), 0, rng.random()
+        while prod > limit:
+            k += 1
+            prod *= rng.random()
+        return k
+    raise ValueError(f"Unknown concert distribution: {distribution}")
+
+
+def skewed_date(rng, now, days_back, skew):
+    """
+    Date in the last days_back days; skew > 1 pushes dates towards the
+    present, skew == 1 is uniform (same as generate_random_date).
+    """
+    if skew == 1.0:
+        return generate_random_date(days_back, rng=rng, now=now)
+    days_ago = 1 + int((days_back - 1) * (rng.random() ** skew))
+    return now - timedelta(days=days_ago)
+
+
+def generate_batches(
+    artist_ids,
+    num_users,
+    concerts_mean=5.0,
+    concerts_distribution="geometric",
+    zipf_s=1.1,
+    days_back=730,
+    date_skew=1.0,
+    seed=42,
+    now=None,
+    first_user_id=1,
+    batch_size=BATCH_SIZE,
+):
+    """
+    Yield (users, profiles, tracking) row batches for num_users users.
+    Fully deterministic for a given seed and now.
+    """
+    rng = random.Random(seed)
+    password_hash = shared_password_hash()
+    now = now or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    artists = ZipfArtists(artist_ids, zipf_s, rng)
+
+    for batch_start in range(0, num_users, batch_size):
+        users, profiles, tracking = [], [], []
+        for offset in range(batch_start, min(batch_start + batch_size, num_users)):
+            user_id = first_user_id + offset
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            nickname = f"{rng.choice(NICKNAMES)}{rng.randint(1, 99)}"
+            email = f"{first_name.lower()}.{last_name.lower()}{user_id}@example.com"
+            created_at = skewed_date(rng, now, days_back, date_skew).strftime("%Y-%m-%d %H:%M:%S")
+            users.append((user_id, email, password_hash, first_name, last_name, nickname, created_at))
+
+            home_city, home_state = rng.choice(CITIES).split(", ")
+            concerts = concert_count(rng, concerts_mean, concerts_distribution) if artists.artist_ids else 0
+            profiles.append((user_id, home_city, home_state, "United States", concerts))
+
+            for _ in range(concerts):
+                artist_id = artists.pick()
+                date_seen = skewed_date(rng, now, days_back, date_skew)
+                venue = rng.choice(VENUES)
+                city = rng.choice(CITIES)
+                notes = None if rng.random() < 0.8 else f"Great energy at {venue}"
+                tracking.append(
+                    (
+                        user_id,
+                        artist_id,
+                        date_seen.strftime("%Y-%m-%d"),
+                        venue,
+                        city,
+                        notes,
+                        rng.randint(1, 10),
+                        "United States",
+                    )
+                )
+        yield users, profiles, tracking
+
+
+def synthetic_artist_rows(artist_ids):
+    """artists / artist_genres rows for synthetic IDs (one or two genres each)."""
+    artists, genres = [], []
+    for i, artist_id in enumerate(artist_ids):
+        artists.append((artist_id, f"Synthetic Artist {i}", None, SYNTHETIC_COUNTRIES[i % len(SYNTHETIC_COUNTRIES)]))
+        genres.append((artist_id, SYNTHETIC_GENRES[i % len(SYNTHETIC_GENRES)]))
+        if i % 3 == 0:
+            genres.append((artist_id, SYNTHETIC_GENRES[(i // 3) % len(SYNTHETIC_GENRES)]))
+    return artists, genres
+
+
+class SQLiteSink:
+    """
+    Write batches into a (new or existing) SQLite database file. Artists are
+    copied from source_db, or created for synthetic_artist_ids, so the
+    tracking rows satisfy their foreign key. New users are numbered after
+    the ones already in the file (first_user_id).
+    """
+
+    def __init__(self, path, source_db=None, synthetic_artist_ids=None):
+        fresh = not Path(path).exists() or Path(path).stat().st_size == 0
+        self.conn = connect(path, checkpoints=True)
+        create_schema(self.conn)
+        self.conn.executescript(APP_SCHEMA)
+        self.first_user_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users").fetchone()[0]
+        if synthetic_artist_ids:
+            artists, genres = synthetic_artist_rows(synthetic_artist_ids)
+            self.conn.executemany("INSERT OR IGNORE INTO artists (artist_id, artist_name, artist_img, country) VALUES (?, ?, ?, ?)", artists)
+            self.conn.executemany("INSERT OR IGNORE INTO artist_genres (artist_id, genre) VALUES (?, ?)", genres)
+            self.conn.commit()
+        if source_db and Path(source_db).resolve() != Path(path).resolve():
+            self.conn.execute("ATTACH DATABASE ? AS src", (str(source_db),))
+            # Explicit columns: the source may have extra ones (e.g. name_key
+            # from search_keys.py) that this fresh schema doesn't
+            self.conn.execute(
+                """
+                INSERT OR IGNORE INTO artists (artist_id, artist_name, artist_img, country)
+                SELECT artist_id, artist_name, artist_img, country FROM src.artists
+                """
+            )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO artist_genres (artist_id, genre) SELECT artist_id, genre FROM src.artist_genres"
+            )
+            self.conn.commit()
+            self.conn.execute("DETACH DATABASE src")
+        # synchronous=OFF only for a file we just created: a crash can't
+        # corrupt data anyone else relies on
+        apply_bulk_pragmas(
+            self.conn,
+            BULK_PRAGMAS if fresh else {k: v for k, v in BULK_PRAGMAS.items() if k != "synchronous"},
+        )
+        self.conn.execute("BEGIN")
+
+    def write(self, table, columns, rows):
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class CSVSink:
+    """Write one CSV file per table into a directory."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.files = {}
+
+    def write(self, table, columns, rows):
+        if table not in self.files:
+            f = (self.directory / f"{table}.csv").open("w", encoding="utf-8", newline="")
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            self.files[table] = (f, writer)
+        self.files[table][1].writerows(rows)
+
+    def close(self):
+        for f, _ in self.files.values():
+            f.close()
+
+
+def sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return f"'{sql_escape(str(value))}'"
+
+
+class SQLSink:
+    """Write a multi-row INSERT dump (one INSERT per table per batch)."""
+
+    def __init__(self, path):
+        self.out = Path(path).open("w", encoding="utf-8")
+        self.out.write("-- Synthetic load data (generate_load_data.py)\n")
+        self.out.write("BEGIN TRANSACTION;\n\n")
+
+    def write(self, table, columns, rows):
+        if not rows:
+            return
+        values = ",\n  ".join("(" + ", ".join(sql_literal(v) for v in row) + ")" for row in rows)
+        self.out.write(f"INSERT INTO {table} ({', '.join(columns)})\nVALUES\n  {values};\n")
+
+    def close(self):
+        self.out.write("\nCOMMIT;\n")
+        self.out.close()
+
+
+def load_artist_ids(db_path, synthetic_artists=0):
+    """Artist IDs from the artists table, or synthetic IDs if asked to."""
+    if synthetic_artists:
+        return [f"synthetic{i:07d}" for i in range(synthetic_artists)]
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT artist_id FROM artists ORDER BY artist_id")]
+    finally:
+        conn.close()
+
+
+def generate(sink, artist_ids, num_users, **options):
+    """Drive generate_batches into sink; returns (users, tracking rows)."""
+    total_users = 0
+    total_tracking = 0
+    start = time.perf_counter()
+
+    options.setdefault("first_user_id", getattr(sink, "first_user_id", 1))
+    for users, profiles, tracking in generate_batches(artist_ids, num_users, **options):
+        sink.write("users", USER_COLUMNS, users)
+        sink.write("user_profiles", PROFILE_COLUMNS, profiles)
+        sink.write("user_artist_tracking", TRACKING_COLUMNS, tracking)
+        total_users += len(users)
+        total_tracking += len(tracking)
+
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {total_users:,}/{num_users:,} users, {total_tracking:,} tracking rows "
+            f"({(total_users + total_tracking) / elapsed:,.0f} rows/sec)"
+        )
+
+    sink.close()
+    return total_users, total_tracking
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic users + concert history at scale.")
+    parser.add_argument("--users", type=int, default=1000, help="number of users")
+    parser.add_argument("--concerts-mean", type=float, default=5.0, help="mean concerts per user")
+    parser.add_argument(
+        "--concerts-distribution",
+        choices=("fixed", "geometric", "poisson"),
+        default="geometric",
+        help="per-user concert count distribution",
+    )
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for artist popularity")
+    parser.add_argument("--days-back", type=int, default=730, help="date range for concerts and signups")
+    parser.add_argument("--date-skew", type=float, default=1.0, help=">1 skews dates towards the present")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (output is deterministic)")
+    parser.add_argument("--end-date", default=None, help="YYYY-MM-DD treated as 'now' (default: today)")
+    parser.add_argument("--format", choices=("sqlite", "csv", "sql"), default="sqlite", help="output type")
+    parser.add_argument("--out", default="load_test.db", help="output .db file, CSV directory or .sql file")
+    parser.add_argument("--artists-db", default=DB_PATH, help="database to read artist IDs from")
+    parser.add_argument(
+        "--synthetic-artists",
+        type=int,
+        default=0,
+        help="use this many synthetic artist IDs instead of --artists-db",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="users per batch")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    now = datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else None
+
+    print("=" * 60)
+    print(f"Generating {args.users:,} users ({args.format} -> {args.out})")
+    print("=" * 60)
+
+    artist_ids = load_artist_ids(args.artists_db, args.synthetic_artists)
+    print(f"Using {len(artist_ids):,} artists")
+
+    if args.format == "sqlite":
+        if args.synthetic_artists:
+            sink = SQLiteSink(args.out, synthetic_artist_ids=artist_ids)
+        else:
+            sink = SQLiteSink(args.out, args.artists_db)
+    elif args.format == "csv":
+        sink = CSVSink(args.out)
+    else:
+        sink = SQLSink(args.out)
+
+    users, tracking = generate(
+        sink,
+        artist_ids,
+        args.users,
+        concerts_mean=args.concerts_mean,
+        concerts_distribution=args.concerts_distribution,
+        zipf_s=args.zipf,
+        days_back=args.days_back,
+        date_skew=args.date_skew,
+        seed=args.seed,
+        now=now,
+        batch_size=args.batch_size,
+    )
+
+    print()
+    print("=" * 60)
+    print("Summary:")
+    print(f"  Users: {users:,}")
+    print(f"  Tracking rows: {tracking:,}")
+    print(f"  Average concerts per user: {tracking / users if users else 0:.1f}")
+    print("=" * 60)
+    print()
+    print("✅ Load data generated!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+import json
+import os
+import shutil
+import sys
+import time
+import zlib
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date
+from itertools import compress
+from pathlib import Path
+
+from db_connection import connect
+
+# Column-oriented export of the joined concert history for reporting, so
+# dashboard-style aggregates read compressed column files instead of
+# scanning user_artist_tracking in the live database.
+#
+#   history/
+#     manifest.json            columns, partitions, last exported tracking id
+#     2025-01.g3/              one directory per month (g = generation)
+#       user_id.z              zlib-compressed array() bytes, one per column
+#       country.z              dictionary codes ...
+#       country.dict.json      ... and the partition's dictionary
+#       genres.z / genres.offsets.z / genres.dict.json   (list column)
+#
+# Rows in a partition are sorted by (user_id, day), so a per-user query is
+# a bisect instead of a scan. Appends only read tracking rows with an id
+# above the manifest's high-water mark; a month that receives rows is
+# rewritten as a new generation and the manifest swapped atomically, so a
+# reader holding the old manifest still sees complete files.
+#
+# Updates/deletes of already-exported rows are not picked up by an append;
+# `--full` re-exports everything (the exporter warns when row counts drift).
+
+DB_PATH = "music_artists.db"
+EXPORT_DIR = "history"
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+UNDATED = "undated"
+COMPRESS_LEVEL = 6
+
+# (name, typecode) of the plain numeric columns
+NUMERIC_COLUMNS = [
+    ("tracking_id", "q"),
+    ("user_id", "q"),
+    ("day", "i"),       # date.toordinal(); 0 when date_seen is missing
+    ("rating", "B"),    # 1-10; 0 when not rated
+]
+DICT_COLUMNS = ["artist_id", "artist_name", "country", "city", "venue"]
+LIST_COLUMNS = ["genres"]
+
+EXPORT_QUERY = """
+    SELECT uat.id, uat.user_id, uat.date_seen, uat.rating, uat.artist_id,
+           a.artist_name, COALESCE(uat.event_country, a.country), uat.city, uat.venue,
+           (SELECT group_concat(genre, char(31)) FROM artist_genres g WHERE g.artist_id = uat.artist_id)
+    FROM user_artist_tracking uat
+    LEFT JOIN artists a ON a.artist_id = uat.artist_id
+    WHERE uat.id > ?
+    ORDER BY uat.id
+"""
+
+
+def code_typecode(size):
+    """Narrowest unsigned array typecode for dictionary codes 0..size-1."""
+    if size <= 1 << 8:
+        return "B"
+    if size <= 1 << 16:
+        return "H"
+    return "I"
+
+
+def month_of(date_seen):
+    """('YYYY-MM', day ordinal) for a date_seen value; UNDATED if unparseable."""
+    try:
+        day = date.fromisoformat(str(date_seen)[:10])
+    except ValueError:
+        return UNDATED, 0
+    return day.strftime("%Y-%m"), day.toordinal()
+
+
+# --- writing ---------------------------------------------------------------
+
+def _write_array(path, values):
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    path.write_bytes(zlib.compress(values.tobytes(), COMPRESS_LEVEL))
+
+
+def _encode(values):
+    """Dictionary-encode a list of strings (None kept as its own entry)."""
+    dictionary = sorted({v for v in values if v is not None})
+    if any(v is None for v in values):
+        dictionary.append(None)
+    codes_of = {v: i for i, v in enumerate(dictionary)}
+    return dictionary, array(code_typecode(len(dictionary)), (codes_of[v] for v in values))
+
+
+def write_partition(directory, rows):
+    """
+    Write rows (dicts with every column; genres a list) to directory as
+    column files. Rows are sorted by (user_id, day, tracking_id) first.
+    """
+    rows.sort(key=lambda r: (r["user_id"], r["day"], r["tracking_id"]))
+    directory.mkdir(parents=True)
+    for name, typecode in NUMERIC_COLUMNS:
+        _write_array(directory / f"{name}.z", array(typecode, (r[name] for r in rows)))
+    for name in DICT_COLUMNS:
+        dictionary, codes = _encode([r[name] for r in rows])
+        (directory / f"{name}.dict.json").write_text(json.dumps(dictionary))
+        _write_array(directory / f"{name}.z", codes)
+    for name in LIST_COLUMNS:
+        flat = [v for r in rows for v in r[name]]
+        offsets = array("I", [0])
+        for r in rows:
+            offsets.append(offsets[-1] + len(r[name]))
+        dictionary, codes = _encode(flat)
+        (directory / f"{name}.dict.json").write_text(json.dumps(dictionary))
+        _write_array(directory / f"{name}.z", codes)
+        _write_array(directory / f"{name}.offsets.z", offsets)
+
+
+def load_manifest(export_dir):
+    path = Path(export_dir) / MANIFEST
+    if not path.exists():
+        return {"version": FORMAT_VERSION, "last_tracking_id": 0, "partitions": {}}
+    manifest = json.loads(path.read_text())
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported export format {manifest.get('version')}")
+    return manifest
+
+
+def _save_manifest(export_dir, manifest):
+    tmp = Path(export_dir) / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, Path(export_dir) / MANIFEST)
+
+
+def _fetch_new_rows(conn, after_id):
+    """New tracking rows grouped by month, as row dicts."""
+    months = defaultdict(list)
+    for tid, user_id, date_seen, rating, artist_id, name, country, city, venue, genres in conn.execute(
+        EXPORT_QUERY, (after_id,)
+    ):
+        month, day = month_of(date_seen)
+        months[month].append({
+            "tracking_id": tid,
+            "user_id": user_id,
+            "day": day,
+            "rating": rating if isinstance(rating, int) and 1 <= rating <= 10 else 0,
+            "artist_id": artist_id,
+            "artist_name": name,
+            "country": country,
+            "city": city,
+            "venue": venue,
+            "genres": sorted(genres.split("\x1f")) if genres else [],
+        })
+    return months
+
+
+def export_history(conn, export_dir=EXPORT_DIR, full=False, progress=True):
+    """
+    Append tracking rows newer than the manifest's high-water mark (or
+    re-export everything with full=True). Returns {month: rows added}.
+    """
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    manifest = previous = load_manifest(export_dir)
+    if full:
+        manifest = {"version": FORMAT_VERSION, "last_tracking_id": 0, "partitions": {}}
+
+    # Snapshot so the high-water mark matches exactly the rows read
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        high_water = conn.execute("SELECT COALESCE(MAX(id), 0) FROM user_artist_tracking").fetchone()[0]
+        months = _fetch_new_rows(conn, manifest["last_tracking_id"])
+        exported_before = conn.execute(
+            "SELECT COUNT(*) FROM user_artist_tracking WHERE id <= ?", (manifest["last_tracking_id"],)
+        ).fetchone()[0]
+    finally:
+        conn.rollback()
+
+    previous_rows = sum(p["rows"] for p in manifest["partitions"].values())
+    if not full and exported_before != previous_rows:
+        print(f"⚠️  {previous_rows - exported_before} exported rows have since been deleted; "
+              f"run with --full to re-export")
+
+    added = {}
+    for month in sorted(months):
+        rows = months[month]
+        old = manifest["partitions"].get(month)
+        # Number from the live manifest even on --full, so the directory
+        # written is never one a reader of the current manifest may be using
+        live = previous["partitions"].get(month)
+        generation = live["generation"] + 1 if live else 1
+        if old:
+            rows = read_partition_rows(export_dir / old["dir"]) + rows
+        directory = f"{month}.g{generation}"
+        shutil.rmtree(export_dir / directory, ignore_errors=True)
+        write_partition(export_dir / directory, rows)
+        manifest["partitions"][month] = {"dir": directory, "generation": generation, "rows": len(rows)}
+        added[month] = len(months[month])
+        if progress:
+            print(f"  {month}: +{len(months[month])} rows ({len(rows)} total)")
+
+    manifest["last_tracking_id"] = max(high_water, manifest["last_tracking_id"])
+    manifest["columns"] = {
+        "numeric": dict(NUMERIC_COLUMNS),
+        "dictionary": DICT_COLUMNS,
+        "list": LIST_COLUMNS,
+    }
+    _save_manifest(export_dir, manifest)
+
+    # Old generations (and, after --full, everything not in the manifest)
+    live = {p["dir"] for p in manifest["partitions"].values()}
+    for path in export_dir.iterdir():
+        if path.is_dir() and path.name not in live:
+            shutil.rmtree(path, ignore_errors=True)
+    return added
+
+
+# --- reading ---------------------------------------------------------------
+
+def _read_array(path, typecode):
+    values = array(typecode)
+    values.frombytes(zlib.decompress(path.read_bytes()))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+class Partition:
+    """One month's columns, loaded lazily and cached."""
+
+    def __init__(self, directory, rows):
+        self.directory = Path(directory)
+        self.rows = rows
+        self._columns = {}
+
+    def column(self, name):
+        """A numeric array, or (dictionary, codes) for dictionary/list columns."""
+        if name not in self._columns:
+            numeric = dict(NUMERIC_COLUMNS)
+            if name in numeric:
+                self._columns[name] = _read_array(self.directory / f"{name}.z", numeric[name])
+            else:
+                dictionary = json.loads((self.directory / f"{name}.dict.json").read_text())
+                codes = _read_array(self.directory / f"{name}.z", code_typecode(len(dictionary)))
+                self._columns[name] = (dictionary, codes)
+        return self._columns[name]
+
+    def offsets(self, name):
+        key = f"{name}.offsets"
+        if key not in self._columns:
+            self._columns[key] = _read_array(self.directory / f"{key}.z", "I")
+        return self._columns[key]
+
+
+def read_partition_rows(directory):
+    """Decode a partition back into row dicts (used when appending to a month)."""
+    part = Partition(directory, None)
+    columns = {name: part.column(name) for name, _ in NUMERIC_COLUMNS}
+    decoded = {}
+    for name in DICT_COLUMNS:
+        dictionary, codes = part.column(name)
+        decoded[name] = [dictionary[c] for c in codes]
+    genre_dict, genre_codes = part.column("genres")
+    offsets = part.offsets("genres")
+    rows = []
+    for i in range(len(columns["tracking_id"])):
+        row = {name: columns[name][i] for name, _ in NUMERIC_COLUMNS}
+        for name in DICT_COLUMNS:
+            row[name] = decoded[name][i]
+        row["genres"] = [genre_dict[c] for c in genre_codes[offsets[i]:offsets[i + 1]]]
+        rows.append(row)
+    return rows
+
+
+def _and(mask, other):
+    """AND two 0/1 byte masks (big-int arithmetic, so no per-row Python loop)."""
+    if mask is None:
+        return other
+    n = len(mask)
+    return (int.from_bytes(mask, "little") & int.from_bytes(other, "little")).to_bytes(n, "little")
+
+
+def _code_mask(codes, dictionary, wanted):
+    """0/1 byte mask of rows whose dictionary value is in wanted."""
+    hits = {i for i, v in enumerate(dictionary) if v in wanted}
+    if codes.typecode == "B":
+        table = bytes(1 if i in hits else 0 for i in range(256))
+        return codes.tobytes().translate(table)
+    return bytes(c in hits for c in codes)
+
+
+class HistoryStore:
+    """
+    Query layer over an export directory. Filters match the Dashboard's:
+    ratings, date range, countries, cities, genres (any-of), plus user_id.
+    """
+
+    def __init__(self, export_dir=EXPORT_DIR):
+        self.export_dir = Path(export_dir)
+        self.manifest = load_manifest(self.export_dir)
+        self.partitions = {
+            month: Partition(self.export_dir / info["dir"], info["rows"])
+            for month, info in sorted(self.manifest["partitions"].items())
+        }
+
+    def _months(self, date_from=None, date_to=None):
+        """Partition pruning on the month key."""
+        lo = date_from[:7] if date_from else None
+        hi = date_to[:7] if date_to else None
+        for month, part in self.partitions.items():
+            if month == UNDATED:
+                if not (lo or hi):
+                    yield month, part
+                continue
+            if (lo and month < lo) or (hi and month > hi):
+                continue
+            yield month, part
+
+    def _select(self, part, user_id, ratings, date_from, date_to, countries, cities, genres):
+        """(start, stop, mask) of a partition's matching rows; mask None = all."""
+        start, stop = 0, part.rows
+        if user_id is not None:
+            users = part.column("user_id")
+            start, stop = bisect_left(users, user_id), bisect_right(users, user_id)
+        if start == stop:
+            return start, stop, b""
+
+        mask = None
+        if ratings:
+            table = bytes(1 if i in set(ratings) else 0 for i in range(256))
+            mask = _and(mask, part.column("rating")[start:stop].tobytes().translate(table))
+        if date_from or date_to:
+            lo = date.fromisoformat(date_from).toordinal() if date_from else 1
+            hi = date.fromisoformat(date_to).toordinal() if date_to else date.max.toordinal()
+            mask = _and(mask, bytes(lo <= d <= hi for d in part.column("day")[start:stop]))
+        for name, wanted in (("country", countries), ("city", cities)):
+            if wanted:
+                dictionary, codes = part.column(name)
+                mask = _and(mask, _code_mask(codes[start:stop], dictionary, set(wanted)))
+        if genres:
+            dictionary, codes = part.column("genres")
+            offsets = part.offsets("genres")
+            hit = bytes(_code_mask(codes, dictionary, set(genres)))
+            mask = _and(mask, bytes(
+                1 in hit[offsets[i]:offsets[i + 1]] for i in range(start, stop)
+            ))
+        return start, stop, mask
+
+    def _take(self, values, start, stop, mask):
+        values = values[start:stop]
+        return values if mask is None else compress(values, mask)
+
+    def stats(self, user_id=None, ratings=None, date_from=None, date_to=None,
+              countries=None, cities=None, genres=None):
+        """
+        Dashboard aggregates for the filtered rows: row count, average
+        rating, and counts by rating, month, country, city and genre.
+        """
+        by_rating, by_month = Counter(), Counter()
+        by_country, by_city, by_genre = Counter(), Counter(), Counter()
+        total = 0
+        for month, part in self._months(date_from, date_to):
+            start, stop, mask = self._select(part, user_id, ratings, date_from, date_to, countries, cities, genres)
+            count = (stop - start) if mask is None else mask.count(1)
+            if not count:
+                continue
+            total += count
+            by_month[month] += count
+            by_rating.update(self._take(part.column("rating"), start, stop, mask))
+            for name, counter in (("country", by_country), ("city", by_city)):
+                dictionary, codes = part.column(name)
+                for code, n in Counter(self._take(codes, start, stop, mask)).items():
+                    counter[dictionary[code]] += n
+            dictionary, codes = part.column("genres")
+            offsets = part.offsets("genres")
+            rows = range(start, stop) if mask is None else compress(range(start, stop), mask)
+            genre_codes = Counter()
+            for i in rows:
+                genre_codes.update(codes[offsets[i]:offsets[i + 1]])
+            for code, n in genre_codes.items():
+                by_genre[dictionary[code]] += n
+
+        rated = sum(n for r, n in by_rating.items() if r)
+        by_rating.pop(0, None)
+        by_country.pop(None, None)
+        by_city.pop(None, None)
+        return {
+            "concerts": total,
+            "average_rating": sum(r * n for r, n in by_rating.items()) / rated if rated else None,
+            "by_rating": dict(sorted(by_rating.items())),
+            "by_month": dict(sorted(by_month.items())),
+            "by_country": dict(by_country.most_common()),
+            "by_city": dict(by_city.most_common()),
+            "by_genre": dict(by_genre.most_common()),
+        }
+
+
+def sql_stats(conn, user_id=None):
+    """The same counts straight from SQLite (row-store scan), for comparison."""
+    where, params = ("WHERE uat.user_id = ?", (user_id,)) if user_id is not None else ("", ())
+    base = f"FROM user_artist_tracking uat LEFT JOIN artists a ON a.artist_id = uat.artist_id {where}"
+    return {
+        "concerts": conn.execute(f"SELECT COUNT(*) {base}", params).fetchone()[0],
+        "by_country": dict(conn.execute(
+            f"SELECT COALESCE(uat.event_country, a.country) c, COUNT(*) {base} GROUP BY c", params
+        ).fetchall()),
+        "by_genre": dict(conn.execute(
+            f"SELECT g.genre, COUNT(*) {base.replace('LEFT JOIN artists', 'JOIN artist_genres g ON g.artist_id = uat.artist_id LEFT JOIN artists')} GROUP BY g.genre",
+            params,
+        ).fetchall()),
+    }
+
+
+def benchmark(conn, store, runs=3):
+    """Whole-history aggregates: columnar export vs SQL over the live DB."""
+    for label, run in (("SQLite", lambda: sql_stats(conn)), ("columnar", lambda: store.stats())):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        print(f"  {label:<9} {min(times) * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export concert history to monthly column files and query them.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--out", default=EXPORT_DIR, help="export directory")
+    parser.add_argument("--full", action="store_true", help="re-export everything instead of appending")
+    parser.add_argument("--stats", action="store_true", help="print aggregates from the export instead")
+    parser.add_argument("--user", type=int, help="with --stats: one user's dashboard")
+    parser.add_argument("--benchmark", action="store_true", help="compare export aggregates with SQL")
+    args = parser.parse_args()
+
+    if args.stats:
+        stats = HistoryStore(args.out).stats(user_id=args.user)
+        print(f"Concerts: {stats['concerts']}  average rating: {stats['average_rating']}")
+        for key in ("by_country", "by_city", "by_genre"):
+            top = list(stats[key].items())[:5]
+            print(f"  {key}: " + ", ".join(f"{k} ({v})" for k, v in top))
+        return
+
+    conn = connect(args.db)
+    try:
+        print("=" * 60)
+        print(f"Exporting concert history to {args.out}/")
+        print("=" * 60)
+        start = time.perf_counter()
+        added = export_history(conn, args.out, full=args.full)
+        size = sum(f.stat().st_size for f in Path(args.out).rglob("*") if f.is_file())
+        print(f"✓ {sum(added.values())} rows in {len(added)} partitions, "
+              f"{time.perf_counter() - start:.2f}s ({size / 1024:.0f} KB on disk)")
+
+        if args.benchmark:
+            benchmark(conn, HistoryStore(args.out))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
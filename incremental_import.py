@@ -0,0 +1,408 @@
+import csv
+import hashlib
+import sqlite3
+import argparse
+from pathlib import Path
+
+from csv_to_sql_artists import CSV_PATH, DB_PATH, create_schema, parse_row
+from csv_to_music_tracker_sql import (
+    SQL_OUTPUT_PATH,
+    sql_escape,
+    write_schema,
+    genre_insert_sql,
+    artist_insert_sql,
+    artist_sql_literals,
+)
+from search_keys import fill_search_keys
+from artist_summary import build_artist_summary
+from lookup_cache import build_lookup_tables
+from db_connection import connect
+
+# Sidecar state for incremental SQL dumps (genre_id numbering + fingerprints)
+DUMP_STATE_PATH = Path("music_tracker_import_state.db")
+
+BATCH_SIZE = 5000
+SQLITE_MAX_VARS = 500  # keep IN (...) lists well under SQLite's variable limit
+
+
+def row_fingerprint(*fields) -> bytes:
+    """8-byte hash of a row's normalized fields (None is hashed as '')."""
+    h = hashlib.blake2b(digest_size=8)
+    for field in fields:
+        h.update((field or "").encode("utf-8"))
+        h.update(b"\x1f")
+    return h.digest()
+
+
+def artist_fingerprint(artist_name, artist_img, country, genres) -> bytes:
+    """Fingerprint for the artists + artist_genres tables (genre set, any order)."""
+    return row_fingerprint(artist_name, artist_img, country, *sorted(set(genres)))
+
+
+def print_summary(counts: dict, title: str) -> None:
+    print()
+    print("=" * 60)
+    print(f"{title}:")
+    print(f"  Inserted:  {counts['inserted']}")
+    print(f"  Updated:   {counts['updated']}")
+    print(f"  Unchanged: {counts['unchanged']}")
+    print(f"  Deleted:   {counts['deleted']}")
+    if counts.get("missing"):
+        print(f"  Missing from CSV (kept, use --prune to delete): {counts['missing']}")
+    print("=" * 60)
+
+
+# ---------------------------------------------------------------------------
+# Incremental load into the SQLite database (csv_to_sql_artists.py schema)
+# ---------------------------------------------------------------------------
+
+def create_fingerprint_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS artist_fingerprints (
+            artist_id TEXT PRIMARY KEY,
+            row_hash  BLOB NOT NULL
+        ) WITHOUT ROWID;
+        """
+    )
+    conn.commit()
+
+
+def bootstrap_fingerprints(conn: sqlite3.Connection) -> int:
+    """
+    If artists were loaded by the full importer (no fingerprints yet),
+    fingerprint what's already in the database so the first incremental
+    run only touches rows that actually differ.
+    """
+    has_fingerprints = conn.execute("SELECT 1 FROM artist_fingerprints LIMIT 1;").fetchone()
+    if has_fingerprints:
+        return 0
+
+    cur = conn.execute(
+        """
+        SELECT a.artist_id, a.artist_name, a.artist_img, a.country, g.genre
+        FROM artists a
+        LEFT JOIN artist_genres g ON g.artist_id = a.artist_id
+        ORDER BY a.artist_id;
+        """
+    )
+
+    rows = []
+    current = None
+    genres = []
+    for artist_id, artist_name, artist_img, country, genre in cur:
+        if current is None or current[0] != artist_id:
+            if current is not None:
+                rows.append((current[0], artist_fingerprint(*current[1:], genres)))
+            current = (artist_id, artist_name, artist_img, country)
+            genres = []
+        if genre is not None:
+            genres.append(genre)
+    if current is not None:
+        rows.append((current[0], artist_fingerprint(*current[1:], genres)))
+
+    conn.executemany("INSERT INTO artist_fingerprints (artist_id, row_hash) VALUES (?, ?);", rows)
+    conn.commit()
+    return len(rows)
+
+
+def _apply_changes(cur, changes, known) -> None:
+    """Upsert a batch of new/changed artists and apply their genre-set diffs."""
+    cur.executemany(
+        """
+        INSERT INTO artists (artist_id, artist_name, artist_img, country)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(artist_id) DO UPDATE SET
+            artist_name = excluded.artist_name,
+            artist_img  = excluded.artist_img,
+            country     = excluded.country;
+        """,
+        [c[:4] for c in changes],
+    )
+
+    # Current genres, only needed for artists that already existed
+    existing_ids = [c[0] for c in changes if c[0] in known]
+    current_genres = {}
+    for i in range(0, len(existing_ids), SQLITE_MAX_VARS):
+        chunk = existing_ids[i:i + SQLITE_MAX_VARS]
+        placeholders = ", ".join("?" for _ in chunk)
+        for artist_id, genre in cur.execute(
+            f"SELECT artist_id, genre FROM artist_genres WHERE artist_id IN ({placeholders});",
+            chunk,
+        ):
+            current_genres.setdefault(artist_id, set()).add(genre)
+
+    to_delete = []
+    to_insert = []
+    for artist_id, _, _, _, genres, _ in changes:
+        old = current_genres.get(artist_id, set())
+        new = set(genres)
+        to_delete.extend((artist_id, g) for g in old - new)
+        to_insert.extend((artist_id, g) for g in new - old)
+
+    cur.executemany("DELETE FROM artist_genres WHERE artist_id = ? AND genre = ?;", to_delete)
+    cur.executemany("INSERT OR IGNORE INTO artist_genres (artist_id, genre) VALUES (?, ?);", to_insert)
+    cur.executemany(
+        """
+        INSERT INTO artist_fingerprints (artist_id, row_hash) VALUES (?, ?)
+        ON CONFLICT(artist_id) DO UPDATE SET row_hash = excluded.row_hash;
+        """,
+        [(c[0], c[5]) for c in changes],
+    )
+
+
+def incremental_load_csv_into_db(
+    conn: sqlite3.Connection,
+    csv_path: Path,
+    prune: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """
+    Delta version of csv_to_sql_artists.load_csv_into_db.
+
+    Each artist's normalized fields + genre set are fingerprinted and
+    compared with artist_fingerprints; unchanged rows cost one hash compare.
+    New artists are inserted, changed ones updated (with a genre-set diff),
+    and - if prune is True - artists that disappeared from the CSV are
+    deleted. Unlike the full importer, changed rows are actually updated
+    instead of being ignored.
+
+    Returns a dict of inserted/updated/unchanged/deleted/missing counts.
+    """
+    create_fingerprint_table(conn)
+    bootstrapped = bootstrap_fingerprints(conn)
+    if bootstrapped:
+        print(f"Fingerprinted {bootstrapped} existing artists")
+
+    known = dict(conn.execute("SELECT artist_id, row_hash FROM artist_fingerprints;"))
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "missing": 0}
+
+    # Same merge rule as the full importer: artist columns come from the
+    # first row for an artist_id (INSERT OR IGNORE), genres are the union of
+    # all its rows.
+    rows = {}
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            parsed = parse_row(row)
+            if parsed is None:
+                continue
+            artist_id, artist_name, artist_img, country, genres = parsed
+            if artist_id in rows:
+                rows[artist_id][3].update(genres)
+            else:
+                rows[artist_id] = (artist_name, artist_img, country, set(genres))
+
+    changes = []
+    cur = conn.cursor()
+
+    try:
+        for artist_id, (artist_name, artist_img, country, genres) in rows.items():
+            fingerprint = artist_fingerprint(artist_name, artist_img, country, genres)
+            old = known.get(artist_id)
+            if old == fingerprint:
+                counts["unchanged"] += 1
+                continue
+
+            counts["inserted" if old is None else "updated"] += 1
+            changes.append((artist_id, artist_name, artist_img, country, genres, fingerprint))
+            if len(changes) >= batch_size:
+                _apply_changes(cur, changes, known)
+                changes = []
+
+        if changes:
+            _apply_changes(cur, changes, known)
+
+        missing = [artist_id for artist_id in known if artist_id not in rows]
+        if prune:
+            for i in range(0, len(missing), SQLITE_MAX_VARS):
+                chunk = [(artist_id,) for artist_id in missing[i:i + SQLITE_MAX_VARS]]
+                cur.executemany("DELETE FROM artist_genres WHERE artist_id = ?;", chunk)
+                cur.executemany("DELETE FROM artists WHERE artist_id = ?;", chunk)
+                cur.executemany("DELETE FROM artist_fingerprints WHERE artist_id = ?;", chunk)
+            counts["deleted"] = len(missing)
+        else:
+            counts["missing"] = len(missing)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Incremental SQL dump (csv_to_music_tracker_sql.py schema)
+# ---------------------------------------------------------------------------
+
+def open_dump_state(state_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(state_path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS genres (
+            genre_key  TEXT PRIMARY KEY,    -- lowercase genre name
+            genre_id   INTEGER NOT NULL UNIQUE,
+            genre_name TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS artists (
+            artist_id TEXT PRIMARY KEY,
+            row_hash  BLOB NOT NULL
+        ) WITHOUT ROWID;
+        """
+    )
+    conn.commit()
+    return conn
+
+
+def write_delta_data(out, csv_path: Path, state_path: Path = DUMP_STATE_PATH, prune: bool = False) -> dict:
+    """
+    Delta version of csv_to_music_tracker_sql.write_data.
+
+    genre_id numbering and per-artist fingerprints from the previous run are
+    kept in state_path, so existing genre_ids never move and only new genres
+    get new ids. Writes INSERTs for new genres/artists, UPDATEs for changed
+    artists and (with prune) DELETEs for artists gone from the CSV. On the
+    first run (empty state) the schema is written too, so the file is a full
+    dump. The state is only updated once the dump has been written.
+    """
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    state = open_dump_state(state_path)
+    try:
+        genres = {key: (gid, name) for key, gid, name in state.execute("SELECT genre_key, genre_id, genre_name FROM genres;")}
+        known = dict(state.execute("SELECT artist_id, row_hash FROM artists;"))
+        first_run = not genres and not known
+        next_genre_id = max((gid for gid, _ in genres.values()), default=0) + 1
+
+        new_genres = []
+        new_artists = []
+        changed_artists = []
+        fingerprints = []
+        seen = set()
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "missing": 0}
+
+        with csv_path.open("r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                artist_id = (row.get("artist_id") or "").strip()
+                artist_name = (row.get("artist_name") or "").strip()
+                artist_img = (row.get("artist_img") or "").strip()
+                country = (row.get("country") or "").strip()
+                genres_str = (row.get("artist_genre") or "").strip()
+
+                if not artist_id or not artist_name or artist_id in seen:
+                    continue
+                seen.add(artist_id)
+
+                first_genre = None
+                if genres_str:
+                    first_genre = genres_str.split(",")[0].strip() or None
+
+                genre_id = None
+                if first_genre:
+                    key = first_genre.lower()
+                    if key not in genres:
+                        genres[key] = (next_genre_id, first_genre)
+                        new_genres.append((key, next_genre_id, first_genre))
+                        next_genre_id += 1
+                    genre_id = genres[key][0]
+
+                fingerprint = row_fingerprint(artist_name, artist_img, country, str(genre_id or ""))
+                old = known.get(artist_id)
+                if old == fingerprint:
+                    counts["unchanged"] += 1
+                    continue
+
+                artist = {
+                    "artist_id": artist_id,
+                    "artist_name": artist_name,
+                    "artist_img": artist_img,
+                    "country": country,
+                    "genre_id": genre_id,
+                }
+                if old is None:
+                    new_artists.append(artist)
+                    counts["inserted"] += 1
+                else:
+                    changed_artists.append(artist)
+                    counts["updated"] += 1
+                fingerprints.append((artist_id, fingerprint))
+
+        missing = [artist_id for artist_id in known if artist_id not in seen]
+
+        if first_run:
+            write_schema(out)
+        out.write("-- Incremental data for genres and artists loaded from CSV\n")
+        out.write("START TRANSACTION;\n\n")
+        for _, gid, gname in new_genres:
+            out.write(genre_insert_sql(gid, gname))
+        for a in new_artists:
+            out.write(artist_insert_sql(a))
+        for a in changed_artists:
+            id_sql, name_sql, img_sql, country_sql, genre_sql = artist_sql_literals(a)
+            out.write(
+                f"UPDATE artists SET artist_name = {name_sql}, artist_img = {img_sql}, "
+                f"country = {country_sql}, genre_id = {genre_sql}\n"
+                f"WHERE artist_id = {id_sql};\n"
+            )
+        if prune:
+            for artist_id in missing:
+                out.write(f"DELETE FROM artists WHERE artist_id = '{sql_escape(artist_id)}';\n")
+            counts["deleted"] = len(missing)
+        else:
+            counts["missing"] = len(missing)
+        out.write("\nCOMMIT;\n")
+
+        state.executemany("INSERT INTO genres (genre_key, genre_id, genre_name) VALUES (?, ?, ?);", new_genres)
+        state.executemany(
+            """
+            INSERT INTO artists (artist_id, row_hash) VALUES (?, ?)
+            ON CONFLICT(artist_id) DO UPDATE SET row_hash = excluded.row_hash;
+            """,
+            fingerprints,
+        )
+        if prune:
+            state.executemany("DELETE FROM artists WHERE artist_id = ?;", [(m,) for m in missing])
+        state.commit()
+    finally:
+        state.close()
+
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental re-import of the Global Music Artists CSV.")
+    parser.add_argument("target", choices=("db", "sql"), help="update the SQLite DB or write a delta SQL dump")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="input CSV path")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path (target db)")
+    parser.add_argument("--out", type=Path, default=SQL_OUTPUT_PATH, help="output SQL path (target sql)")
+    parser.add_argument("--state", type=Path, default=DUMP_STATE_PATH, help="state file (target sql)")
+    parser.add_argument("--prune", action="store_true", help="delete artists that are no longer in the CSV")
+    args = parser.parse_args()
+
+    if not args.csv.exists():
+        raise FileNotFoundError(f"CSV file not found: {args.csv}")
+
+    if args.target == "db":
+        conn = connect(args.db, checkpoints=True)
+        try:
+            create_schema(conn)
+            counts = incremental_load_csv_into_db(conn, args.csv, prune=args.prune)
+            fill_search_keys(conn)
+            build_artist_summary(conn)
+            build_lookup_tables(conn)
+        finally:
+            conn.close()
+        print_summary(counts, f"Incremental import into {args.db}")
+    else:
+        with args.out.open("w", encoding="utf-8") as out:
+            counts = write_delta_data(out, args.csv, args.state, prune=args.prune)
+        print_summary(counts, f"Delta SQL written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
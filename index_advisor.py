@@ -0,0 +1,398 @@
+import re
+import sqlite3
+import time
+import argparse
+from pathlib import Path
+from statistics import median
+
+from migrations import HOT_QUERY_INDEXES, index_prefixes, create_indexes, migrate, table_columns
+from db_connection import connect
+
+DB_PATH = "music_artists.db"
+SERVER_JS = Path(__file__).with_name("server.js")
+
+# Index migration in migrations.MIGRATIONS
+INDEX_MIGRATION = 4
+
+TIMING_RUNS = 20
+
+# The queries are read from server.js itself, so the advisor always grades
+# what the server runs now. A query is named after the route or helper
+# function it sits in; its positional ? parameters are bound from the
+# column each one is compared with (see sample_params).
+
+_JS_STRING = re.compile(r"`([^`]*)`|'((?:[^'\\\n]|\\.)*)'|\"((?:[^\"\\\n]|\\.)*)\"")
+_JS_CONTEXT = re.compile(r"app\.(get|post|put|patch|delete)\(\s*'([^']+)'|function\s+(\w+)\s*\(")
+_STATEMENT = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+_PARAM_COLUMN = re.compile(r"(?:(\w+)\.)?(\w+)\s*(=|<=|>=|<|>|LIKE)\s*$", re.IGNORECASE)
+_PARAM_LIMIT = re.compile(r"\bLIMIT\s*$", re.IGNORECASE)
+
+# Words that can follow a table name but aren't an alias
+_NOT_ALIAS = {
+    "where", "join", "left", "inner", "cross", "on", "set", "order", "group", "limit", "as", "using",
+}
+
+
+def server_queries(path=SERVER_JS):
+    """[(name, sql)] for every SELECT/UPDATE/DELETE string literal in server.js."""
+    source = Path(path).read_text(encoding="utf-8")
+    # Blank out // comments so apostrophes in them don't pair up as strings
+    source = re.sub(r"^\s*//.*$", "", source, flags=re.MULTILINE)
+    contexts = [
+        (m.start(), f"{m.group(1).upper()} {m.group(2)}" if m.group(2) else f"{m.group(3)}()")
+        for m in _JS_CONTEXT.finditer(source)
+    ]
+
+    queries, seen = [], {}
+    for match in _JS_STRING.finditer(source):
+        sql = next(group for group in match.groups() if group is not None)
+        if not _STATEMENT.match(sql) or "${" in sql:
+            continue
+        context = "top level"
+        for position, name in contexts:
+            if position > match.start():
+                break
+            context = name
+        seen[context] = seen.get(context, 0) + 1
+        name = context if seen[context] == 1 else f"{context} #{seen[context]}"
+        queries.append((name, " ".join(sql.split())))
+    return queries
+
+
+def sample_params(conn):
+    """Realistic values per parameter column: the busiest user, the most-seen artist, ..."""
+    def scalar(sql, default):
+        try:
+            row = conn.execute(sql).fetchone()
+        except sqlite3.OperationalError:
+            return default
+        return row[0] if row and row[0] is not None else default
+
+    user_id = scalar("SELECT user_id FROM user_artist_tracking GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1", 1)
+    now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+    return {
+        "user_id": user_id,
+        "id": user_id,
+        "artist_id": scalar(
+            "SELECT artist_id FROM user_artist_tracking GROUP BY artist_id ORDER BY COUNT(*) DESC LIMIT 1",
+            scalar("SELECT artist_id FROM artists LIMIT 1", ""),
+        ),
+        "email": scalar("SELECT email FROM users LIMIT 1", ""),
+        "session_token": scalar("SELECT session_token FROM user_sessions LIMIT 1", ""),
+        "last_activity": now,
+        "expires_at": now,
+        "activity_epoch": int(time.time()) - 5 * 60,
+        "expires_epoch": int(time.time()),
+        # LIKE ? parameters, as the server builds them from the typed text
+        "like:artist_name": "%the%",
+        "like:genre": "%rock%",
+        "like:country": "%United%",
+        "limit": 20,
+    }
+
+
+def bind_params(sql, params):
+    """Positional values for sql's ? placeholders, or raise KeyError naming the unknown one."""
+    values = []
+    for match in re.finditer(r"\?", sql):
+        before = sql[:match.start()]
+        if _PARAM_LIMIT.search(before):
+            values.append(params["limit"])
+            continue
+        column = _PARAM_COLUMN.search(before)
+        if column is None:
+            raise KeyError(before[-30:].strip())
+        name = column.group(2)
+        values.append(params[f"like:{name}" if column.group(3).upper() == "LIKE" else name])
+    return values
+
+
+def query_plan(conn, sql, params):
+    """EXPLAIN QUERY PLAN detail lines."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def plan_problems(plan):
+    """
+    Plan lines worth flagging: full table scans (SCAN without an index)
+    and temp B-trees built for ORDER BY / DISTINCT / GROUP BY.
+    """
+    problems = []
+    for detail in plan:
+        if detail.startswith("SCAN ") and "INDEX" not in detail:
+            problems.append(f"full scan: {detail}")
+        elif "USE TEMP B-TREE" in detail:
+            problems.append(f"temp sort: {detail}")
+    return problems
+
+
+def _clause(sql, keyword, enders):
+    """Text after keyword up to the first of enders (or the end)."""
+    match = re.search(rf"\b{keyword}\b(.*?)(?:\b(?:{'|'.join(enders)})\b|$)", sql, re.IGNORECASE | re.DOTALL)
+    return match.group(1) if match else ""
+
+
+def _query_shape(conn, sql):
+    """
+    Tables (alias -> table, FROM table first) and the columns the query
+    filters, joins and sorts on, each resolved to its table.
+    """
+    tables = {}
+    for match in re.finditer(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        table, alias = match.group(1), match.group(2)
+        tables.setdefault(table, table)
+        if alias and alias.lower() not in _NOT_ALIAS:
+            tables.setdefault(alias, table)
+    columns = {table: table_columns(conn, table) for table in set(tables.values())}
+
+    def resolve(alias, column):
+        if alias:
+            table = tables.get(alias)
+            return table if table and column in columns[table] else None
+        owners = [table for table, names in columns.items() if column in names]
+        return owners[0] if len(owners) == 1 else None
+
+    def column_list(text):
+        resolved = []
+        for part in text.split(",") if text.strip() else []:
+            match = re.fullmatch(r"\s*(?:(\w+)\.)?(\w+)(?:\s+(?:ASC|DESC))?\s*", part, re.IGNORECASE)
+            table = resolve(match.group(1), match.group(2)) if match else None
+            resolved.append((table, match.group(2) if match else None))
+        return resolved
+
+    where = _clause(sql, "WHERE", ["GROUP", "ORDER", "LIMIT"])
+    predicates = []
+    for match in re.finditer(
+        r"(?<![\w.(])(?:(\w+)\.)?(\w+)\s*(=|<=|>=|<|>|LIKE)\s*(\?|'[^']*'|-?\d+)", where, re.IGNORECASE
+    ):
+        table = resolve(match.group(1), match.group(2))
+        if table:
+            predicates.append((table, match.group(2), match.group(3).upper(), match.group(4) == "?"))
+
+    joins = []
+    for match in re.finditer(r"\bON\s+(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)", sql, re.IGNORECASE):
+        for alias, column in ((match.group(1), match.group(2)), (match.group(3), match.group(4))):
+            table = resolve(alias, column)
+            if table:
+                joins.append((table, column))
+
+    sorts = {
+        "ORDER BY": column_list(_clause(sql, "ORDER BY", ["LIMIT"])),
+        "GROUP BY": column_list(_clause(sql, "GROUP BY", ["ORDER", "LIMIT", "HAVING"])),
+    }
+    distinct = re.match(r"\s*SELECT\s+DISTINCT\s+(.*?)\s+FROM\b", sql, re.IGNORECASE | re.DOTALL)
+    sorts["DISTINCT"] = column_list(distinct.group(1)) if distinct else []
+    return tables, predicates, joins, sorts
+
+
+def _rowid_alias(conn, table):
+    for _, name, decl, _, _, pk in conn.execute(f"PRAGMA table_info({table})"):
+        if pk == 1 and decl.upper() == "INTEGER":
+            return name
+    return None
+
+
+def recommend_index(conn, sql, problem):
+    """
+    (table, [columns]) that would remove a flagged plan line: the columns
+    the query compares with = (then its ORDER BY / GROUP BY / DISTINCT
+    columns, or else a range / join column) on the scanned or driving
+    table. None when an index can't help (sorting on computed values,
+    LIKE '%...%' with nothing else to seek on).
+    """
+    tables, predicates, joins, sorts = _query_shape(conn, sql)
+    detail = problem.split(": ", 1)[1]
+    if detail.startswith("SCAN "):
+        table = tables.get(detail.split()[1])
+        wanted = [kind for kind in ("ORDER BY", "GROUP BY", "DISTINCT") if sorts[kind]]
+    else:
+        # A temp B-tree sorts rows of the driving (first FROM) table
+        table = next(iter(tables.values()), None)
+        wanted = [kind for kind in ("ORDER BY", "GROUP BY", "DISTINCT") if detail.endswith(kind)]
+    if table is None:
+        return None
+
+    equal = [(column, param) for t, column, op, param in predicates if t == table and op == "="]
+    ranges = [column for t, column, op, _ in predicates if t == table and op in ("<", ">", "<=", ">=")]
+    sort = []
+    for kind in wanted:
+        if all(t == table for t, _ in sorts[kind]):
+            sort = [column for _, column in sorts[kind]]
+            break
+    if detail.startswith("USE TEMP B-TREE") and not sort:
+        return None
+
+    columns = [column for column, _ in equal] + (sort or ranges[:1])
+    if not columns and detail.startswith("SCAN ") and table != next(iter(tables.values())):
+        columns = [column for t, column in joins if t == table][:1]
+    if not sort and not ranges and not any(param for _, param in equal) and not columns[len(equal):]:
+        # Only constant filters (e.g. is_online = 1): not selective enough
+        return None
+
+    rowid = _rowid_alias(conn, table)
+    result = []
+    for column in columns:
+        if column not in result and column != rowid:
+            result.append(column)
+    return (table, result) if result else None
+
+
+def recommend_indexes(conn, flagged):
+    """
+    Index definitions (name, table, columns) for the flagged plans, in the
+    shape migrations.create_indexes takes. Uses the migrations.HOT_QUERY_INDEXES
+    entry when one starts with the same columns, and skips indexes an
+    existing one already covers.
+    """
+    known = [(name, table, [c.strip() for c in columns.split(",")]) for name, table, columns in HOT_QUERY_INDEXES]
+    wanted = []
+    for sql, problem in flagged:
+        found = recommend_index(conn, sql, problem)
+        if found and found not in wanted:
+            wanted.append(found)
+
+    recommended = []
+    for table, columns in wanted:
+        # Drop one that is a prefix of another recommendation on the same table
+        if any(t == table and len(c) > len(columns) and c[:len(columns)] == columns for t, c in wanted):
+            continue
+        if any(prefix[:len(columns)] == columns for prefix in index_prefixes(conn, table)):
+            continue
+        for name, known_table, known_columns in known:
+            if known_table == table and known_columns[:len(columns)] == columns:
+                columns = known_columns
+                break
+        else:
+            name = f"idx_{table}_{'_'.join(columns)}"
+        if (name, table, ", ".join(columns)) not in recommended:
+            recommended.append((name, table, ", ".join(columns)))
+    return recommended
+
+
+def time_query(conn, sql, params, runs=TIMING_RUNS):
+    """
+    Median wall time in ms of running the query (fetching every row).
+    UPDATE/DELETE run inside a savepoint that is rolled back.
+    """
+    write = not sql.lstrip().upper().startswith("SELECT")
+    timings = []
+    for _ in range(runs):
+        if write:
+            conn.execute("SAVEPOINT index_advisor")
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+        if write:
+            conn.execute("ROLLBACK TO index_advisor")
+            conn.execute("RELEASE index_advisor")
+    return median(timings)
+
+
+def analyze(conn, queries, params, runs=TIMING_RUNS, verbose=True):
+    """
+    Plan and time every server query. Returns ({name: (problems, ms)},
+    [(sql, problem)] for the flagged plan lines); with verbose, prints the
+    flagged plan lines.
+    """
+    results, flagged = {}, []
+    for name, sql in queries:
+        try:
+            values = bind_params(sql, params)
+            plan = query_plan(conn, sql, values)
+        except KeyError as e:
+            if verbose:
+                print(f"  {name:<40} skipped (no sample value for {e})")
+            continue
+        except sqlite3.OperationalError as e:
+            # Table/column missing in this database (e.g. a fallback query's target)
+            if verbose:
+                print(f"  {name:<40} skipped ({e})")
+            continue
+        problems = plan_problems(plan)
+        ms = time_query(conn, sql, values, runs)
+        results[name] = (problems, ms)
+        flagged.extend((sql, problem) for problem in problems)
+        if verbose:
+            status = "OK" if not problems else f"{len(problems)} issue(s)"
+            print(f"  {name:<40} {ms:>9.3f} ms  {status}")
+            for problem in problems:
+                print(f"      - {problem}")
+    return results, flagged
+
+
+def print_recommendations(recommended):
+    if not recommended:
+        print("No index would remove the remaining flagged plan lines.")
+        return
+    print("Recommended indexes for the flagged plans:")
+    for name, table, columns in recommended:
+        print(f"  CREATE INDEX {name} ON {table} ({columns})")
+
+
+def print_comparison(before, after):
+    print(f"  {'query':<40} {'before ms':>10} {'after ms':>10} {'speedup':>8}  issues")
+    print("  " + "-" * 82)
+    for name, (problems_before, ms_before) in before.items():
+        problems_after, ms_after = after.get(name, (problems_before, ms_before))
+        speedup = ms_before / ms_after if ms_after > 0 else float("inf")
+        print(
+            f"  {name:<40} {ms_before:>10.3f} {ms_after:>10.3f} {speedup:>7.1f}x"
+            f"  {len(problems_before)} -> {len(problems_after)}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Flag full scans / temp sorts in the server's queries and create the recommended indexes."
+    )
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path (use a large generate_load_data.py DB)")
+    parser.add_argument("--server", default=SERVER_JS, help="server.js to read the queries from")
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="apply the index migration plus the recommended indexes and report before/after",
+    )
+    parser.add_argument("--runs", type=int, default=TIMING_RUNS, help="timed runs per query (median is reported)")
+    args = parser.parse_args()
+
+    queries = server_queries(args.server)
+    conn = connect(args.db)
+    try:
+        params = sample_params(conn)
+
+        print("=" * 60)
+        print(f"Query plans for {len(queries)} server.js queries" + (" (before indexes)" if args.apply else ""))
+        print("=" * 60)
+        before, flagged = analyze(conn, queries, params, args.runs)
+        recommended = recommend_indexes(conn, flagged)
+
+        print()
+        if not args.apply:
+            print_recommendations(recommended)
+            if recommended:
+                print("(rerun with --apply to create them)")
+            return
+
+        # Only the index migration: migrate() without only= would also run
+        # the table rebuilds and column drops of the other versions
+        migrate(conn, only=[INDEX_MIGRATION])
+        created = create_indexes(conn, recommended)
+        if created:
+            print(f"✓ Created {', '.join(created)}")
+
+        print()
+        print("=" * 60)
+        print("Query plans (after indexes)")
+        print("=" * 60)
+        after, flagged = analyze(conn, queries, params, args.runs)
+
+        print()
+        print_comparison(before, after)
+        print()
+        print_recommendations(recommend_indexes(conn, flagged))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import re
+import string
+import threading
+import time
+import argparse
+from collections import OrderedDict
+
+from db_connection import connect
+
+# Genre and country dropdown lists.
+#
+# The server used to answer them with SELECT DISTINCT over artist_genres /
+# artists, a full scan per request, although they only change when an
+# import runs. The importers now call build_lookup_tables(), which keeps
+#
+#   genre_lookup   (genre, artists)      one row per distinct genre
+#   country_lookup (country, artists)    one row per distinct country
+#   lookup_versions (name, version)      bumped when that list's values change
+#
+# LookupCache keeps the lists (and filtered lists per search string) in an
+# LRU. It re-reads a list's version at most every VERSION_TTL_SECONDS and
+# drops only that list's entries when the version has moved, so between
+# imports every lookup is answered from memory.
+
+DB_PATH = "music_artists.db"
+LOOKUP_CACHE_SIZE = 512
+VERSION_TTL_SECONDS = 5.0
+
+# name -> (table, column, query producing (value, artists) rows)
+LOOKUPS = {
+    "genres": (
+        "genre_lookup",
+        "genre",
+        "SELECT genre, COUNT(*) FROM artist_genres GROUP BY genre",
+    ),
+    "countries": (
+        "country_lookup",
+        "country",
+        "SELECT country, COUNT(*) FROM artists WHERE country IS NOT NULL GROUP BY country",
+    ),
+}
+
+# The server's original queries (used when the lookup tables don't exist)
+DISTINCT_SQL = {
+    "genres": "SELECT DISTINCT genre FROM artist_genres ORDER BY genre",
+    "countries": "SELECT DISTINCT country FROM artists WHERE country IS NOT NULL ORDER BY country",
+}
+
+
+def _table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def build_lookup_tables(conn):
+    """
+    Create/refresh the lookup tables. A list's version is bumped only when
+    its set of values changed (artist counts are refreshed either way).
+    Returns {name: version} for the lists that changed.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lookup_versions (
+            name       TEXT PRIMARY KEY,
+            version    INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    changed = {}
+    for name, (table, column, query) in LOOKUPS.items():
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ({column} TEXT PRIMARY KEY, artists INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("DROP TABLE IF EXISTS temp._lookup_new")
+        conn.execute(f"CREATE TEMP TABLE _lookup_new ({column} TEXT PRIMARY KEY, artists INTEGER NOT NULL)")
+        conn.execute(f"INSERT INTO temp._lookup_new {query}")
+        differs = conn.execute(
+            f"""
+            SELECT EXISTS (SELECT {column} FROM temp._lookup_new EXCEPT SELECT {column} FROM {table})
+                OR EXISTS (SELECT {column} FROM {table} EXCEPT SELECT {column} FROM temp._lookup_new)
+            """
+        ).fetchone()[0]
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} SELECT * FROM temp._lookup_new")
+        conn.execute("DROP TABLE temp._lookup_new")
+        stamped = conn.execute("SELECT 1 FROM lookup_versions WHERE name = ?", (name,)).fetchone()
+        if differs or not stamped:
+            conn.execute(
+                """
+                INSERT INTO lookup_versions (name, version, updated_at) VALUES (?, 1, datetime('now'))
+                ON CONFLICT(name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+                """,
+                (name,),
+            )
+            changed[name] = conn.execute("SELECT version FROM lookup_versions WHERE name = ?", (name,)).fetchone()[0]
+    conn.commit()
+    return changed
+
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def like_matcher(query):
+    """Predicate matching SQLite's `value LIKE '%query%'` (ASCII-only case folding, % and _ wildcards)."""
+    pattern = "".join(
+        ".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in query.translate(_ASCII_LOWER)
+    )
+    regex = re.compile(pattern, re.DOTALL)
+    return lambda value: regex.search(value.translate(_ASCII_LOWER)) is not None
+
+
+class LookupCache:
+    """
+    LRU of lookup lists keyed by (name, query), validated against
+    lookup_versions. Thread-safe; every method takes the connection to use
+    when the cache has to go to the database.
+    """
+
+    def __init__(self, maxsize=LOOKUP_CACHE_SIZE, ttl=VERSION_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()   # (name, query) -> tuple of values
+        self._versions = {}             # name -> (version, checked_at)
+        self._lock = threading.Lock()
+
+    def _version(self, conn, name):
+        known = self._versions.get(name)
+        now = time.monotonic()
+        if known and now - known[1] < self.ttl:
+            return known[0]
+        version = None
+        if _table_exists(conn, "lookup_versions"):
+            row = conn.execute("SELECT version FROM lookup_versions WHERE name = ?", (name,)).fetchone()
+            version = row[0] if row else None
+        if known and known[0] != version:
+            for key in [key for key in self._entries if key[0] == name]:
+                del self._entries[key]
+        self._versions[name] = (version, now)
+        return version
+
+    def _load(self, conn, name, version):
+        if version is None:
+            return tuple(row[0] for row in conn.execute(DISTINCT_SQL[name]))
+        table, column, _ = LOOKUPS[name]
+        return tuple(row[0] for row in conn.execute(f"SELECT {column} FROM {table} ORDER BY {column}"))
+
+    def get(self, conn, name, query=None):
+        """Sorted values of lookup `name`, filtered like the server's LIKE '%query%'."""
+        key = (name, query or None)
+        with self._lock:
+            version = self._version(conn, name)
+            if version is not None and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            if version is None:
+                # No lookup tables yet: nothing to invalidate against, so don't cache
+                values = self._load(conn, name, None)
+                return tuple(filter(like_matcher(query), values)) if query else values
+
+            full = self._entries.get((name, None))
+            if full is None:
+                full = self._entries[(name, None)] = self._load(conn, name, version)
+            values = tuple(filter(like_matcher(query), full)) if query else full
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return values
+
+    def genres(self, conn, query=None):
+        return self.get(conn, "genres", query)
+
+    def countries(self, conn, query=None):
+        return self.get(conn, "countries", query)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+def benchmark(conn, rounds=2000):
+    """Dropdown lookups (full list + typed prefixes): SELECT DISTINCT vs LookupCache."""
+    genres = [row[0] for row in conn.execute("SELECT genre FROM genre_lookup ORDER BY artists DESC LIMIT 20")]
+    queries = [None] + [g[:n] for g in genres for n in (2, 3, 4)]
+    cache = LookupCache()
+
+    def distinct(query):
+        if query:
+            return conn.execute(
+                "SELECT DISTINCT genre FROM artist_genres WHERE genre LIKE ? ORDER BY genre", (f"%{query}%",)
+            ).fetchall()
+        return conn.execute(DISTINCT_SQL["genres"]).fetchall()
+
+    for label, lookup in (("SELECT DISTINCT", distinct), ("LookupCache", lambda q: cache.genres(conn, q))):
+        start = time.perf_counter()
+        for i in range(rounds):
+            lookup(queries[i % len(queries)])
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<16} {elapsed * 1e6 / rounds:10.1f} µs/lookup")
+    print(f"  cache: {cache.hits} hits, {cache.misses} misses")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the genre/country lookup tables and bump their versions.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--benchmark", action="store_true", help="compare SELECT DISTINCT with the cache")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        start = time.perf_counter()
+        changed = build_lookup_tables(conn)
+        versions = dict(conn.execute("SELECT name, version FROM lookup_versions").fetchall())
+        print(f"✓ Lookup tables refreshed in {time.perf_counter() - start:.2f}s")
+        for name in LOOKUPS:
+            note = "changed" if name in changed else "unchanged"
+            print(f"  {name}: version {versions.get(name)} ({note})")
+        if args.benchmark:
+            benchmark(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
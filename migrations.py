@@ -0,0 +1,489 @@
+import re
+import sqlite3
+import time
+import argparse
+from datetime import datetime
+
+from db_connection import BUSY_TIMEOUT_MS, connect
+
+DB_PATH = "music_artists.db"
+
+# Rows copied per short transaction during an online table rebuild
+REBUILD_CHUNK_SIZE = 5000
+# Pause between chunks so the Node server can get the write lock
+REBUILD_PAUSE_SECONDS = 0.01
+
+# Native ALTER TABLE ... DROP COLUMN needs SQLite 3.35+
+HAS_DROP_COLUMN = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def table_columns(conn, table):
+    """Column names of table, in order (PRAGMA table_info)."""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def has_column(conn, table, column):
+    return column in table_columns(conn, table)
+
+
+def add_column_if_missing(conn, table, column, decl):
+    """
+    ALTER TABLE ... ADD COLUMN unless the column already exists.
+    Returns True if the column was added.
+    """
+    if has_column(conn, table, column):
+        return False
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    conn.commit()
+    return True
+
+
+TABLE_CONSTRAINT_KEYWORDS = ("CONSTRAINT", "PRIMARY", "UNIQUE", "CHECK", "FOREIGN")
+
+
+def _split_definitions(sql):
+    """
+    Split a CREATE TABLE statement into (head, definitions, tail): the text
+    before the outer "(", the comma-separated column/constraint definitions
+    inside it (comments removed) and the text after the ")" (e.g. WITHOUT
+    ROWID). Commas inside nested parentheses and quotes don't split.
+    """
+    depth = 0
+    parts = []
+    current = []
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        end = i + 1
+        if ch in "'\"`[":
+            end = sql.index("]" if ch == "[" else ch, i + 1) + 1
+        elif sql.startswith("--", i) or sql.startswith("/*", i):
+            i = sql.find("\n" if ch == "-" else "*/", i)
+            i = len(sql) if i < 0 else i + (1 if ch == "-" else 2)
+            current.append(" ")
+            continue
+        elif ch == "(":
+            depth += 1
+            if depth == 1:
+                head = sql[:i]
+                i += 1
+                continue
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                parts.append("".join(current))
+                return head, [p.strip() for p in parts], sql[i + 1:]
+        elif ch == "," and depth == 1:
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        if depth:
+            current.append(sql[i:end])
+        i = end
+    raise ValueError("Could not parse CREATE TABLE statement")
+
+
+def _definition_name(definition):
+    """
+    (column name, rest of the definition) for a column definition, or
+    (None, definition) for a table constraint.
+    """
+    first = re.match(r'\s*("[^"]*"|`[^`]*`|\[[^\]]*\]|\S+)', definition)
+    if first.group(1).upper() in TABLE_CONSTRAINT_KEYWORDS:
+        return None, definition
+    return first.group(1).strip('"`[]'), definition[first.end():]
+
+
+def _create_sql_without(conn, table, column, new_table):
+    """
+    CREATE TABLE statement for new_table = table minus column, edited from
+    the original sqlite_master.sql so every other column and table
+    constraint (UNIQUE, CHECK, COLLATE, foreign key actions, WITHOUT ROWID)
+    is kept verbatim.
+
+    Raises ValueError when anything else still refers to the column (a
+    multi-column UNIQUE, a CHECK, a generated column...): dropping it would
+    silently change that constraint.
+    """
+    original_sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()[0]
+    _, definitions, tail = _split_definitions(original_sql)
+
+    mentions = re.compile(rf'(?<![\w$])["`\[]?{re.escape(column)}["`\]]?(?![\w$])', re.IGNORECASE)
+    kept = []
+    for definition in definitions:
+        name, body = _definition_name(definition)
+        if name is not None and name.lower() == column.lower():
+            continue
+        if mentions.search(body):
+            raise ValueError(
+                f"Can't drop {table}.{column}: it is used by another definition ({definition})"
+            )
+        kept.append(definition)
+
+    return f"CREATE TABLE {new_table} (\n    " + ",\n    ".join(kept) + f"\n){tail}"
+
+
+def rebuild_table_online(
+    conn,
+    table,
+    create_sql,
+    columns,
+    new_table=None,
+    chunk_size=REBUILD_CHUNK_SIZE,
+    pause=REBUILD_PAUSE_SECONDS,
+):
+    """
+    Rebuild table into a new shape without holding the write lock for the
+    whole copy.
+
+      1. create new_table (create_sql must create new_table) and add
+         triggers on table that mirror INSERT/UPDATE/DELETE into it
+      2. copy existing rows in rowid ranges, one short transaction per
+         chunk, sleeping `pause` seconds between chunks
+      3. in one short transaction: drop the triggers, drop table, rename
+         new_table to table and recreate the table's indexes/triggers that
+         only use the kept columns
+
+    Readers and writers (e.g. the Node server) keep working during step 2.
+    Returns the number of rows copied.
+    """
+    new_table = new_table or f"{table}_rebuild"
+    dropped = set(table_columns(conn, table)) - set(columns)
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"NEW.{c}" for c in columns)
+
+    extra_objects = [
+        (obj_type, name, sql)
+        for obj_type, name, sql in conn.execute(
+            """
+            SELECT type, name, sql FROM sqlite_master
+            WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL
+              AND name NOT LIKE '\\_rebuild\\_%' ESCAPE '\\'
+            """,
+            (table,),
+        )
+    ]
+
+    conn.execute(f"DROP TABLE IF EXISTS {new_table}")
+    conn.execute(create_sql)
+    conn.execute(
+        f"""
+        CREATE TRIGGER _rebuild_ins AFTER INSERT ON {table} BEGIN
+            INSERT OR REPLACE INTO {new_table} (rowid, {cols}) VALUES (NEW.rowid, {new_cols});
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER _rebuild_upd AFTER UPDATE ON {table} BEGIN
+            DELETE FROM {new_table} WHERE rowid = OLD.rowid;
+            INSERT OR REPLACE INTO {new_table} (rowid, {cols}) VALUES (NEW.rowid, {new_cols});
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER _rebuild_del AFTER DELETE ON {table} BEGIN
+            DELETE FROM {new_table} WHERE rowid = OLD.rowid;
+        END
+        """
+    )
+    conn.commit()
+
+    copied = 0
+    max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+    low = 0
+    while low < max_rowid:
+        high = low + chunk_size
+        cur = conn.execute(
+            f"""
+            INSERT OR REPLACE INTO {new_table} (rowid, {cols})
+            SELECT rowid, {cols} FROM {table} WHERE rowid > ? AND rowid <= ?
+            """,
+            (low, high),
+        )
+        conn.commit()
+        copied += cur.rowcount
+        low = high
+        if pause:
+            time.sleep(pause)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for name in ("_rebuild_ins", "_rebuild_upd", "_rebuild_del"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        seq = _autoincrement_seq(conn, table)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+        if seq is not None:
+            # Never hand out ids the old table already used
+            conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq, table))
+        for _, name, sql in extra_objects:
+            if not any(_mentions(sql, col) for col in dropped):
+                conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return copied
+
+
+def _autoincrement_seq(conn, table):
+    has_seq_table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_sequence'"
+    ).fetchone()
+    if not has_seq_table:
+        return None
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    return row[0] if row else None
+
+
+def _mentions(sql, column):
+    """True if column appears as a whole identifier in sql."""
+    words = set()
+    token = []
+    for ch in sql + " ":
+        if ch.isalnum() or ch == "_":
+            token.append(ch)
+        elif token:
+            words.add("".join(token).lower())
+            token = []
+    return column.lower() in words
+
+
+def drop_column(conn, table, column, online=False, chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Drop a column if it exists. Uses native ALTER TABLE DROP COLUMN when the
+    SQLite version supports it (and online is False); falls back to
+    rebuild_table_online when it doesn't or the native drop is refused
+    (e.g. the column is indexed). Returns True if a column was dropped.
+
+    The native drop rewrites every row in a single write transaction, so on
+    a large table that the server writes to, pass online=True.
+    """
+    columns = table_columns(conn, table)
+    if column not in columns:
+        return False
+
+    if HAS_DROP_COLUMN and not online:
+        try:
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+            conn.commit()
+            return True
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            print(f"Note: native DROP COLUMN refused ({e}), rebuilding table instead")
+
+    new_table = f"{table}_rebuild"
+    create_sql = _create_sql_without(conn, table, column, new_table)
+    kept = [c for c in columns if c != column]
+    copied = rebuild_table_online(conn, table, create_sql, kept, new_table, chunk_size)
+    print(f"  Rebuilt {table} ({copied} rows copied in chunks of {chunk_size})")
+    return True
+
+
+# Indexes for the server's hot queries (see index_advisor.py):
+# (name, table, indexed columns)
+HOT_QUERY_INDEXES = [
+    ("idx_artists_artist_id", "artists", "artist_id"),                  # artist page, joins
+    ("idx_artists_name", "artists", "artist_name"),                     # search ORDER BY artist_name LIMIT
+    ("idx_artists_country", "artists", "country"),                      # DISTINCT country
+    ("idx_artist_genres_artist", "artist_genres", "artist_id, genre"),  # genres of an artist
+    ("idx_artist_genres_genre", "artist_genres", "genre, artist_id"),   # DISTINCT genre, artists by genre
+    ("idx_uat_user_date", "user_artist_tracking", "user_id, date_seen"),  # per-user history, newest first
+    ("idx_uat_artist_user", "user_artist_tracking", "artist_id, user_id"),  # fans of an artist
+    ("idx_user_sessions_user", "user_sessions", "user_id, created_at"),  # sessions of a user
+]
+
+
+def index_prefixes(conn, table):
+    """Leading column lists of every existing index on table (incl. PK/UNIQUE autoindexes)."""
+    prefixes = []
+    for row in conn.execute(f"PRAGMA index_list({table})"):
+        cols = [info[2] for info in conn.execute(f"PRAGMA index_info({row[1]})")]
+        prefixes.append(cols)
+    return prefixes
+
+
+def create_indexes(conn, indexes=None):
+    """
+    CREATE INDEX IF NOT EXISTS for each (name, table, columns), skipping
+    tables that don't exist and indexes already covered by an existing
+    index with the same leading columns. Runs ANALYZE on the touched
+    tables so the planner has statistics. Returns the names created.
+    """
+    created = []
+    for name, table, columns in indexes or HOT_QUERY_INDEXES:
+        if not table_columns(conn, table):
+            continue
+        wanted = [c.strip() for c in columns.split(",")]
+        if any(prefix[:len(wanted)] == wanted for prefix in index_prefixes(conn, table)):
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        created.append(name)
+    for table in sorted({table for _, table, _ in indexes or HOT_QUERY_INDEXES}):
+        if table_columns(conn, table):
+            conn.execute(f"ANALYZE {table}")
+    conn.commit()
+    return created
+
+
+def _fill_search_keys(conn):
+    # search_keys imports this module, so import it lazily
+    from search_keys import fill_search_keys
+
+    fill_search_keys(conn)
+
+
+def _build_artist_summary(conn):
+    from artist_summary import build_artist_summary
+
+    build_artist_summary(conn)
+
+
+def _install_user_stats(conn):
+    from user_stats import install_user_stats
+
+    install_user_stats(conn)
+
+
+def _install_session_epochs(conn):
+    from session_maintenance import install_session_epochs
+
+    install_session_epochs(conn)
+
+
+# Version of the migration that drops user_artist_tracking.rating_date
+RATING_DATE_MIGRATION = 3
+
+# (version, description, function(conn, online)) - append only, never renumber.
+MIGRATIONS = [
+    (
+        1,
+        "add user_artist_tracking.rating",
+        lambda conn, online: add_column_if_missing(conn, "user_artist_tracking", "rating", "INTEGER"),
+    ),
+    (
+        2,
+        "add user_artist_tracking.event_country",
+        lambda conn, online: add_column_if_missing(conn, "user_artist_tracking", "event_country", "TEXT"),
+    ),
+    (
+        3,
+        "drop user_artist_tracking.rating_date",
+        lambda conn, online: drop_column(conn, "user_artist_tracking", "rating_date", online=online),
+    ),
+    (
+        4,
+        "indexes for the server's hot queries",
+        lambda conn, online: create_indexes(conn),
+    ),
+    (
+        5,
+        "normalized search keys for artists and genres",
+        lambda conn, online: _fill_search_keys(conn),
+    ),
+    (
+        6,
+        "artist_summary table (artists + genre list)",
+        lambda conn, online: _build_artist_summary(conn),
+    ),
+    (
+        7,
+        "per-user stats tables maintained by triggers",
+        lambda conn, online: _install_user_stats(conn),
+    ),
+    (
+        8,
+        "integer epoch columns and indexes for user_sessions",
+        lambda conn, online: _install_session_epochs(conn),
+    ),
+]
+
+
+def ensure_migrations_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at  TEXT NOT NULL
+        )
+        """
+    )
+    conn.commit()
+
+
+def applied_versions(conn):
+    ensure_migrations_table(conn)
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def migrate(conn, target=None, online=False, migrations=None, only=None):
+    """
+    Apply every migration not yet recorded in schema_migrations (up to
+    target, if given), in version order. only=[versions] applies just those
+    versions, for scripts that need one change without the rest. Each
+    migration is idempotent, so a database that was changed by the old
+    ad-hoc scripts is simply recorded as migrated. Returns the list of
+    versions applied.
+    """
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    done = applied_versions(conn)
+    applied = []
+
+    for version, description, apply in sorted(migrations or MIGRATIONS, key=lambda m: m[0]):
+        if version in done or (target is not None and version > target):
+            continue
+        if only is not None and version not in only:
+            continue
+        print(f"→ Migration {version}: {description}")
+        apply(conn, online)
+        conn.execute(
+            "INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
+            (version, description, datetime.now().isoformat(timespec="seconds")),
+        )
+        conn.commit()
+        applied.append(version)
+
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations to music_artists.db.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--target", type=int, default=None, help="stop after this version")
+    parser.add_argument("--only", type=int, nargs="+", default=None, help="apply just these versions")
+    parser.add_argument(
+        "--online",
+        action="store_true",
+        help="always rebuild tables in short chunked transactions instead of native ALTER TABLE",
+    )
+    parser.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    args = parser.parse_args()
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        if args.status:
+            done = applied_versions(conn)
+            for version, description, _ in MIGRATIONS:
+                mark = "✓" if version in done else " "
+                print(f"  [{mark}] {version}: {description}")
+            return
+
+        applied = migrate(conn, target=args.target, online=args.online, only=args.only)
+    finally:
+        conn.close()
+
+    if applied:
+        print(f"✅ Applied {len(applied)} migration(s): {', '.join(map(str, applied))}")
+    else:
+        print("✅ Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import csv
+import io
+import os
+import sqlite3
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from csv_to_sql_artists import (
+    CSV_PATH,
+    DB_PATH,
+    create_schema,
+    parse_row,
+    apply_bulk_pragmas,
+)
+from db_connection import connect
+
+# Target size of one chunk handed to a worker (bytes). Chunks are cut at the
+# first record boundary after this many bytes, so real sizes vary a little.
+CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def find_chunk_boundaries(csv_path: Path, chunk_bytes: int = CHUNK_BYTES):
+    """
+    Split the CSV into byte ranges that start and end on record boundaries.
+
+    Quoted fields may contain newlines, so a newline only ends a record when
+    the number of '"' characters seen so far is even. This is a single
+    sequential pass that only counts quote bytes per line - much cheaper than
+    parsing the CSV - and the actual parsing happens in the workers.
+
+    Returns (header_end, ranges) where header_end is the byte offset just
+    after the header record and ranges is a list of (start, end) offsets.
+    """
+    ranges = []
+    header_end = None
+    in_quotes = False
+    offset = 0
+    chunk_start = None
+
+    with csv_path.open("rb") as f:
+        for line in f:
+            offset += len(line)
+            if line.count(b'"') & 1:
+                in_quotes = not in_quotes
+            if in_quotes:
+                continue
+
+            # `offset` is now a record boundary
+            if header_end is None:
+                header_end = offset
+                chunk_start = offset
+            elif offset - chunk_start >= chunk_bytes:
+                ranges.append((chunk_start, offset))
+                chunk_start = offset
+
+    if header_end is None:
+        return offset, []
+    if offset > chunk_start:
+        ranges.append((chunk_start, offset))
+    return header_end, ranges
+
+
+def read_header(csv_path: Path, header_end: int):
+    """Parse the header record (the bytes before header_end)."""
+    with csv_path.open("rb") as f:
+        text = f.read(header_end).decode("utf-8")
+    return next(csv.reader(io.StringIO(text, newline="")), [])
+
+
+def first_genre_of(row: dict):
+    """
+    First genre before the comma, exactly as csv_to_music_tracker_sql.load_csv
+    computes it (None when missing or blank).
+    """
+    genres_str = (row.get("artist_genre") or "").strip()
+    if not genres_str:
+        return None
+    return genres_str.split(",")[0].strip() or None
+
+
+def parse_chunk(csv_path, fieldnames, start, end):
+    """
+    Worker: parse and normalize one byte range of the CSV.
+
+    Returns a list of (artist_id, artist_name, artist_img, country, genres,
+    first_genre) tuples in file order; rows without an ID or name are dropped.
+    """
+    with open(csv_path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    records = []
+    for row in csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames):
+        parsed = parse_row(row)
+        if parsed is None:
+            continue
+        records.append(parsed + (first_genre_of(row),))
+    return records
+
+
+def iter_parsed_chunks(csv_path: Path, workers: int = None, chunk_bytes: int = CHUNK_BYTES):
+    """
+    Parse the CSV in a ProcessPoolExecutor and yield each chunk's records
+    IN FILE ORDER. At most 2 * workers chunks are in flight, so memory stays
+    bounded no matter how big the file is.
+    """
+    workers = workers or os.cpu_count() or 1
+    header_end, ranges = find_chunk_boundaries(csv_path, chunk_bytes)
+    fieldnames = read_header(csv_path, header_end)
+    path = str(csv_path)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        ranges = iter(ranges)
+
+        for start, end in ranges:
+            pending.append(pool.submit(parse_chunk, path, fieldnames, start, end))
+            if len(pending) >= 2 * workers:
+                break
+
+        while pending:
+            records = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(pool.submit(parse_chunk, path, fieldnames, *next_range))
+            yield records
+
+
+def parallel_load_csv_into_db(
+    conn: sqlite3.Connection,
+    csv_path: Path,
+    workers: int = None,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> int:
+    """
+    Multi-process equivalent of csv_to_sql_artists.load_csv_into_db.
+
+    Workers parse/normalize chunks; this process is the single writer and
+    applies each chunk with executemany in file order inside one transaction.
+    Because chunks are applied in order and the inserts are INSERT OR IGNORE,
+    the first occurrence of each artist_id wins, exactly like the serial path.
+
+    Returns the number of artist rows applied (before dedup).
+    """
+    apply_bulk_pragmas(conn)
+    cur = conn.cursor()
+    applied = 0
+    start = time.perf_counter()
+
+    cur.execute("BEGIN;")
+    try:
+        for records in iter_parsed_chunks(csv_path, workers, chunk_bytes):
+            cur.executemany(
+                """
+                INSERT OR IGNORE INTO artists (artist_id, artist_name, artist_img, country)
+                VALUES (?, ?, ?, ?);
+                """,
+                [r[:4] for r in records],
+            )
+            cur.executemany(
+                "INSERT OR IGNORE INTO artist_genres (artist_id, genre) VALUES (?, ?);",
+                [(r[0], genre) for r in records for genre in r[4]],
+            )
+            applied += len(records)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - start
+    rate = applied / elapsed if elapsed > 0 else float("inf")
+    print(f"Applied {applied} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return applied
+
+
+def parallel_load_csv(csv_path: Path, workers: int = None, chunk_bytes: int = CHUNK_BYTES):
+    """
+    Multi-process equivalent of csv_to_music_tracker_sql.load_csv.
+
+    Returns the same (genres, artists) structures. Dedup by artist_id and
+    genre_id numbering are done here, over the chunks in file order, so the
+    output is identical to the serial version.
+    """
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    genres = {}
+    next_genre_id = 1
+    artists = []
+    seen_artist_ids = set()
+
+    for records in iter_parsed_chunks(csv_path, workers, chunk_bytes):
+        for artist_id, artist_name, artist_img, country, _, first_genre in records:
+            if artist_id in seen_artist_ids:
+                continue
+            seen_artist_ids.add(artist_id)
+
+            genre_id = None
+            if first_genre:
+                key = first_genre.lower()
+                if key not in genres:
+                    genres[key] = (next_genre_id, first_genre)
+                    next_genre_id += 1
+                genre_id = genres[key][0]
+
+            artists.append(
+                {
+                    "artist_id": artist_id,
+                    "artist_name": artist_name,
+                    "artist_img": artist_img,
+                    "country": country,
+                    "genre_id": genre_id,
+                }
+            )
+
+    return genres, artists
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-process artists CSV import into SQLite.")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="input CSV path")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / (1024 * 1024), help="target chunk size in MB")
+    args = parser.parse_args()
+
+    if not args.csv.exists():
+        raise FileNotFoundError(f"CSV file not found: {args.csv}")
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        create_schema(conn)
+        parallel_load_csv_into_db(conn, args.csv, args.workers, int(args.chunk_mb * 1024 * 1024))
+    finally:
+        conn.close()
+
+    print(f"✅ Done! Loaded data from '{args.csv}' into SQLite DB '{args.db}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import sqlite3
-import bcrypt
 import random
 from datetime import datetime, timedelta
 
+from artist_sampler import ArtistSampler
+from bulk_import_users import HAS_BCRYPT, hash_password
+from user_stats import install_user_stats, sync_concerts_attended
+from db_connection import connect
+
 DB_PATH = "music_artists.db"
 
 # Fake user data
@@ -41,19 +45,25 @@ CITIES = [
     "San Diego, CA", "Dallas, TX", "Houston, TX", "Cleveland, OH"
 ]
 
-def generate_random_date(days_back=730):
-    """Generate a random date within the last 'days_back' days."""
-    days_ago = random.randint(1, days_back)
-    return datetime.now() - timedelta(days=days_ago)
+def generate_random_date(days_back=730, rng=random, now=None):
+    """Generate a random date within the last 'days_back' days.
+
+    Pass a seeded random.Random as rng and a fixed now for reproducible dates.
+    """
+    days_ago = rng.randint(1, days_back)
+    return (now or datetime.now()) - timedelta(days=days_ago)
 
 def create_fake_users(conn, num_users=20):
     """Create fake users with hashed passwords."""
+    if not HAS_BCRYPT:
+        raise RuntimeError("bcrypt is required to create users: pip install bcrypt")
+
     cursor = conn.cursor()
     users = []
 
     # Default password for all fake users
     password = "password123"
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed_password = hash_password(password)
 
     for i in range(num_users):
         first_name = random.choice(FIRST_NAMES)
@@ -80,23 +90,21 @@ def create_fake_users(conn, num_users=20):
     conn.commit()
     return users
 
-def get_random_artists(conn, count=5):
-    """Get random artist IDs from the database."""
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT artist_id, artist_name
-        FROM artists
-        ORDER BY RANDOM()
-        LIMIT ?
-    """, (count,))
-    return cursor.fetchall()
+def get_random_artists(conn, count=5, sampler=None):
+    """Get random artist IDs from the database.
+
+    Pass an ArtistSampler to reuse its preloaded rowid array across calls.
+    """
+    sampler = sampler or ArtistSampler(conn)
+    return sampler.sample(count)
 
 def create_concert_attendance(conn, users, concerts_per_user=5):
     """Create concert attendance records for each user."""
     cursor = conn.cursor()
+    sampler = ArtistSampler(conn)
 
     for user in users:
-        artists = get_random_artists(conn, concerts_per_user)
+        artists = get_random_artists(conn, concerts_per_user, sampler)
 
         for artist_id, artist_name in artists:
             date_seen = generate_random_date(days_back=730)
@@ -128,7 +136,11 @@ def create_concert_attendance(conn, users, concerts_per_user=5):
     conn.commit()
 
 def update_concert_counts(conn):
-    """Update the concerts_attended count in user_profiles."""
+    """
+    Update the concerts_attended count in user_profiles from user_stats,
+    which triggers keep current (see user_stats.py) - no recount of
+    user_artist_tracking.
+    """
     cursor = conn.cursor()
 
     # First, ensure all users have a profile
@@ -136,26 +148,18 @@ def update_concert_counts(conn):
         INSERT OR IGNORE INTO user_profiles (user_id)
         SELECT id FROM users
     """)
-
-    # Update concert counts
-    cursor.execute("""
-        UPDATE user_profiles
-        SET concerts_attended = (
-            SELECT COUNT(*)
-            FROM user_artist_tracking
-            WHERE user_artist_tracking.user_id = user_profiles.user_id
-        )
-    """)
-
     conn.commit()
 
+    install_user_stats(conn)
+    sync_concerts_attended(conn)
+
 def main():
     print("=" * 60)
     print("Populating database with fake users and concert data")
     print("=" * 60)
     print()
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH, checkpoints=True)
 
     try:
         # Create 20 fake users
@@ -1,51 +1,50 @@
-import sqlite3
+import sys
+
+from migrations import RATING_DATE_MIGRATION, drop_column, has_column, migrate, HAS_DROP_COLUMN
+from db_connection import connect
 
 DB_PATH = "music_artists.db"
+# Above this many rows the single-transaction native drop would block the
+# server's writes for too long, so the table is rebuilt online instead
+ONLINE_REBUILD_ROWS = 100_000
 
-def remove_rating_date_column():
-    conn = sqlite3.connect(DB_PATH)
+def remove_rating_date_column(online=False):
+    conn = connect(DB_PATH, checkpoints=True)
     cursor = conn.cursor()
-    
+
     print("Removing rating_date column from user_artist_tracking table...")
-    print("Note: SQLite doesn't support DROP COLUMN directly, so we'll recreate the table.")
+    rows = cursor.execute("SELECT COUNT(*) FROM user_artist_tracking").fetchone()[0]
+    if not online and rows > ONLINE_REBUILD_ROWS:
+        print(f"{rows} rows: too many to rewrite in one write transaction, switching to --online.")
+        online = True
+    if online:
+        print("Rebuilding the table in short chunked transactions (server can keep writing).")
+    elif HAS_DROP_COLUMN:
+        print("Using native ALTER TABLE ... DROP COLUMN.")
+        print("This rewrites every row in one write transaction: other writers wait until it finishes.")
+    else:
+        print("Note: this SQLite has no DROP COLUMN, so the table is rebuilt in chunks.")
     print()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_artist_tracking_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            artist_id TEXT NOT NULL,
-            date_seen DATE,
-            venue TEXT,
-            city TEXT,
-            notes TEXT,
-            rating INTEGER,
-            event_country TEXT,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (artist_id) REFERENCES artists(artist_id)
-        )
-    """)
-    
-    cursor.execute("""
-        INSERT INTO user_artist_tracking_new 
-        (id, user_id, artist_id, date_seen, venue, city, notes, rating, event_country)
-        SELECT id, user_id, artist_id, date_seen, venue, city, notes, rating, event_country
-        FROM user_artist_tracking
-    """)
-    
-    cursor.execute("DROP TABLE user_artist_tracking")
-    cursor.execute("ALTER TABLE user_artist_tracking_new RENAME TO user_artist_tracking")
-    
-    conn.commit()
-    
+
+    migrate(conn, online=online, only=[RATING_DATE_MIGRATION])
+    # The migration may have been recorded before the column came back
+    # (e.g. an old add_ratings_to_existing.py run), so drop it directly too
+    if has_column(conn, "user_artist_tracking", "rating_date"):
+        drop_column(conn, "user_artist_tracking", "rating_date", online=online)
+
+    if has_column(conn, "user_artist_tracking", "rating_date"):
+        print("⚠️  rating_date column is still present")
+        conn.close()
+        sys.exit(1)
+
     cursor.execute("SELECT COUNT(*) FROM user_artist_tracking")
     count = cursor.fetchone()[0]
-    
+
     print(f"✓ Successfully removed rating_date column")
     print(f"✓ Preserved {count} records")
     print()
     print("✅ Database updated successfully!")
-    
+
     conn.close()
 
 if __name__ == "__main__":
@@ -53,6 +52,5 @@ if __name__ == "__main__":
     print("Removing rating_date column from user_artist_tracking")
     print("=" * 60)
     print()
-    
-    remove_rating_date_column()
 
+    remove_rating_date_column(online="--online" in sys.argv[1:])
@@ -0,0 +1,181 @@
+import re
+import time
+import argparse
+import unicodedata
+from functools import lru_cache
+
+from batch_update import batched_update
+from migrations import add_column_if_missing
+from db_connection import connect
+
+# Normalized search keys for artist names and genres, stored next to the
+# original values so searches compare plain indexed strings instead of
+# folding case/accents per row at query time:
+#
+#   "Beyoncé"        -> "beyonce"
+#   "AC/DC"          -> "ac dc"
+#   "Sigur Rós"      -> "sigur ros"
+#   "ＢＡＢＹＭＥＴＡＬ" -> "babymetal"   (NFKD folds full-width forms)
+#   "Hip-Hop"        -> "hip hop"
+#
+# Keys are filled in after each import (NULL key = not computed yet) and a
+# trigger clears an artist's key when its name changes, so the next import
+# or `python search_keys.py` recomputes it.
+
+DB_PATH = "music_artists.db"
+
+# Distinct strings kept in the normalizer cache (genres repeat a lot;
+# artist names are mostly unique, so this just bounds memory)
+KEY_CACHE_SIZE = 1 << 16
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def search_key(text):
+    """NFKD, drop combining marks, casefold, collapse punctuation/whitespace to one space."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", stripped.casefold()).strip()
+
+
+def prefix_range(prefix):
+    """(low, high) so that low <= key < high selects keys starting with prefix."""
+    key = search_key(prefix)
+    return key, key + "\U0010ffff"
+
+
+def ensure_search_key_columns(conn):
+    """Add the key columns and the stale-key trigger."""
+    add_column_if_missing(conn, "artists", "name_key", "TEXT")
+    add_column_if_missing(conn, "artist_genres", "genre_key", "TEXT")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS artists_name_key_stale
+        AFTER UPDATE OF artist_name ON artists
+        WHEN NEW.artist_name IS NOT OLD.artist_name
+        BEGIN
+            UPDATE artists SET name_key = NULL WHERE rowid = NEW.rowid;
+        END
+        """
+    )
+    conn.commit()
+
+
+def create_search_key_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_artists_name_key ON artists (name_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_artist_genres_genre_key ON artist_genres (genre_key, genre)")
+    conn.commit()
+
+
+def _compute_name_keys(rows):
+    return [(artist_id, search_key(name)) for artist_id, name in rows]
+
+
+def fill_search_keys(conn, progress=None):
+    """
+    Compute every missing key. Artist names go through batched_update in
+    keyset chunks; genres are keyed once per distinct genre and written
+    with a single correlated UPDATE. The key indexes are created after the
+    first fill (building them once is cheaper than maintaining them, and
+    the chunk queries would otherwise pick the name_key index and sort).
+    Returns (artists, genre rows) updated.
+    """
+    ensure_search_key_columns(conn)
+
+    artists = batched_update(
+        conn,
+        "artists",
+        "artist_id",
+        ["artist_name"],
+        ["name_key"],
+        _compute_name_keys,
+        where="name_key IS NULL",
+        progress=progress,
+    )
+
+    genres = [
+        (genre, search_key(genre))
+        for (genre,) in conn.execute("SELECT DISTINCT genre FROM artist_genres WHERE genre_key IS NULL")
+    ]
+    genre_rows = 0
+    if genres:
+        conn.execute("DROP TABLE IF EXISTS temp.genre_key_map")
+        conn.execute("CREATE TEMP TABLE genre_key_map (genre TEXT PRIMARY KEY, genre_key TEXT)")
+        conn.executemany("INSERT INTO temp.genre_key_map VALUES (?, ?)", genres)
+        genre_rows = conn.execute(
+            """
+            UPDATE artist_genres
+            SET genre_key = (SELECT m.genre_key FROM temp.genre_key_map m WHERE m.genre = artist_genres.genre)
+            WHERE genre_key IS NULL
+            """
+        ).rowcount
+        conn.execute("DROP TABLE temp.genre_key_map")
+        conn.commit()
+
+    create_search_key_indexes(conn)
+    return artists, genre_rows
+
+
+def prefix_search_artists(conn, prefix, limit=20):
+    """Artists whose name key starts with prefix - an index range scan on name_key."""
+    low, high = prefix_range(prefix)
+    return conn.execute(
+        """
+        SELECT artist_id, artist_name, artist_img, country
+        FROM artists
+        WHERE name_key >= ? AND name_key < ?
+        ORDER BY name_key
+        LIMIT ?
+        """,
+        (low, high, limit),
+    ).fetchall()
+
+
+def prefix_search_genres(conn, prefix):
+    """Distinct genres whose key starts with prefix."""
+    low, high = prefix_range(prefix)
+    return [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT DISTINCT genre FROM artist_genres
+            WHERE genre_key >= ? AND genre_key < ?
+            ORDER BY genre_key, genre
+            """,
+            (low, high),
+        )
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill normalized search keys for artists and genres.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--search", help="instead of filling keys, prefix-search artists and genres")
+    args = parser.parse_args()
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        if args.search is not None:
+            print("Artists:")
+            for artist_id, name, _, country in prefix_search_artists(conn, args.search):
+                print(f"  {artist_id}  {name}  ({country or '-'})")
+            print("Genres:")
+            for genre in prefix_search_genres(conn, args.search):
+                print(f"  {genre}")
+            return
+
+        start = time.perf_counter()
+        artists, genre_rows = fill_search_keys(conn)
+        info = search_key.cache_info()
+    finally:
+        conn.close()
+
+    print(f"✓ Keyed {artists} artists and {genre_rows} genre rows in {time.perf_counter() - start:.2f}s")
+    print(f"  normalizer cache: {info.hits} hits, {info.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -74,8 +74,35 @@ function deactivateSession(sessionToken, callback) {
 }
 
 // Helper function to clean up expired and inactive sessions
-// Sets users offline if their session has expired or they haven't been active in the last 5 minutes
+// Sets users offline if their session has expired or they haven't been active in the last 5 minutes.
+// Uses the indexed epoch columns added by session_maintenance.py (migration 8) when they exist.
 function cleanupExpiredSessions() {
+  const now = Math.floor(Date.now() / 1000);
+  db.run(
+    `UPDATE user_sessions SET is_online = 0 WHERE is_online = 1 AND activity_epoch < ?`,
+    [now - 5 * 60],
+    (err) => {
+      if (err && err.message.includes('no such column')) {
+        return cleanupExpiredSessionsByText();
+      }
+      if (err) {
+        return console.error('Error cleaning up expired sessions:', err);
+      }
+      db.run(
+        `UPDATE user_sessions SET is_online = 0 WHERE expires_epoch < ? AND is_online = 1`,
+        [now],
+        (err) => {
+          if (err) {
+            console.error('Error cleaning up expired sessions:', err);
+          }
+        }
+      );
+    }
+  );
+}
+
+// Cleanup for databases without the epoch columns (full table scan)
+function cleanupExpiredSessionsByText() {
   db.run(
     `UPDATE user_sessions SET is_online = 0
      WHERE is_online = 1 AND (
@@ -97,6 +124,16 @@ const db = new sqlite3.Database('./music_artists.db', (err) => {
     console.log('Connected to music_artists.db database');
     console.log('All user and artist tables are already set up and ready to use');
 
+    // Same settings as the Python scripts' db_connection.connect(): WAL so
+    // maintenance jobs don't block reads, and wait for the write lock
+    // instead of failing with SQLITE_BUSY
+    db.configure('busyTimeout', 5000);
+    db.run('PRAGMA journal_mode = WAL', (err) => {
+      if (err) {
+        console.error('Error enabling WAL mode:', err);
+      }
+    });
+
     db.run(`
       CREATE TRIGGER IF NOT EXISTS update_users_timestamp
       AFTER UPDATE ON users
@@ -404,15 +441,26 @@ app.get('/api/search/artists', (req, res) => {
 app.get('/api/search/genres', (req, res) => {
   const { query } = req.query;
 
-  let sql = 'SELECT DISTINCT genre FROM artist_genres ORDER BY genre';
+  // genre_lookup is maintained by the Python import scripts (lookup_cache.py)
+  let sql = 'SELECT genre FROM genre_lookup ORDER BY genre';
+  let fallbackSql = 'SELECT DISTINCT genre FROM artist_genres ORDER BY genre';
   let params = [];
 
   if (query) {
-    sql = 'SELECT DISTINCT genre FROM artist_genres WHERE genre LIKE ? ORDER BY genre';
+    sql = 'SELECT genre FROM genre_lookup WHERE genre LIKE ? ORDER BY genre';
+    fallbackSql = 'SELECT DISTINCT genre FROM artist_genres WHERE genre LIKE ? ORDER BY genre';
     params = [`%${query}%`];
   }
 
   db.all(sql, params, (err, rows) => {
+    if (err && err.message.includes('no such table: genre_lookup')) {
+      return db.all(fallbackSql, params, (err, rows) => {
+        if (err) {
+          return res.status(500).json({ error: 'Database error' });
+        }
+        res.json(rows.map(row => row.genre));
+      });
+    }
     if (err) {
       return res.status(500).json({ error: 'Database error' });
     }
@@ -424,15 +472,26 @@ app.get('/api/search/genres', (req, res) => {
 app.get('/api/search/countries', (req, res) => {
   const { query } = req.query;
 
-  let sql = 'SELECT DISTINCT country FROM artists WHERE country IS NOT NULL ORDER BY country';
+  // country_lookup is maintained by the Python import scripts (lookup_cache.py)
+  let sql = 'SELECT country FROM country_lookup ORDER BY country';
+  let fallbackSql = 'SELECT DISTINCT country FROM artists WHERE country IS NOT NULL ORDER BY country';
   let params = [];
 
   if (query) {
-    sql = 'SELECT DISTINCT country FROM artists WHERE country IS NOT NULL AND country LIKE ? ORDER BY country';
+    sql = 'SELECT country FROM country_lookup WHERE country LIKE ? ORDER BY country';
+    fallbackSql = 'SELECT DISTINCT country FROM artists WHERE country IS NOT NULL AND country LIKE ? ORDER BY country';
     params = [`%${query}%`];
   }
 
   db.all(sql, params, (err, rows) => {
+    if (err && err.message.includes('no such table: country_lookup')) {
+      return db.all(fallbackSql, params, (err, rows) => {
+        if (err) {
+          return res.status(500).json({ error: 'Database error' });
+        }
+        res.json(rows.map(row => row.country));
+      });
+    }
     if (err) {
       return res.status(500).json({ error: 'Database error' });
     }
@@ -491,6 +550,7 @@ app.post('/api/user/:userId/artists', (req, res) => {
         return res.status(500).json({ error: 'Failed to add artist' });
       }
 
+      // artist_fans is kept current by triggers on user_artist_tracking
       res.status(201).json({
         message: 'Artist added successfully',
         trackingId: this.lastID
@@ -500,9 +560,43 @@ app.post('/api/user/:userId/artists', (req, res) => {
 });
 
 // Get users who have also seen a specific artist
+// Served from artist_fans (kept current by triggers on user_artist_tracking,
+// see artist_aggregates.py): an indexed lookup instead of a GROUP BY over
+// user_artist_tracking.
 app.get('/api/artists/:artistId/fans', (req, res) => {
   const { artistId } = req.params;
 
+  db.all(
+    `SELECT
+       u.id,
+       u.first_name,
+       u.last_name,
+       u.nickname,
+       up.profile_image_url,
+       up.city,
+       up.state,
+       f.times_seen
+     FROM artist_fans f
+     JOIN users u ON f.user_id = u.id
+     LEFT JOIN user_profiles up ON u.id = up.user_id
+     WHERE f.artist_id = ?
+     ORDER BY f.times_seen DESC, u.nickname`,
+    [artistId],
+    (err, fans) => {
+      if (err && err.message.includes('no such table: artist_fans')) {
+        return getArtistFansByTracking(artistId, res);
+      }
+      if (err) {
+        return res.status(500).json({ error: 'Database error' });
+      }
+
+      res.json(fans);
+    }
+  );
+});
+
+// Fallback for databases without artist_fans: aggregate the tracking rows
+function getArtistFansByTracking(artistId, res) {
   db.all(
     `SELECT DISTINCT
        u.id,
@@ -528,12 +622,93 @@ app.get('/api/artists/:artistId/fans', (req, res) => {
       res.json(fans);
     }
   );
+}
+
+// "Users who saw this artist also saw" - top neighbours precomputed by
+// artist_aggregates.py; empty until that job has run
+app.get('/api/artists/:artistId/also-seen', (req, res) => {
+  const { artistId } = req.params;
+  const limit = Math.min(parseInt(req.query.limit, 10) || 10, 50);
+
+  db.all(
+    `SELECT
+       n.neighbor_id as artist_id,
+       a.artist_name,
+       a.artist_img,
+       a.country,
+       n.together,
+       n.score
+     FROM artist_neighbors n
+     JOIN artists a ON n.neighbor_id = a.artist_id
+     WHERE n.artist_id = ?
+     ORDER BY n.rank
+     LIMIT ?`,
+    [artistId, limit],
+    (err, artists) => {
+      if (err && err.message.includes('no such table: artist_neighbors')) {
+        return res.json([]);
+      }
+      if (err) {
+        return res.status(500).json({ error: 'Database error' });
+      }
+
+      res.json(artists);
+    }
+  );
 });
 
 // Get user's tracked artists
+// Genres come pre-joined from artist_summary (built by the Python import
+// scripts, see artist_summary.py): one indexed query per request. Name, image
+// and country always come from artists, and artists missing from the summary
+// or waiting in artist_summary_dirty get their genres from artist_genres, so
+// a stale summary never hides or mislabels a tracked row.
 app.get('/api/user/:userId/artists', (req, res) => {
   const { userId } = req.params;
 
+  db.all(
+    `SELECT
+       uat.id as tracking_id,
+       uat.artist_id,
+       uat.date_seen,
+       uat.venue,
+       uat.city,
+       uat.notes,
+       COALESCE(uat.rating, NULL) as rating,
+       uat.event_country,
+       a.artist_name,
+       a.artist_img,
+       a.country as artist_country,
+       COALESCE(s.genres, (
+         SELECT json_group_array(genre) FROM (
+           SELECT genre FROM artist_genres g WHERE g.artist_id = uat.artist_id ORDER BY genre
+         )
+       )) as genres
+     FROM user_artist_tracking uat
+     JOIN artists a ON uat.artist_id = a.artist_id
+     LEFT JOIN artist_summary s ON s.artist_id = uat.artist_id
+       AND s.artist_id NOT IN (SELECT artist_id FROM artist_summary_dirty)
+     WHERE uat.user_id = ?
+     ORDER BY uat.date_seen DESC, uat.id DESC`,
+    [userId],
+    (err, artists) => {
+      if (err && err.message.includes('no such table: artist_summary')) {
+        return getTrackedArtistsWithGenreLookups(userId, res);
+      }
+      if (err) {
+        return res.status(500).json({ error: 'Database error' });
+      }
+
+      artists.forEach((artist) => {
+        artist.genres = JSON.parse(artist.genres || '[]');
+      });
+      res.json(artists);
+    }
+  );
+});
+
+// Fallback for databases without artist_summary: one genre query per artist
+function getTrackedArtistsWithGenreLookups(userId, res) {
   db.all(
     `SELECT
        uat.id as tracking_id,
@@ -581,7 +756,7 @@ app.get('/api/user/:userId/artists', (req, res) => {
       });
     }
   );
-});
+}
 
 // Change user password
 app.post('/api/user/:userId/change-password', async (req, res) => {
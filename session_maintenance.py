@@ -0,0 +1,287 @@
+import time
+import argparse
+
+from migrations import add_column_if_missing, migrate
+from db_connection import connect
+
+# Maintenance for user_sessions, which otherwise only ever grows.
+#
+# The server stores expires_at / last_activity as ISO text and filters with
+# datetime(column) < datetime('now'), which no index can serve. Migration 8
+# adds integer epoch copies (expires_epoch, activity_epoch), kept in sync by
+# triggers so the server's writes don't change, plus indexes on them. With
+# those in place this job:
+#
+#   1. marks stale sessions offline (the server's hourly cleanup, indexed)
+#   2. deletes, a chunk per transaction, sessions expired for more than
+#      EXPIRED_GRACE_DAYS and offline ones idle for more than OFFLINE_DAYS
+#   3. gives the freed pages back: PRAGMA incremental_vacuum when the file
+#      is in auto_vacuum=INCREMENTAL mode, otherwise a full VACUUM when the
+#      free list is large enough and the last one is old enough
+#
+# and reports rows purged and bytes reclaimed. A full VACUUM may renumber
+# rowids, so the artist_fts index is rebuilt after one.
+
+DB_PATH = "music_artists.db"
+SESSION_MIGRATION = 8
+CHUNK_SIZE = 2000
+CHUNK_PAUSE_SECONDS = 0.01
+ONLINE_WINDOW_SECONDS = 5 * 60      # matches the server's "-5 minutes"
+EXPIRED_GRACE_DAYS = 1
+OFFLINE_DAYS = 30
+INCREMENTAL_VACUUM_PAGES = 10000    # per run, bounds how long the lock is held
+FULL_VACUUM_FREE_RATIO = 0.25
+FULL_VACUUM_INTERVAL_DAYS = 7
+
+DAY = 24 * 60 * 60
+
+_EXPIRES_EPOCH = "CAST(strftime('%s', {ref}.expires_at) AS INTEGER)"
+_ACTIVITY_EPOCH = "CAST(strftime('%s', COALESCE({ref}.last_activity, {ref}.created_at)) AS INTEGER)"
+
+SESSION_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_user_sessions_expires ON user_sessions (expires_epoch)",
+    "CREATE INDEX IF NOT EXISTS idx_user_sessions_activity ON user_sessions (is_online, activity_epoch)",
+]
+
+
+def install_session_epochs(conn, chunk_size=CHUNK_SIZE):
+    """
+    Add the epoch columns and their sync triggers, backfill existing rows in
+    id chunks (one transaction each) and then index them.
+    """
+    add_column_if_missing(conn, "user_sessions", "expires_epoch", "INTEGER")
+    add_column_if_missing(conn, "user_sessions", "activity_epoch", "INTEGER")
+    for name, event in (
+        ("user_sessions_epoch_ai", "INSERT"),
+        ("user_sessions_epoch_au", "UPDATE OF expires_at, last_activity, created_at"),
+    ):
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON user_sessions BEGIN
+                UPDATE user_sessions
+                SET expires_epoch = {_EXPIRES_EPOCH.format(ref="NEW")},
+                    activity_epoch = {_ACTIVITY_EPOCH.format(ref="NEW")}
+                WHERE id = NEW.id;
+            END
+            """
+        )
+    conn.commit()
+
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM user_sessions").fetchone()[0]
+    for lo in range(0, max_id, chunk_size):
+        conn.execute(
+            f"""
+            UPDATE user_sessions
+            SET expires_epoch = {_EXPIRES_EPOCH.format(ref="user_sessions")},
+                activity_epoch = {_ACTIVITY_EPOCH.format(ref="user_sessions")}
+            WHERE id > ? AND id <= ? AND expires_epoch IS NULL
+            """,
+            (lo, lo + chunk_size),
+        )
+        conn.commit()
+
+    for ddl in SESSION_INDEXES:
+        conn.execute(ddl)
+    conn.execute("ANALYZE user_sessions")
+    conn.commit()
+
+
+def _ensure_runs_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            task     TEXT PRIMARY KEY,
+            last_run INTEGER NOT NULL,
+            detail   TEXT
+        )
+        """
+    )
+
+
+def last_run(conn, task):
+    _ensure_runs_table(conn)
+    row = conn.execute("SELECT last_run FROM maintenance_runs WHERE task = ?", (task,)).fetchone()
+    return row[0] if row else None
+
+
+def record_run(conn, task, detail=""):
+    _ensure_runs_table(conn)
+    conn.execute(
+        "INSERT INTO maintenance_runs (task, last_run, detail) VALUES (?, ?, ?) "
+        "ON CONFLICT(task) DO UPDATE SET last_run = excluded.last_run, detail = excluded.detail",
+        (task, int(time.time()), detail),
+    )
+    conn.commit()
+
+
+def mark_stale_offline(conn, now=None):
+    """The server's cleanup on the epoch columns. Returns sessions set offline."""
+    now = int(now if now is not None else time.time())
+    # Two statements so each predicate gets its own index range scan
+    changed = conn.execute(
+        "UPDATE user_sessions SET is_online = 0 WHERE is_online = 1 AND activity_epoch < ?",
+        (now - ONLINE_WINDOW_SECONDS,),
+    ).rowcount
+    changed += conn.execute(
+        "UPDATE user_sessions SET is_online = 0 WHERE expires_epoch < ? AND is_online = 1",
+        (now,),
+    ).rowcount
+    conn.commit()
+    return changed
+
+
+def _delete_chunked(conn, where, params, chunk_size, pause):
+    deleted = 0
+    while True:
+        count = conn.execute(
+            f"DELETE FROM user_sessions WHERE id IN (SELECT id FROM user_sessions WHERE {where} LIMIT ?)",
+            tuple(params) + (chunk_size,),
+        ).rowcount
+        conn.commit()
+        deleted += count
+        if count < chunk_size:
+            return deleted
+        time.sleep(pause)
+
+
+def purge_sessions(conn, now=None, expired_grace_days=EXPIRED_GRACE_DAYS, offline_days=OFFLINE_DAYS,
+                   chunk_size=CHUNK_SIZE, pause=CHUNK_PAUSE_SECONDS):
+    """
+    Delete expired and long-idle offline sessions, chunk_size rows per
+    transaction so the server's writes interleave. Returns (expired, offline).
+    """
+    now = int(now if now is not None else time.time())
+    expired = _delete_chunked(
+        conn, "expires_epoch < ?", (now - expired_grace_days * DAY,), chunk_size, pause
+    )
+    offline = _delete_chunked(
+        conn, "is_online = 0 AND activity_epoch < ?", (now - offline_days * DAY,), chunk_size, pause
+    )
+    return expired, offline
+
+
+def page_stats(conn):
+    """(page_size, page_count, freelist_count)."""
+    return tuple(conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("page_size", "page_count", "freelist_count"))
+
+
+def vacuum(conn, mode="auto", enable_incremental=False):
+    """
+    Reclaim free pages. mode: "auto" (incremental if enabled, otherwise a
+    full VACUUM only when the schedule says so), "incremental", "full" or
+    "none". enable_incremental switches the file to auto_vacuum=INCREMENTAL,
+    which takes effect with the VACUUM that follows. Returns what ran.
+    """
+    if mode == "none":
+        return "none"
+    page_size, page_count, free = page_stats(conn)
+    incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    if enable_incremental and not incremental:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        mode = "full"
+    elif mode == "auto":
+        if incremental:
+            mode = "incremental"
+        else:
+            previous = last_run(conn, "vacuum")
+            due = previous is None or time.time() - previous >= FULL_VACUUM_INTERVAL_DAYS * DAY
+            mode = "full" if due and page_count and free / page_count >= FULL_VACUUM_FREE_RATIO else "none"
+
+    if mode == "incremental":
+        if not incremental:
+            raise ValueError("incremental vacuum needs auto_vacuum=INCREMENTAL (use --enable-incremental once)")
+        conn.execute(f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})").fetchall()
+        conn.commit()
+    elif mode == "full":
+        conn.commit()
+        conn.execute("VACUUM")
+        _rebuild_fts_after_vacuum(conn)
+        record_run(conn, "vacuum", f"{free} free of {page_count} pages")
+    return mode
+
+
+def _rebuild_fts_after_vacuum(conn):
+    from artist_fts import fts_tokenizer, rebuild_artist_fts
+
+    if fts_tokenizer(conn):
+        rebuild_artist_fts(conn)
+
+
+def run_maintenance(conn, vacuum_mode="auto", enable_incremental=False, now=None, **purge_options):
+    """Steps 1-3; returns a report dict."""
+    # Only the session migration: the others rebuild tables and drop columns
+    migrate(conn, only=[SESSION_MIGRATION])
+    # Created up front so it isn't counted against the pages reclaimed
+    _ensure_runs_table(conn)
+    conn.commit()
+    page_size, pages_before, free_before = page_stats(conn)
+    rows_before = conn.execute("SELECT COUNT(*) FROM user_sessions").fetchone()[0]
+    start = time.perf_counter()
+
+    set_offline = mark_stale_offline(conn, now)
+    expired, offline = purge_sessions(conn, now, **purge_options)
+    vacuum_ran = vacuum(conn, vacuum_mode, enable_incremental)
+
+    _, pages_after, free_after = page_stats(conn)
+    record_run(conn, "session_purge", f"{expired} expired, {offline} offline")
+    return {
+        "sessions_before": rows_before,
+        "set_offline": set_offline,
+        "purged_expired": expired,
+        "purged_offline": offline,
+        "vacuum": vacuum_ran,
+        # Pages in use that were freed (to the freelist or, after a VACUUM,
+        # back to the OS); the file itself can grow without a VACUUM, since
+        # each chunk allocates pages before the freed ones are reusable
+        "bytes_reclaimed": ((pages_before - free_before) - (pages_after - free_after)) * page_size,
+        "file_size_change": (pages_after - pages_before) * page_size,
+        "free_bytes": free_after * page_size,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge expired/offline sessions and reclaim the space.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--expired-grace-days", type=int, default=EXPIRED_GRACE_DAYS,
+                        help="keep expired sessions this many days")
+    parser.add_argument("--offline-days", type=int, default=OFFLINE_DAYS,
+                        help="keep offline sessions idle for less than this many days")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows deleted per transaction")
+    parser.add_argument("--vacuum", choices=["auto", "incremental", "full", "none"], default="auto",
+                        help="how to reclaim freed pages (default: auto)")
+    parser.add_argument("--enable-incremental", action="store_true",
+                        help="switch the file to auto_vacuum=INCREMENTAL (runs one full VACUUM)")
+    args = parser.parse_args()
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        print("=" * 60)
+        print("Session maintenance")
+        print("=" * 60)
+        report = run_maintenance(
+            conn,
+            vacuum_mode=args.vacuum,
+            enable_incremental=args.enable_incremental,
+            expired_grace_days=args.expired_grace_days,
+            offline_days=args.offline_days,
+            chunk_size=args.chunk_size,
+        )
+    finally:
+        conn.close()
+
+    print(f"  Sessions before:   {report['sessions_before']}")
+    print(f"  Set offline:       {report['set_offline']}")
+    print(f"  Purged (expired):  {report['purged_expired']}")
+    print(f"  Purged (offline):  {report['purged_offline']}")
+    print(f"  Vacuum:            {report['vacuum']}")
+    print(f"  Bytes reclaimed:   {report['bytes_reclaimed']:,}")
+    print(f"  File size change:  {report['file_size_change']:+,}")
+    print(f"  Free in file:      {report['free_bytes']:,}")
+    print()
+    print(f"✅ Done in {report['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
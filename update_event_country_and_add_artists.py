@@ -1,7 +1,14 @@
 import sqlite3
 import random
+import argparse
 from datetime import datetime, timedelta
 
+from artist_sampler import ArtistSampler
+from batch_update import CHUNK_SIZE, JOB_PAUSE_SECONDS, add_job_arguments, batched_update, reset_job
+from bulk_import_users import hash_password
+from migrations import add_column_if_missing, has_column
+from db_connection import connect
+
 try:
     import bcrypt
     HAS_BCRYPT = True
@@ -123,68 +130,136 @@ VENUES = [
     "Palace of Sports", "Torwar Hall"
 ]
 
+# "City, ST" suffixes that resolve to a country when the city itself is unknown
+STATE_SUFFIX_TO_COUNTRY = {
+    state: "United States"
+    for state in ["NY", "CA", "IL", "TN", "TX", "WA", "OR", "CO", "MA", "PA", "GA", "FL", "MI", "MN", "AZ", "OH"]
+}
+
+class CityCountryResolver:
+    """
+    Precompiled city -> country lookup with the same results as the old
+    linear scan over CITY_TO_COUNTRY:
+      1. the first key (in mapping order) that equals the city or contains it
+         as a substring, case-insensitively
+      2. otherwise a "City, ST" state-suffix rule
+    Step 1 is served from a substring index: every substring of every
+    lowercased key maps to the country of the first key containing it (a
+    flattened suffix trie). The exact-match table is a fast path taken from
+    the same index, so an exact match still loses to an earlier key that
+    contains the city, as before. Keys are short, so the index stays small,
+    and results are memoized per distinct city string - a backfill costs
+    O(distinct cities), not O(rows x mapping size).
+    """
+
+    def __init__(self, city_to_country, state_suffixes=None):
+        self.substrings = {}
+        for city_key, country in city_to_country.items():
+            key = city_key.lower()
+            for i in range(len(key)):
+                for j in range(i + 1, len(key) + 1):
+                    self.substrings.setdefault(key[i:j], country)
+        self.exact = {key.lower(): self.substrings[key.lower()] for key in city_to_country}
+        self.state_suffixes = dict(state_suffixes or {})
+        self.cache = {}
+
+    def resolve(self, city):
+        if not city:
+            return None
+        try:
+            return self.cache[city]
+        except KeyError:
+            pass
+
+        lowered = city.lower()
+        country = self.exact.get(lowered) or self.substrings.get(lowered)
+
+        if country is None and ", " in city:
+            parts = city.split(", ")
+            if len(parts) == 2:
+                country = self.state_suffixes.get(parts[1])
+
+        self.cache[city] = country
+        return country
+
+CITY_RESOLVER = CityCountryResolver(CITY_TO_COUNTRY, STATE_SUFFIX_TO_COUNTRY)
+
 def get_country_from_city(city):
-    if not city:
-        return None
-    
-    for city_key, country in CITY_TO_COUNTRY.items():
-        if city_key.lower() == city.lower() or city.lower() in city_key.lower():
-            return country
-    
-    if ", " in city:
-        parts = city.split(", ")
-        if len(parts) == 2:
-            state_abbr = parts[1]
-            if state_abbr in ["NY", "CA", "IL", "TN", "TX", "WA", "OR", "CO", "MA", "PA", "GA", "FL", "MI", "MN", "AZ", "OH"]:
-                return "United States"
-    
-    return None
+    return CITY_RESOLVER.resolve(city)
 
 def add_event_country_column(conn):
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            ALTER TABLE user_artist_tracking ADD COLUMN event_country TEXT
-        """)
+    if add_column_if_missing(conn, "user_artist_tracking", "event_country", "TEXT"):
         print("✓ Added event_country column to user_artist_tracking table")
-    except sqlite3.OperationalError as e:
-        if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-            print("✓ event_country column already exists")
-        else:
-            print(f"Note: {e}")
-    conn.commit()
+    else:
+        print("✓ event_country column already exists")
 
-def update_existing_records(conn):
+def backfill_event_country_by_city(conn, chunk_size=CHUNK_SIZE, pause=JOB_PAUSE_SECONDS, restart=False):
+    """
+    Backfill event_country by distinct city instead of row by row.
+
+    Resolves each distinct city (among rows with no event_country) once,
+    then fills the rows with batched_update as the resumable job
+    "event_country_by_city": every chunk is a dict lookup per row, committed
+    together with the job's cursor, so an interrupted run continues after
+    its last chunk. Prints how many rows each city covered and which cities
+    stayed unresolved, so the mapping can be extended. Returns
+    (updated_rows, unresolved) where unresolved is a list of (city, row_count).
+    """
     cursor = conn.cursor()
-    
+
     cursor.execute("""
-        SELECT id, city FROM user_artist_tracking WHERE event_country IS NULL
+        SELECT city, COUNT(*)
+        FROM user_artist_tracking
+        WHERE event_country IS NULL
+        GROUP BY city
+        ORDER BY COUNT(*) DESC
     """)
-    
-    records = cursor.fetchall()
-    
-    if not records:
+    city_counts = cursor.fetchall()
+
+    if not city_counts:
         print("No records found without event_country.")
-        return
-    
-    print(f"Found {len(records)} records without event_country.")
-    print("Updating existing records with event_country based on city...")
-    
-    updated_count = 0
-    
-    for record_id, city in records:
+        return 0, []
+
+    resolved = []
+    unresolved = []
+    for city, count in city_counts:
         country = get_country_from_city(city)
-        
         if country:
-            cursor.execute("""
-                UPDATE user_artist_tracking
-                SET event_country = ?
-                WHERE id = ?
-            """, (country, record_id))
-            updated_count += 1
-    
-    conn.commit()
+            resolved.append((city, country, count))
+        else:
+            unresolved.append((city, count))
+
+    total_rows = sum(count for _, count in city_counts)
+    print(f"Found {total_rows} records without event_country in {len(city_counts)} distinct cities.")
+
+    countries = {city: country for city, country, _ in resolved}
+    if restart:
+        reset_job(conn, "event_country_by_city")
+    updated_count = batched_update(
+        conn,
+        "user_artist_tracking",
+        "id",
+        ["city"],
+        ["event_country"],
+        lambda rows: [(record_id, countries[city]) for record_id, city in rows if city in countries],
+        where="event_country IS NULL",
+        chunk_size=chunk_size,
+        job="event_country_by_city",
+        pause=pause,
+    )
+
     print(f"✓ Updated {updated_count} records with event_country")
+    print()
+    print("Rows covered per city:")
+    for city, country, count in resolved:
+        print(f"  {city} -> {country}: {count}")
+    if unresolved:
+        print()
+        print(f"Unresolved cities ({sum(c for _, c in unresolved)} rows) - add them to CITY_TO_COUNTRY:")
+        for city, count in unresolved:
+            print(f"  {city!r}: {count}")
+
+    return updated_count, unresolved
 
 def get_or_create_test_user(conn):
     cursor = conn.cursor()
@@ -199,7 +274,7 @@ def get_or_create_test_user(conn):
     else:
         if HAS_BCRYPT:
             password = "password123"
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            hashed_password = hash_password(password)
             
             cursor.execute("""
                 INSERT INTO users (email, password, first_name, last_name, nickname)
@@ -215,15 +290,9 @@ def get_or_create_test_user(conn):
             print("Please create the user manually or install bcrypt: pip install bcrypt")
             return None
 
-def get_random_artists(conn, count=25):
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT artist_id, artist_name
-        FROM artists
-        ORDER BY RANDOM()
-        LIMIT ?
-    """, (count,))
-    return cursor.fetchall()
+def get_random_artists(conn, count=25, sampler=None):
+    sampler = sampler or ArtistSampler(conn)
+    return sampler.sample(count)
 
 def generate_random_date(days_back=730):
     days_ago = random.randint(1, days_back)
@@ -241,6 +310,12 @@ def add_artists_to_test_user(conn, user_id, num_artists=25):
     print(f"\nAdding {num_artists} artists to test@gmail.com account...")
     
     added_count = 0
+    # Migration 3 drops rating_date; only fill it while the column exists
+    with_date = has_column(conn, "user_artist_tracking", "rating_date")
+    columns = "user_id, artist_id, date_seen, venue, city, notes, rating, event_country"
+    if with_date:
+        columns += ", rating_date"
+    placeholders = ", ".join("?" * len(columns.split(", ")))
     
     for artist_id, artist_name in artists:
         date_seen = generate_random_date(days_back=730)
@@ -261,11 +336,13 @@ def add_artists_to_test_user(conn, user_id, num_artists=25):
         notes = random.choice(notes_options)
         
         try:
-            cursor.execute("""
-                INSERT INTO user_artist_tracking
-                (user_id, artist_id, date_seen, venue, city, notes, rating, rating_date, event_country)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (user_id, artist_id, date_seen, venue, city, notes, rating, rating_date, country))
+            values = (user_id, artist_id, date_seen, venue, city, notes, rating, country)
+            if with_date:
+                values += (rating_date,)
+            cursor.execute(
+                f"INSERT INTO user_artist_tracking ({columns}) VALUES ({placeholders})",
+                values,
+            )
             
             added_count += 1
             print(f"  → Added {artist_name} at {venue} in {city}, {country} on {date_seen.strftime('%Y-%m-%d')}")
@@ -276,18 +353,22 @@ def add_artists_to_test_user(conn, user_id, num_artists=25):
     print(f"\n✓ Successfully added {added_count} artists to test@gmail.com account")
 
 def main():
+    args = add_job_arguments(
+        argparse.ArgumentParser(description="Backfill event_country and add artists to the test user.")
+    ).parse_args()
+
     print("=" * 60)
     print("Updating database: Adding event_country and test user artists")
     print("=" * 60)
     print()
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH, checkpoints=True)
     
     try:
         add_event_country_column(conn)
         print()
         
-        update_existing_records(conn)
+        backfill_event_country_by_city(conn, args.chunk_size, args.pause, args.restart)
         print()
         
         user_id = get_or_create_test_user(conn)
@@ -1,5 +1,8 @@
-import sqlite3
 import random
+import argparse
+
+from batch_update import CHUNK_SIZE, JOB_PAUSE_SECONDS, add_job_arguments, batched_update, reset_job
+from db_connection import connect
 
 DB_PATH = "music_artists.db"
 
@@ -63,18 +66,10 @@ CITIES_STATES = [
 
 COUNTRIES = ["USA", "United States", "US", "United States of America"]
 
-def update_user_profiles(conn):
-    """Update existing user profiles with profile images, cities, states, and countries."""
-    cursor = conn.cursor()
-
-    # Get all user IDs
-    cursor.execute("SELECT user_id FROM user_profiles")
-    user_profiles = cursor.fetchall()
-
-    print(f"Updating {len(user_profiles)} user profiles...")
-    print()
-
-    for (user_id,) in user_profiles:
+def random_profile_updates(rows):
+    """(user_id,) rows -> (user_id, profile_image_url, city, state, country) rows."""
+    updates = []
+    for (user_id,) in rows:
         # Select random profile image
         profile_image = random.choice(PROFILE_IMAGES)
 
@@ -84,43 +79,44 @@ def update_user_profiles(conn):
         # Select random country
         country = random.choice(COUNTRIES)
 
-        # Update the user profile
-        cursor.execute("""
-            UPDATE user_profiles
-            SET profile_image_url = ?,
-                city = ?,
-                state = ?,
-                country = ?
-            WHERE user_id = ?
-        """, (profile_image, city, state, country, user_id))
-
-        # Get user info for display
-        cursor.execute("""
-            SELECT first_name, last_name, nickname
-            FROM users
-            WHERE id = ?
-        """, (user_id,))
+        updates.append((user_id, profile_image, city, state, country))
+    return updates
 
-        user = cursor.fetchone()
-        if user:
-            first_name, last_name, nickname = user
-            print(f"✓ Updated {first_name} {last_name} ({nickname})")
-            print(f"  Profile: {profile_image}")
-            print(f"  Location: {city}, {state}, {country}")
-            print()
+def update_user_profiles(conn, chunk_size=CHUNK_SIZE, pause=JOB_PAUSE_SECONDS, restart=False):
+    """Update existing user profiles with profile images, cities, states, and countries."""
+    cursor = conn.cursor()
 
-    conn.commit()
+    cursor.execute("SELECT COUNT(*) FROM user_profiles")
+    print(f"Updating {cursor.fetchone()[0]} user profiles...")
+    print()
+
+    if restart:
+        reset_job(conn, "update_user_profiles")
+    batched_update(
+        conn,
+        "user_profiles",
+        "user_id",
+        [],
+        ["profile_image_url", "city", "state", "country"],
+        random_profile_updates,
+        chunk_size=chunk_size,
+        job="update_user_profiles",
+        pause=pause,
+    )
+    print()
 
 def main():
+    args = add_job_arguments(argparse.ArgumentParser(description="Add images and locations to user profiles.")).parse_args()
+
     print("=" * 60)
     print("Updating user profiles with images and locations")
     print("=" * 60)
     print()
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH, checkpoints=True)
 
     try:
-        update_user_profiles(conn)
+        update_user_profiles(conn, args.chunk_size, args.pause, args.restart)
 
         # Show summary
         cursor = conn.cursor()
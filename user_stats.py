@@ -0,0 +1,368 @@
+import time
+import argparse
+
+from db_connection import connect
+
+# Per-user concert stats kept current by triggers on user_artist_tracking,
+# so nothing has to recount the whole tracking table:
+#
+#   user_stats          (user_id) -> concerts, distinct_artists,
+#                                    rating_sum, rating_count
+#   user_artist_counts  (user_id, artist_id) -> seen
+#   user_country_counts (user_id, country)   -> seen  (event_country)
+#   user_genre_counts   (user_id, genre)     -> seen  (genres of the artist)
+#
+# Every INSERT / DELETE / UPDATE on user_artist_tracking adds or subtracts
+# its row's contribution. Genre counts use the artist's genres at the time
+# of the change, so re-imported genres, writes made while the triggers
+# were missing, or INSERT OR REPLACE over an existing tracking row (its
+# implicit delete fires no DELETE trigger) can leave drift behind; reconcile() recomputes a chunk of
+# users at a time from user_artist_tracking (a user_id range scan on
+# idx_uat_user_date) and repairs only the rows that differ.
+
+DB_PATH = "music_artists.db"
+RECONCILE_CHUNK_USERS = 500
+TOP_K = 3
+
+# (table, key column, SELECT yielding the keys `k` of one tracking row)
+COUNTERS = [
+    ("user_artist_counts", "artist_id", "SELECT {ref}.artist_id AS k"),
+    ("user_country_counts", "country", "SELECT {ref}.event_country AS k WHERE {ref}.event_country IS NOT NULL"),
+    ("user_genre_counts", "genre", "SELECT genre AS k FROM artist_genres WHERE artist_id = {ref}.artist_id"),
+]
+
+TRIGGERS = ("user_stats_ai", "user_stats_ad", "user_stats_au")
+
+
+def _stats_statements(ref, sign):
+    """Trigger statements adding (sign=1) or removing (sign=-1) one tracking row."""
+    op = "+" if sign > 0 else "-"
+    statements = []
+    if sign > 0:
+        statements.append(
+            f"INSERT INTO user_stats (user_id) SELECT {ref}.user_id "
+            f"WHERE NOT EXISTS (SELECT 1 FROM user_stats WHERE user_id = {ref}.user_id)"
+        )
+        # A first sighting of this artist (checked before its counter row exists)
+        statements.append(
+            f"UPDATE user_stats SET distinct_artists = distinct_artists + 1 "
+            f"WHERE user_id = {ref}.user_id AND NOT EXISTS ("
+            f"SELECT 1 FROM user_artist_counts WHERE user_id = {ref}.user_id AND artist_id = {ref}.artist_id)"
+        )
+    statements.append(
+        f"UPDATE user_stats SET concerts = concerts {op} 1, "
+        f"rating_sum = rating_sum {op} COALESCE({ref}.rating, 0), "
+        f"rating_count = rating_count {op} ({ref}.rating IS NOT NULL) "
+        f"WHERE user_id = {ref}.user_id"
+    )
+
+    for table, key, source in COUNTERS:
+        source = source.format(ref=ref)
+        if sign > 0:
+            # Plain INSERT ... WHERE NOT EXISTS rather than an upsert or
+            # INSERT OR IGNORE: an outer INSERT OR REPLACE/IGNORE would
+            # override the conflict handling inside the trigger
+            statements.append(
+                f"INSERT INTO {table} (user_id, {key}, seen) SELECT {ref}.user_id, s.k, 0 FROM ({source}) s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {table} c WHERE c.user_id = {ref}.user_id AND c.{key} = s.k)"
+            )
+        statements.append(
+            f"UPDATE {table} SET seen = seen {op} 1 "
+            f"WHERE user_id = {ref}.user_id AND {key} IN (SELECT k FROM ({source}))"
+        )
+        if sign < 0:
+            if table == "user_artist_counts":
+                statements.append(
+                    f"UPDATE user_stats SET distinct_artists = distinct_artists - 1 "
+                    f"WHERE user_id = {ref}.user_id AND EXISTS ("
+                    f"SELECT 1 FROM user_artist_counts WHERE user_id = {ref}.user_id "
+                    f"AND artist_id = {ref}.artist_id AND seen <= 0)"
+                )
+            statements.append(f"DELETE FROM {table} WHERE user_id = {ref}.user_id AND seen <= 0")
+
+    if sign < 0:
+        statements.append(f"DELETE FROM user_stats WHERE user_id = {ref}.user_id AND concerts <= 0")
+    return statements
+
+
+def install_user_stats(conn):
+    """
+    Create the stats tables and triggers if they are missing. A fresh
+    install is filled by a full reconcile pass. Returns True if installed.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'user_stats_ai'").fetchone():
+        return False
+
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id          INTEGER PRIMARY KEY,
+            concerts         INTEGER NOT NULL DEFAULT 0,
+            distinct_artists INTEGER NOT NULL DEFAULT 0,
+            rating_sum       INTEGER NOT NULL DEFAULT 0,
+            rating_count     INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    for table, key, _ in COUNTERS:
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                user_id INTEGER NOT NULL,
+                {key}   TEXT NOT NULL,
+                seen    INTEGER NOT NULL,
+                PRIMARY KEY (user_id, {key})
+            ) WITHOUT ROWID
+            """
+        )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_stats_reconcile (
+            id           INTEGER PRIMARY KEY CHECK (id = 1),
+            last_user_id INTEGER
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_uat_user_date ON user_artist_tracking (user_id, date_seen)")
+
+    body = lambda statements: ";\n    ".join(statements) + ";"
+    cur.execute(
+        f"CREATE TRIGGER user_stats_ai AFTER INSERT ON user_artist_tracking BEGIN\n"
+        f"    {body(_stats_statements('NEW', 1))}\nEND"
+    )
+    cur.execute(
+        f"CREATE TRIGGER user_stats_ad AFTER DELETE ON user_artist_tracking BEGIN\n"
+        f"    {body(_stats_statements('OLD', -1))}\nEND"
+    )
+    cur.execute(
+        f"CREATE TRIGGER user_stats_au AFTER UPDATE OF user_id, artist_id, rating, event_country "
+        f"ON user_artist_tracking BEGIN\n"
+        f"    {body(_stats_statements('OLD', -1) + _stats_statements('NEW', 1))}\nEND"
+    )
+    conn.commit()
+
+    reconcile(conn, full=True, progress=False)
+    return True
+
+
+def drop_user_stats(conn):
+    for name in TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for table in ["user_stats", "user_stats_reconcile"] + [t for t, _, _ in COUNTERS]:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.commit()
+
+
+# --- reconcile -------------------------------------------------------------
+
+def _expected_rows(conn, lo, hi):
+    """{table: set of rows} recomputed from user_artist_tracking for lo < user_id <= hi."""
+    rng = "uat.user_id > ? AND uat.user_id <= ?"
+    params = (lo, hi)
+    expected = {
+        "user_stats": set(
+            conn.execute(
+                f"""
+                SELECT uat.user_id, COUNT(*), COUNT(DISTINCT uat.artist_id),
+                       COALESCE(SUM(uat.rating), 0), COUNT(uat.rating)
+                FROM user_artist_tracking uat WHERE {rng}
+                GROUP BY uat.user_id
+                """,
+                params,
+            )
+        ),
+        "user_artist_counts": set(
+            conn.execute(
+                f"SELECT uat.user_id, uat.artist_id, COUNT(*) FROM user_artist_tracking uat "
+                f"WHERE {rng} GROUP BY uat.user_id, uat.artist_id",
+                params,
+            )
+        ),
+        "user_country_counts": set(
+            conn.execute(
+                f"SELECT uat.user_id, uat.event_country, COUNT(*) FROM user_artist_tracking uat "
+                f"WHERE {rng} AND uat.event_country IS NOT NULL GROUP BY uat.user_id, uat.event_country",
+                params,
+            )
+        ),
+        "user_genre_counts": set(
+            conn.execute(
+                f"SELECT uat.user_id, g.genre, COUNT(*) FROM user_artist_tracking uat "
+                f"JOIN artist_genres g ON g.artist_id = uat.artist_id "
+                f"WHERE {rng} GROUP BY uat.user_id, g.genre",
+                params,
+            )
+        ),
+    }
+    return expected
+
+
+def _stored_rows(conn, table, lo, hi):
+    cols = "user_id, concerts, distinct_artists, rating_sum, rating_count" if table == "user_stats" else "*"
+    return set(conn.execute(f"SELECT {cols} FROM {table} WHERE user_id > ? AND user_id <= ?", (lo, hi)))
+
+
+def reconcile_range(conn, lo, hi):
+    """
+    Verify users lo < user_id <= hi against user_artist_tracking and repair
+    any difference (in one transaction). Returns the set of repaired user ids.
+    """
+    repaired = set()
+    for table, expected in _expected_rows(conn, lo, hi).items():
+        stored = _stored_rows(conn, table, lo, hi)
+        if stored == expected:
+            continue
+        missing = expected - stored
+        extra = stored - expected
+        width = len(next(iter(missing or extra)))
+        key_width = 1 if table == "user_stats" else 2
+        keys = lambda rows: {row[:key_width] for row in rows}
+
+        stale_keys = keys(extra) - keys(missing)
+        where = " AND ".join(
+            f"{col} = ?" for col in (["user_id"] if key_width == 1 else ["user_id", _counter_key(table)])
+        )
+        conn.executemany(f"DELETE FROM {table} WHERE {where}", list(stale_keys))
+        placeholders = ", ".join("?" for _ in range(width))
+        conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", list(missing))
+        repaired.update(row[0] for row in missing | extra)
+    conn.commit()
+    return repaired
+
+
+def _counter_key(table):
+    return next(key for t, key, _ in COUNTERS if t == table)
+
+
+def _next_bound(conn, lo, chunk_users):
+    """
+    Upper user_id bound of the next chunk (at most chunk_users users with
+    tracking rows and chunk_users with stats rows), or None past the end.
+    Both lookups are ordered index scans that stop after chunk_users users.
+    """
+    bounds = []
+    for sql in (
+        "SELECT DISTINCT user_id FROM user_artist_tracking WHERE user_id > ? ORDER BY user_id LIMIT ?",
+        "SELECT user_id FROM user_stats WHERE user_id > ? ORDER BY user_id LIMIT ?",
+    ):
+        row = conn.execute(f"SELECT MAX(user_id) FROM ({sql})", (lo, chunk_users)).fetchone()
+        if row[0] is not None:
+            bounds.append(row[0])
+    return min(bounds) if bounds else None
+
+
+def reconcile(conn, max_chunks=None, chunk_users=RECONCILE_CHUNK_USERS, full=False, progress=True):
+    """
+    Verify/repair stats chunk_users users at a time, continuing from where
+    the previous run stopped (wrapping around at the end), for at most
+    max_chunks chunks - so a nightly job can check a slice of users without
+    rescanning the whole table. full=True checks everyone from the start.
+    Returns (users checked, users repaired).
+    """
+    if full:
+        start_lo = 0
+    else:
+        row = conn.execute("SELECT last_user_id FROM user_stats_reconcile WHERE id = 1").fetchone()
+        start_lo = row[0] if row and row[0] is not None else 0
+
+    lo = start_lo
+    checked = repaired = chunks = 0
+    wrapped = False
+    start = time.perf_counter()
+    while max_chunks is None or chunks < max_chunks:
+        if wrapped and lo >= start_lo:
+            break
+        hi = _next_bound(conn, lo, chunk_users)
+        if hi is None:
+            if wrapped or start_lo == 0:
+                lo = 0
+                break
+            lo, wrapped = 0, True
+            continue
+        repaired += len(reconcile_range(conn, lo, hi))
+        checked += conn.execute(
+            "SELECT COUNT(*) FROM user_stats WHERE user_id > ? AND user_id <= ?", (lo, hi)
+        ).fetchone()[0]
+        chunks += 1
+        lo = hi
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"  Checked users up to id {hi} ({checked} users, {repaired} repaired, {elapsed:.2f}s)")
+
+    conn.execute("INSERT OR REPLACE INTO user_stats_reconcile (id, last_user_id) VALUES (1, ?)", (lo,))
+    conn.commit()
+    return checked, repaired
+
+
+# --- reads -----------------------------------------------------------------
+
+def get_user_stats(conn, user_id, top_k=TOP_K):
+    """Stats for one user: counters, average rating and top countries/genres."""
+    row = conn.execute(
+        "SELECT concerts, distinct_artists, rating_sum, rating_count FROM user_stats WHERE user_id = ?",
+        (user_id,),
+    ).fetchone()
+    concerts, distinct_artists, rating_sum, rating_count = row or (0, 0, 0, 0)
+
+    def top(table, key):
+        return conn.execute(
+            f"SELECT {key}, seen FROM {table} WHERE user_id = ? ORDER BY seen DESC, {key} LIMIT ?",
+            (user_id, top_k),
+        ).fetchall()
+
+    return {
+        "concerts": concerts,
+        "distinct_artists": distinct_artists,
+        "average_rating": rating_sum / rating_count if rating_count else None,
+        "top_countries": top("user_country_counts", "country"),
+        "top_genres": top("user_genre_counts", "genre"),
+    }
+
+
+def sync_concerts_attended(conn):
+    """Copy user_stats.concerts into user_profiles.concerts_attended where it differs."""
+    cur = conn.execute(
+        """
+        UPDATE user_profiles
+        SET concerts_attended = COALESCE((SELECT concerts FROM user_stats s WHERE s.user_id = user_profiles.user_id), 0)
+        WHERE concerts_attended IS NOT COALESCE((SELECT concerts FROM user_stats s WHERE s.user_id = user_profiles.user_id), 0)
+        """
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Install, reconcile and inspect the per-user stats tables.")
+    parser.add_argument("command", choices=("install", "reconcile", "show", "drop"))
+    parser.add_argument("user_id", nargs="?", type=int, help="user to show (for show)")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument("--chunks", type=int, default=None, help="reconcile: stop after this many chunks")
+    parser.add_argument("--chunk-users", type=int, default=RECONCILE_CHUNK_USERS, help="reconcile: users per chunk")
+    parser.add_argument("--full", action="store_true", help="reconcile: check every user from the start")
+    args = parser.parse_args()
+
+    conn = connect(args.db, checkpoints=True)
+    try:
+        if args.command == "install":
+            start = time.perf_counter()
+            installed = install_user_stats(conn)
+            print(f"✓ user stats {'installed' if installed else 'already installed'} ({time.perf_counter() - start:.2f}s)")
+        elif args.command == "reconcile":
+            checked, repaired = reconcile(conn, args.chunks, args.chunk_users, args.full)
+            print(f"✓ Checked {checked} users, repaired {repaired}")
+        elif args.command == "show":
+            if args.user_id is None:
+                parser.error("show needs a user_id")
+            for key, value in get_user_stats(conn, args.user_id).items():
+                print(f"  {key}: {value}")
+        else:
+            drop_user_stats(conn)
+            print("✓ user stats dropped")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()